@@ -4,18 +4,33 @@ import queue
 import subprocess
 import time
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from datetime import datetime
 from threading import Event
+from typing import Any
 
-from shared.data import AppConfiguration, CubeConfiguration, StatusData
+from shared.actionqueue import ActionQueue
+from shared.configstore import ConfigStore
+from shared.data import ActionRequest, AppConfiguration, CubeConfiguration, SharedStatus
 from shared.enumerations import Action, CubeColor, Status
 from uart.command import ButtonState, BuzzerState, Command, LiftState, MoveLift, WerniState
 from uart.commandbuilder import CommandBuilder
+from uart.commandqueue import CommandQueue
 from uart.communicator import UartCommunicator
+from video.debug import DebugView
 from video.processing import StreamProcessing
 from web.api import CubeApi
 from web.server import WebServer
 from .builder import Builder
+from .buildplan import BuildStep
+from .energy import EnergyModel
+from .history import RunHistory, RunPhase
+from .optimizer import PlanOptimizer
+from .planner import CUBE_COLORS, BuildPlanner
+from .plantable import PlanTable
+
+ENERGY_WINDOW_SLACK = 0.5
+PROVISIONAL_BUILD_STEPS = 16
 
 
 class RebuilderApplication:
@@ -29,21 +44,43 @@ class RebuilderApplication:
 
         self._recognition_queue: queue.Queue = queue.Queue()
         self._uart_read: queue.Queue = queue.Queue()
-        self._uart_write: queue.Queue = queue.Queue()
-        self._web_queue: queue.Queue = queue.Queue()
+        self._uart_write = CommandQueue()
 
-        self._builder = Builder(self._uart_write)
+        self._plan_optimizer = PlanOptimizer()
+        self._planner = BuildPlanner()
+        self._plan_table = PlanTable(self._planner.cost_model)
+        self._time_cost_model = self._planner.cost_model
+        self._energy_model = EnergyModel()
+        self._energy_steps: list[BuildStep] = []
+        self._last_energy: float | None = None
+        self._last_energy_time = 0.0
+        self._steps_planned: int | None = None
+        self._builder = Builder(self._uart_write, self._plan_optimizer, self._planner, self._plan_table)
+        self._color_counts = {color: 1 for color in (CubeColor.NONE, *CUBE_COLORS)}
         self._cube_api = CubeApi(app_config)
-        self._status = StatusData()
-        self._webserver = WebServer(self._web_queue, self._status)
+        self._status = SharedStatus()
+        self._web_queue = ActionQueue(self._status)
+        self._pending_actions: dict[Command, ActionRequest] = {}
+        self._config_store = ConfigStore()
+        self._config_store.add_listener(self._apply_settings)
+        self._debug_view = DebugView()
+        self._run_history = RunHistory()
+        self._webserver = WebServer(app_config, self._config_store, self._web_queue, self._status, self._debug_view,
+                                    self._run_history)
 
-        self._stream_processing = StreamProcessing(app_config, self._recognition_queue)
+        self._stream_processing = StreamProcessing(app_config, self._recognition_queue, self._debug_view)
         self._uart_communicator = UartCommunicator(app_config, self._uart_read, self._uart_write)
 
     def start(self) -> None:
         """Starts the rebuilder application processes."""
         self._logger.info('Starting rebuilder application processes')
         self._halt_event.clear()
+        if not self._plan_table.load():
+            self._logger.warning('Plan table not available, searching build plans at runtime')
+        self._energy_model.load()
+        self._run_history.open()
+        self._config_store.load()
+        self._cube_api.start()
         self._webserver.start()
         self._uart_communicator.start()
         self._executor.submit(self._handle_web_actions)
@@ -65,46 +102,68 @@ class RebuilderApplication:
         self._executor.shutdown()
         self._stream_processing.stop()
         self._uart_communicator.shutdown()
+        self._webserver.stop()
+        self._config_store.close()
+        self._plan_table.close()
+        self._run_history.close()
         self._logger.info('Rebuilder application processes stopped')
 
     def halt(self) -> None:
         """Halts all processes of the rebuilder application."""
         self._logger.info('Halting rebuilder application processes')
         self._halt_event.set()
+        self._web_queue.close()
         self._stream_processing.halt()
         self._uart_communicator.halt()
+        self._debug_view.halt()
+        self._webserver.halt()
 
     def _handle_web_actions(self) -> None:
         """Handles incoming web actions."""
         self._logger.info('Entering web actions handling loop')
         while not self._halt_event.is_set():
-            try:
-                action = self._web_queue.get(timeout=1.0)
-                if isinstance(action, Action):
-                    self._logger.info('Received web action: %s', action)
-                    if action == Action.INIT and self._status.status in (Status.IDLE, Status.COMPLETED):
-                        self._status.reset()
-                        self._status.status = Status.INIT
-                        self._uart_write.put(CommandBuilder.move_lift(MoveLift.MOVE_UP))
-                        self._uart_write.put(CommandBuilder.other_command(Command.PRIME_MAGAZINE))
-                        self._stream_processing.start()
-                    elif action in (Action.START, Action.STOP):
-                        self._handle_start_stop(start=action == Action.START, stop=action == Action.STOP)
-                    elif action == Action.RESTART:
-                        self._logger.info('Restarting application')
-                        subprocess.run(['systemctl', 'restart', 'pren-rebuilder.service'], check=False)
-                    elif action == Action.REBOOT:
-                        self._logger.info('Rebooting operating system')
-                        subprocess.run(['systemctl', 'reboot'], check=False)
-                    elif action == Action.RESET:
-                        self._uart_write.put(CommandBuilder.other_command(Command.RESET_WERNI))
-                else:
-                    self._logger.warning('Received data has wrong type: %s', type(action))
-            except queue.Empty:
-                pass
+            request = self._web_queue.get()
+            if request is None:
+                break
+            self._logger.info('Received web action: %s', request.action)
+            self._handle_web_action(request)
 
         self._logger.info('Exiting web actions handling loop')
 
+    def _handle_web_action(self, request: ActionRequest) -> None:
+        """Handles the web action and tracks its state until its effect completed."""
+        action = request.action
+        status = self._status.snapshot.status
+        if action == Action.INIT:
+            if status not in (Status.IDLE, Status.COMPLETED):
+                self._web_queue.reject(request, f'Not possible while {status}')
+                return
+            self._status.reset(status=Status.INIT)
+            self._web_queue.accept(request)
+            self._pending_actions[Command.PRIME_MAGAZINE] = request
+            self._run_history.begin()
+            self._cube_api.warm_up()
+            self._uart_write.put(CommandBuilder.move_lift(MoveLift.MOVE_UP))
+            self._uart_write.put(CommandBuilder.other_command(Command.PRIME_MAGAZINE))
+            self._stream_processing.start()
+        elif action in (Action.START, Action.STOP):
+            if not self._handle_start_stop(start=action == Action.START, stop=action == Action.STOP, request=request):
+                self._web_queue.reject(request, f'Not possible while {status}')
+        elif action == Action.RESTART:
+            self._web_queue.accept(request)
+            self._logger.info('Restarting application')
+            result = subprocess.run(['systemctl', 'restart', 'pren-rebuilder.service'], check=False)
+            self._web_queue.finish(request, result.returncode == 0)
+        elif action == Action.REBOOT:
+            self._web_queue.accept(request)
+            self._logger.info('Rebooting operating system')
+            result = subprocess.run(['systemctl', 'reboot'], check=False)
+            self._web_queue.finish(request, result.returncode == 0)
+        elif action == Action.RESET:
+            self._web_queue.accept(request)
+            self._uart_write.put(CommandBuilder.other_command(Command.RESET_WERNI))
+            self._web_queue.finish(request)
+
     def _handle_uart_messages(self) -> None:
         """Handles incoming UART messages."""
         self._logger.info('Entering UART message handling loop')
@@ -122,15 +181,17 @@ class RebuilderApplication:
                     self._handle_start_stop(start, stop)
                 if cmd == Command.EXECUTION_FINISHED:
                     exec_finished = Command(message.data.exec_finished.cmd)
+                    success = bool(message.data.exec_finished.success)
                     self._logger.info('Finished command: %s', exec_finished)
-                    self._handle_execution_finished(exec_finished)
+                    self._handle_execution_finished(exec_finished, success)
                 if cmd == Command.SEND_STATE:
+                    self._record_energy(message.data.send_state.energy)
                     energy = self._convert_energy(message.data.send_state.energy)
-                    self._status.energy = energy
+                    self._status.update(energy=energy)
                     lift_state = LiftState(message.data.send_state.lift_state)
                     werni_state = WerniState(message.data.send_state.werni_state)
                     if lift_state == LiftState.LIFT_DOWN:
-                        self._status.steps_finished = self._status.steps_total
+                        self._status.modify(lambda status: replace(status, steps_finished=status.steps_total))
                         self._finish_run()
                     self._logger.info('State - energy: %.3fWh, lift: %s, werni: %s', energy, lift_state, werni_state)
             except ValueError as error:
@@ -147,8 +208,9 @@ class RebuilderApplication:
             try:
                 config = self._recognition_queue.get(timeout=1.0)
             except queue.Empty:
-                if self._status.status in (Status.RUNNING, Status.PAUSED):
-                    current_runtime = (time.time_ns() - self._status.time_start) / 1_000_000_000
+                status = self._status.snapshot
+                if status.status in (Status.RUNNING, Status.PAUSED):
+                    current_runtime = (time.time_ns() - status.time_start) / 1_000_000_000
                     if current_runtime > self._app_config.app_recognition_timeout:
                         config = CubeConfiguration()
                         if not self._builder.is_running:
@@ -156,7 +218,7 @@ class RebuilderApplication:
                             config.set_default()
                         else:
                             self._logger.warning('Recognition timeout passed, finishing current config')
-                            config.config = self._status.config.copy()
+                            config.config = list(status.config)
                             for pos in range(1, 9):
                                 if config.get_color(pos) == CubeColor.UNKNOWN:
                                     config.set_color(CubeColor.NONE, pos)
@@ -167,83 +229,201 @@ class RebuilderApplication:
                 self._logger.warning('Received data has wrong type: %s', type(config))
                 return
 
-            self._status.config = config.config.copy()
-            self._status.steps_finished = sum(1 for cube in config.config.copy() if cube != CubeColor.UNKNOWN)
+            previous = self._status.snapshot
+            self._status.update(config=tuple(config.config))
+            resolved: dict[int, CubeColor] = {
+                i: color for i, color in enumerate(config.config)
+                if color != CubeColor.UNKNOWN and previous.config[i] == CubeColor.UNKNOWN}
+            for i, color in resolved.items():
+                self._run_history.record(RunPhase.POSITION, f'{i + 1}={color.name.lower()}')
             if self._app_config.app_incremental_build:
+                self._builder.build_resolved(resolved)
+            elif self._app_config.app_speculative_build and not config.completed():
                 self._builder.set_config(config.config.copy())
-                self._builder.build()
+                self._builder.speculate(self._color_priors())
+            self._update_progress()
 
             if config.completed():
                 self._logger.info('Received complete configuration: %s', config.to_dict())
-                self._status.time_config = time.time_ns()
-                self._cube_api.submit(self._cube_api.post_config, config.to_dict(), datetime.now())
+                self._status.update(time_config=time.time_ns())
+                self._run_history.record(RunPhase.CONFIG)
+                for color in config.config[:4]:
+                    self._color_counts[color] = self._color_counts.get(color, 0) + 1
+                self._cube_api.submit_config(config.to_dict(), datetime.now())
 
                 if not self._app_config.app_incremental_build:
                     self._builder.set_config(config.config.copy())
-                    self._builder.build(build_doubles_first=True)
+                    self._builder.build_planned()
                 self._builder.finish_build()
+                self._steps_planned = self._builder.build_plan.steps_total
+                self._update_progress()
 
                 self._stream_processing.halt()
                 self._stream_processing.stop_recognition()
 
         self._logger.info('Exiting recognition result processing loop')
 
-    def _handle_start_stop(self, start: bool = False, stop: bool = False) -> None:
-        """Handles start and stop signals."""
+    def _handle_start_stop(self, start: bool = False, stop: bool = False,
+                           request: ActionRequest | None = None) -> bool:
+        """Handles start and stop signals, returns false if they are not possible in the current status."""
         if stop:
-            if self._status.status == Status.RUNNING:
+            if self._status.snapshot.status == Status.RUNNING:
                 self._logger.info('Pausing build')
-                self._uart_write.put(CommandBuilder.other_command(Command.PAUSE_BUILD))
-            else:
-                self._logger.warning('Run not started yet')
+                self._queue_pending(Command.PAUSE_BUILD, request)
+                return True
+            self._logger.warning('Run not started yet')
         elif start:
-            if self._status.status == Status.PAUSED:
+            if self._status.snapshot.status == Status.PAUSED:
                 self._logger.info('Resuming build')
-                self._uart_write.put(CommandBuilder.other_command(Command.RESUME_BUILD))
-            elif self._status.status == Status.READY:
+                self._queue_pending(Command.RESUME_BUILD, request)
+                return True
+            if self._status.snapshot.status == Status.READY:
+                if request is not None:
+                    self._web_queue.accept(request)
                 self._start_run()
-            else:
-                self._logger.warning('Run not initialized yet')
+                if request is not None:
+                    self._web_queue.finish(request)
+                return True
+            self._logger.warning('Run not initialized yet')
+        return False
+
+    def _queue_pending(self, command: Command, request: ActionRequest | None) -> None:
+        """Queues the command, the web action is registered first to be finished with the command."""
+        if request is not None:
+            self._web_queue.accept(request)
+            self._pending_actions[command] = request
+        self._uart_write.put(CommandBuilder.other_command(command))
 
-    def _handle_execution_finished(self, exec_finished: Command) -> None:
+    def _handle_execution_finished(self, exec_finished: Command, success: bool = True) -> None:
         """Handles execution finished UART message."""
+        if exec_finished in (Command.ROTATE_GRID, Command.PLACE_CUBES, Command.MOVE_LIFT):
+            step = self._builder.build_plan.complete(exec_finished, success)
+            if step is not None:
+                self._logger.debug('Build step %s finished - success: %s, measured: %.3fs, predicted: %.3fs',
+                                   exec_finished, step.success, step.duration, step.predicted)
+                self._run_history.record(RunPhase.COMMAND, exec_finished.name if step.success
+                                         else f'{exec_finished.name} failed')
+                self._update_progress()
+                if (self._app_config.app_efficiency_mode and self._status.snapshot.status == Status.RUNNING
+                        and exec_finished != Command.MOVE_LIFT):
+                    # Measures the energy of each build command to learn the energy model
+                    self._energy_steps.append(step)
+                    self._uart_write.put(CommandBuilder.other_command(Command.GET_STATE))
+
+        request = self._pending_actions.pop(exec_finished, None)
         if exec_finished == Command.PRIME_MAGAZINE:
-            self._status.status = Status.READY
+            self._status.update(status=Status.READY)
         elif exec_finished == Command.PAUSE_BUILD:
-            self._status.status = Status.PAUSED
+            self._status.update(status=Status.PAUSED)
         elif exec_finished == Command.RESUME_BUILD:
-            self._status.status = Status.RUNNING
-        elif exec_finished == Command.MOVE_LIFT and self._status.status == Status.RUNNING:
+            self._status.update(status=Status.RUNNING)
+        elif exec_finished == Command.MOVE_LIFT and self._status.snapshot.status == Status.RUNNING:
             self._uart_write.put(CommandBuilder.other_command(Command.GET_STATE))
+        if request is not None:
+            self._web_queue.finish(request, success)
 
     def _start_run(self) -> None:
         """Starts a new run if not already one in progress."""
-        if self._status.status in (Status.RUNNING, Status.PAUSED):
+        if self._status.snapshot.status in (Status.RUNNING, Status.PAUSED):
             self._logger.warning('Run already in progress')
             return
 
         self._logger.info('Starting new run')
-        self._status.status = Status.RUNNING
         self._builder.reset()
-        self._status.time_start = time.time_ns()
-        self._cube_api.submit(self._cube_api.post_start)
+        self._plan_optimizer.reset()
+        self._uart_write.reset_metrics()
+        self._energy_steps = []
+        self._last_energy = None
+        self._steps_planned = None
+        self._planner.cost_model = self._time_cost_model
+        if self._app_config.app_efficiency_mode:
+            energy_cost_model = self._energy_model.cost_model()
+            if energy_cost_model is not None:
+                self._logger.info('Planning builds with the measured energy: %s', energy_cost_model)
+                self._planner.cost_model = energy_cost_model
+            else:
+                self._logger.info('Not enough energy measurements, planning builds with the duration')
+        self._status.update(status=Status.RUNNING, time_start=time.time_ns())
+        self._update_progress()
+        self._run_history.record(RunPhase.START)
+        self._cube_api.start_run()
         self._uart_write.put(CommandBuilder.other_command(Command.RESET_ENERGY_MEASUREMENT))
+        if self._app_config.app_efficiency_mode:
+            # The baseline reading of the energy for the first build step
+            self._uart_write.put(CommandBuilder.other_command(Command.GET_STATE))
         self._stream_processing.start_recognition()
 
     def _finish_run(self) -> None:
         """Finishes the current run."""
-        if self._status.status not in (Status.RUNNING, Status.PAUSED):
+        if self._status.snapshot.status not in (Status.RUNNING, Status.PAUSED):
             self._logger.warning('No run in progress')
             return
 
         self._logger.info('Finishing current run')
-        self._status.status = Status.COMPLETED
-        self._status.time_end = time.time_ns()
+        self._run_history.record(RunPhase.LIFT_DOWN)
+        status = self._status.update(status=Status.COMPLETED, time_end=time.time_ns())
         self._stream_processing.stop()
-        self._cube_api.submit(self._cube_api.post_end)
+        self._cube_api.submit_end()
         self._executor.submit(self._buzzer)
         self._logger.info('Run completed - config: %.3fs, total: %.3fs',
-                          self._status.duration_config, self._status.duration_total)
+                          status.duration_config, status.duration_total)
+        if self._cube_api.start_latency is not None:
+            self._logger.info('Cube API start request answered in %.3fs', self._cube_api.start_latency)
+        self._logger.info('Build plan optimized - commands saved: %s, degrees saved: %s°',
+                          self._plan_optimizer.commands_saved, self._plan_optimizer.degrees_saved)
+        self._energy_model.record_run(self._run_mode(), status.energy, status.duration_total)
+        self._energy_model.save()
+        run = self._run_history.finish(self._run_mode(), {str(pos): str(color) for pos, color in
+                                                          enumerate(status.config, start=1)},
+                                       status.energy, self._cube_api.start_latency, len(self._cube_api.outbox))
+        self._executor.submit(self._run_history.save, run)
+        for mode, run_energy in sorted(self._energy_model.modes.items()):
+            self._logger.info('Energy %s mode - runs: %s, mean energy: %.4fWh, mean duration: %.3fs',
+                              mode, run_energy.runs, run_energy.mean_energy, run_energy.mean_duration)
+        steps = self._builder.build_plan.steps
+        finished = [step for step in steps if step.is_finished]
+        self._logger.info('Build steps finished: %s/%s - measured: %.3fs, predicted: %.3fs',
+                          len(finished), len(steps), sum(step.duration for step in finished),
+                          sum(step.predicted for step in finished))
+        for action, action_metrics in self._web_queue.metrics().items():
+            self._logger.info('Web action %s - actions: %s, mean latency: %.3fs, max latency: %.3fs',
+                              action, action_metrics.count, action_metrics.mean_latency, action_metrics.max_latency)
+        for lane, metrics in self._uart_write.metrics().items():
+            self._logger.info('UART queue %s - commands: %s, mean delay: %.3fs, max delay: %.3fs',
+                              lane.name, metrics.count, metrics.mean_delay, metrics.max_delay)
+        for health in self._uart_communicator.health:
+            self._logger.info('UART connection %s - uptime: %.3fs, reconnects: %s, last error: %s',
+                              health.port, health.uptime, health.reconnects, health.last_error or '-')
+
+    def _update_progress(self) -> None:
+        """Updates the steps of the run from the recognized positions and the finished build steps.
+
+        Until the build plan was sent, the build is counted with the steps of the longest build as provisional
+        total, so the progress does not jump backwards once the total of the planned steps is known.
+        """
+        steps_finished, steps_total = self._builder.build_plan.progress
+        if self._steps_planned is None:
+            steps_total = max(steps_total, PROVISIONAL_BUILD_STEPS)
+        else:
+            steps_total = self._steps_planned
+        self._status.modify(lambda status: replace(
+            status, steps_total=len(status.config) + steps_total,
+            steps_finished=sum(1 for cube in status.config if cube != CubeColor.UNKNOWN) + steps_finished))
+
+    def _apply_settings(self, section: str, data: dict[str, Any]) -> None:
+        """Applies the changed settings that are used while the application is running."""
+        if section != 'app':
+            return
+        self._app_config.app_confidence = data.get('confidence', self._app_config.app_confidence)
+        self._app_config.app_recognition_timeout = data.get('recognition_timeout',
+                                                            self._app_config.app_recognition_timeout)
+        self._logger.info('Settings applied - confidence: %s frames, recognition timeout: %ss',
+                          self._app_config.app_confidence, self._app_config.app_recognition_timeout)
+
+    def _color_priors(self) -> dict[CubeColor, float]:
+        """Returns the probabilities of the colors on the lower positions, observed in the previous runs."""
+        total = sum(self._color_counts.values())
+        return {color: count / total for color, count in self._color_counts.items()}
 
     def _buzzer(self) -> None:
         """Marks the end of the run with the buzzer for a few seconds."""
@@ -251,9 +431,30 @@ class RebuilderApplication:
         time.sleep(0.5)
         self._uart_write.put(CommandBuilder.enable_buzzer(BuzzerState.DISABLE))
 
-    def _convert_energy(self, energy: float) -> float:
-        """Converts the energy measurement into Wh."""
-        multiplier = 1.0
+    def _record_energy(self, energy: float) -> None:
+        """Records the energy used by the build step measured since the previous energy measurement.
+
+        The energy of a step is the difference to the previous reading, the baseline of the run or the reading
+        after the step before. It is only recorded if a single step finished in between and the previous reading
+        was taken at most ENERGY_WINDOW_SLACK seconds before the step started, so the energy used while waiting
+        is not attributed to it. The energy of the next step until the reading arrives is attributed to this step
+        and subtracted from the next step again.
+        """
+        now = time.monotonic()
+        if (len(self._energy_steps) == 1 and self._last_energy is not None
+                and self._energy_steps[0].started - self._last_energy_time <= ENERGY_WINDOW_SLACK):
+            self._energy_model.record(self._energy_steps[0].message, energy - self._last_energy)
+        self._energy_steps = []
+        self._last_energy = energy
+        self._last_energy_time = now
+
+    def _run_mode(self) -> str:
+        """Returns the name of the mode of the run."""
         if self._app_config.app_efficiency_mode:
-            multiplier = 0.5
-        return (energy / 3600) * multiplier
+            return 'efficiency'
+        return 'fast' if self._app_config.app_fast_mode else 'default'
+
+    @staticmethod
+    def _convert_energy(energy: float) -> float:
+        """Converts the energy measurement into Wh."""
+        return energy / 3600
@@ -5,8 +5,20 @@ from enum import Enum
 from threading import Event
 
 from shared.enumerations import CubeColor
-from uart.command import MoveLift
+from uart.command import Message, MoveLift
 from uart.commandbuilder import CommandBuilder
+from .buildplan import BuildPlan
+from .optimizer import PlanOptimizer
+from .planner import CUBE_COLORS, MAGAZINES, BuildPlanner, PlanStep
+from .plantable import PlanTable
+
+# The colors of the packed state, the index is used as color code
+COLORS = [CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE, CubeColor.UNKNOWN]
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+NONE, RED, YELLOW, BLUE, UNKNOWN = range(len(COLORS))
+CUBE_CODES = (RED, YELLOW, BLUE)
+LOWER = 0x0F
+ALL = 0xFF
 
 
 class CubeState(Enum):
@@ -17,38 +29,59 @@ class CubeState(Enum):
 
 
 class Builder:
-    """Sends the commands using the UART communication protocol to build the detected cube configuration."""
+    """Sends the commands using the UART communication protocol to build the detected cube configuration.
+
+    The state is packed into bitboards: the configuration has a mask of the 8 positions for each
+    color, the cube states a mask of the placed and the not placed positions, and the magazine
+    position a mask of the 4 lower positions for each color that is rotated with the grid.
+    """
 
-    def __init__(self, uart_write: queue.Queue) -> None:
+    def __init__(self, uart_write: queue.Queue, optimizer: PlanOptimizer | None = None,
+                 planner: BuildPlanner | None = None, plan_table: PlanTable | None = None) -> None:
         self._logger = logging.getLogger('rebuilder.builder')
         self._uart_write = uart_write
+        self._optimizer = optimizer
+        self._planner = planner if planner is not None else BuildPlanner()
+        self._plan_table = plan_table
+        self._plan: list[Message] | None = None
+        self._build_plan = BuildPlan()
+        self._ready: list[set[int]] = [set(), set(), set(), set()]
         self._rotated = 0
         self._in_progress = Event()
 
-        self._config: list[CubeColor] = []
-        self._pos: list[CubeColor] = []
-        self._cube_states: list[CubeState] = []
+        self._config: list[int] = []
+        self._pos: list[int] = []
+        self._placed = 0
+        self._not_placed = 0
 
         self.reset()
 
     def reset(self) -> None:
         """Resets the state of the builder."""
         self._in_progress.clear()
-        self._config = [CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED,
-                        CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED]
-        self._pos = [CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE]
-        self._cube_states = [CubeState.UNKNOWN, CubeState.UNKNOWN, CubeState.UNKNOWN, CubeState.UNKNOWN,
-                             CubeState.UNKNOWN, CubeState.UNKNOWN, CubeState.UNKNOWN, CubeState.UNKNOWN]
+        self._build_plan = BuildPlan()
+        self._ready = [set(), set(), set(), set()]
+        self._config = self._pack([CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED,
+                                   CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED])
+        self._pos = self._pack(MAGAZINES)
+        self._placed = 0
+        self._not_placed = 0
 
     @property
     def cube_states(self) -> list[CubeState]:
         """Returns the cube states."""
-        return self._cube_states.copy()
+        return [CubeState.PLACED if self._placed >> i & 1 else
+                CubeState.NOTPLACED if self._not_placed >> i & 1 else CubeState.UNKNOWN for i in range(8)]
 
     @property
     def pos(self) -> list[CubeColor]:
         """Returns the current position."""
-        return self._pos.copy()
+        return self._unpack(self._pos, 4)
+
+    @property
+    def build_plan(self) -> BuildPlan:
+        """Returns the plan tracking the execution of the commands sent since the last reset."""
+        return self._build_plan
 
     @property
     def is_running(self) -> bool:
@@ -60,23 +93,108 @@ class Builder:
         for i in range(4):
             if config[i] == CubeColor.UNKNOWN:
                 config[i + 4] = CubeColor.UNKNOWN
-        self._config = config.copy()
+        self._config = self._pack(config)
 
-    def build(self, build_doubles_first: bool = False) -> None:
-        """Builds the cube configuration, optionally trying to build doubles."""
+    def build(self, build_doubles_first: bool = False) -> BuildPlan:
+        """Builds the cube configuration, optionally trying to build doubles, returns the build plan."""
         self._in_progress.set()
+        self._start_plan()
         if build_doubles_first:
             self.build_doubles()
         self.build_whats_possible()
+        self._send_plan()
+        return self._build_plan
+
+    def build_planned(self) -> BuildPlan:
+        """Builds the remaining cubes with the lowest cost plan of the planner, returns the build plan."""
+        self._in_progress.set()
+        self.update_cube_states()
+        cubes = self._config[RED] | self._config[YELLOW] | self._config[BLUE]
+        config = self._unpack(self._config, 8)
+        steps = None
+        if (self._plan_table is not None and self._plan_table.matches(self._planner.cost_model)
+                and self._rotated % 4 == 0 and self._placed & cubes == 0):
+            steps = self._plan_table.lookup(config)
+        if steps is None:
+            steps = self._planner.plan(config, self._rotated, self._placed & cubes)
+
+        self._start_plan()
+        self._apply_steps(steps)
+        self._set_placed(cubes)
+        self._send_plan()
+        return self._build_plan
+
+    def build_resolved(self, resolved: dict[int, CubeColor]) -> BuildPlan:
+        """Builds the cubes that can be placed after the positions were resolved, positions start at 0.
+
+        The builder keeps the cubes ready to place grouped by the rotation that brings their magazine
+        above them, so an update only handles the resolved positions and emits the new commands.
+        """
+        self._in_progress.set()
+        for i, color in resolved.items():
+            bit = 1 << i
+            if color == CubeColor.UNKNOWN or (self._placed | self._not_placed) & bit:
+                continue
+            for code in range(len(COLORS)):
+                self._config[code] &= ~bit
+            self._config[COLOR_CODES[color]] |= bit
+            if color not in CUBE_COLORS:
+                self._placed |= bit
+                continue
+            self._not_placed |= bit
+            below = bit >> 4
+            if i < 4 or self._placed & ~self._config[NONE] & below:
+                self._ready[self._ready_rotation(i)].add(i)
+            elif self._placed & below:
+                self._logger.warning('Cube on position %s has no cube below it', i + 1)
+
+        self._start_plan()
+        while any(self._ready):
+            self._place_ready()
+        self._send_plan()
+        return self._build_plan
+
+    def speculate(self, priors: dict[CubeColor, float]) -> BuildPlan:
+        """Builds the certain cubes of the partial configuration and pre-rotates the grid for the unknown ones.
+
+        A stack is certain once both of its positions are known, its cubes are placed with the lowest cost
+        plan. If nothing can be placed, the grid is rotated to the position where the magazines most likely
+        match the unknown lower positions according to the color priors. A wrong guess only costs a rotation,
+        the final plan starts from the current rotation.
+        """
+        self._in_progress.set()
+        unknown = self._config[UNKNOWN]
+        stacks = ~(unknown | unknown >> 4) & LOWER
+        known = stacks | stacks << 4
+        certain = [color if known >> i & 1 else CubeColor.UNKNOWN
+                   for i, color in enumerate(self._unpack(self._config, 8))]
+        cubes = (self._config[RED] | self._config[YELLOW] | self._config[BLUE]) & known
+        steps = self._planner.plan(certain, self._rotated, self._placed & cubes)
+
+        self._start_plan()
+        if any(any(step.cubes) for step in steps):
+            self._logger.info('Speculative build of the certain cubes: %s', certain)
+            self._apply_steps(steps)
+            self._set_placed(cubes)
+        else:
+            times = self._likely_rotation(priors) - self._rotated % 4
+            if times % 4 != 0:
+                self._logger.info('Speculative pre-rotation of the grid')
+            self.rotate_grid(times, rotate_pos=True)
+        self._send_plan()
+        return self._build_plan
 
     def build_doubles(self) -> None:
         """Tries to build doubles if possible."""
+        doubles = 0
         config = [CubeColor.NONE, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE]
-        for i in range(4):
-            if self._config[i] == self._config[i + 4] and self._config[i] != CubeColor.UNKNOWN:
-                config[i] = self._config[i]
-                self._cube_states[i] = CubeState.PLACED
-                self._cube_states[i + 4] = CubeState.PLACED
+        for code in range(UNKNOWN):
+            stacks = self._config[code] & self._config[code] >> 4 & LOWER
+            doubles |= stacks
+            for i in range(4):
+                if stacks >> i & 1:
+                    config[i] = COLORS[code]
+        self._set_placed(doubles | doubles << 4)
         self.build_config(config, True)
 
     def build_whats_possible(self) -> None:
@@ -84,107 +202,190 @@ class Builder:
         while True:
             self.update_cube_states()
             self.place_not_placed()
-            if all(state != CubeState.NOTPLACED for state in self._cube_states):
+            if not self._not_placed:
                 break
 
-    def finish_build(self) -> None:
-        """Returns the grid to the correct position and moves the lift down."""
-        self.rotate_grid(4 - self._rotated, rotate_pos=True)
+    def finish_build(self) -> BuildPlan:
+        """Returns the grid to the correct position and moves the lift down, returns the build plan."""
+        self._start_plan()
+        self.rotate_grid(-self._rotated, rotate_pos=True)
         self._logger.info('Move lift down command queued')
-        self._uart_write.put(CommandBuilder.move_lift(MoveLift.MOVE_DOWN))
+        self._queue_command(CommandBuilder.move_lift(MoveLift.MOVE_DOWN))
+        self._send_plan()
+        return self._build_plan
 
     def place_not_placed(self) -> None:
         """Place all cubes that are not placed yet."""
+        lower = self._not_placed & LOWER
+        upper = self._not_placed >> 4 & ~lower & LOWER
+        place = lower | upper << 4
         config = [CubeColor.NONE, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE]
-        for i in range(4):
-            if self._cube_states[i] == CubeState.NOTPLACED:
-                config[i] = self._config[i]
-                self._cube_states[i] = CubeState.PLACED
-            elif i + 4 < 8 and self._cube_states[i + 4] == CubeState.NOTPLACED:
-                config[i] = self._config[i + 4]
-                self._cube_states[i + 4] = CubeState.PLACED
+        for code in CUBE_CODES:
+            positions = (self._config[code] & place) | (self._config[code] & place) >> 4
+            for i in range(4):
+                if positions >> i & 1:
+                    config[i] = COLORS[code]
+        self._set_placed(place)
         self.build_config(config)
 
     def update_cube_states(self) -> None:
         """Updates the cube states."""
-        for i in range(len(self._config)):
-            config = self._config[i]
-            if config == CubeColor.NONE:
-                self._cube_states[i] = CubeState.PLACED
-            elif (config in (CubeColor.RED, CubeColor.BLUE, CubeColor.YELLOW) and
-                  self._cube_states[i] == CubeState.UNKNOWN):
-                self._cube_states[i] = CubeState.NOTPLACED
+        self._set_placed(self._config[NONE])
+        cubes = self._config[RED] | self._config[YELLOW] | self._config[BLUE]
+        self._not_placed |= cubes & ~(self._placed | self._not_placed)
 
     def build_config(self, initial_config: list[CubeColor], two_cubes: bool = False) -> None:
         """Builds the configuration."""
-        config = initial_config.copy()
-        while not Builder.config_none(config):
-            c, config = self.match_with_config(config)
+        config = self._pack(initial_config)
+        while any(config[code] for code in CUBE_CODES):
+            matches = self._match(config)
             times = 0
-            while Builder.array_false(c):
+            while not matches:
                 times += 1
                 self.move_pos(1)
-                c, config = self.match_with_config(config)
+                matches = self._match(config)
             self.rotate_grid(times, rotate_pos=False)
-            self.place_cubes(c, two_cubes)
-
-    @staticmethod
-    def config_none(config: list[CubeColor]) -> bool:
-        """Returns true if the entire cube configuration is empty."""
-        return all(c == CubeColor.NONE for c in config)
+            self._place_matches(matches, two_cubes)
 
     def match_with_config(self, config) -> tuple[list[bool], list[CubeColor]]:
         """Returns a list of matches between the configuration and the current position."""
-        c = [False, False, False, False]
-        new_config = config.copy()
-        for i in range(len(c)):
-            value = config[i]
-            if self._pos[i] == value and not value == CubeColor.NONE:
-                c[i] = True
-                new_config[i] = CubeColor.NONE
-            else:
-                new_config[i] = value
-        return c, new_config
+        packed = self._pack(config)
+        matches = self._match(packed)
+        return [bool(matches >> i & 1) for i in range(4)], self._unpack(packed, 4)
 
     def place_cubes(self, conf: list[bool], two_cubes: bool = False) -> None:
         """Sends the command to place the cubes."""
-        c = conf
-        red = 0
-        yellow = 0
-        blue = 0
-        for i in range(len(c)):
-            if c[i]:
-                if self._pos[i] == CubeColor.RED:
-                    red = 1
-                elif self._pos[i] == CubeColor.YELLOW:
-                    yellow = 1
-                elif self._pos[i] == CubeColor.BLUE:
-                    blue = 1
-        if (red + yellow + blue) > 0:
-            if two_cubes:
-                red = red * 2
-                yellow = yellow * 2
-                blue = blue * 2
-            self._logger.info('Place cubes command queued - red: %s, yellow: %s, blue: %s', red, yellow, blue)
-            self._uart_write.put(CommandBuilder.place_cubes(red, yellow, blue))
+        self._place_matches(sum(1 << i for i, match in enumerate(conf) if match), two_cubes)
 
     def rotate_grid(self, times: int, rotate_pos: bool = True) -> None:
         """Rotates the grid the specified number of times."""
         if times % 4 != 0:
             angle = times * 90
             self._logger.info('Rotating grid command queued: %s°', angle)
-            self._uart_write.put(CommandBuilder.rotate_grid(angle))
+            self._queue_command(CommandBuilder.rotate_grid(angle))
             self._rotated = self._rotated + times % 4
             if rotate_pos:
                 self.move_pos(times)
 
     def move_pos(self, times: int) -> None:
         """Rotates the position by the specified number of times."""
-        times = times % len(self._pos)
+        times = times % 4
         if times != 0:
-            self._pos = self._pos[times:] + self._pos[:times]
+            self._pos = [(mask >> times | mask << (4 - times)) & LOWER for mask in self._pos]
+
+    def _match(self, config: list[int]) -> int:
+        """Returns the mask of the lower positions where the cubes match the magazines, removes them from the config."""
+        matches = 0
+        for code in CUBE_CODES:
+            match = self._pos[code] & config[code]
+            config[code] &= ~match
+            matches |= match
+        config[NONE] |= matches
+        return matches
+
+    def _place_matches(self, matches: int, two_cubes: bool = False) -> None:
+        """Sends the command to place the cubes from the magazines above the matched positions."""
+        count = 2 if two_cubes else 1
+        red, yellow, blue = (count if self._pos[code] & matches else 0 for code in CUBE_CODES)
+        if (red + yellow + blue) > 0:
+            self._logger.info('Place cubes command queued - red: %s, yellow: %s, blue: %s', red, yellow, blue)
+            self._queue_command(CommandBuilder.place_cubes(red, yellow, blue))
+
+    def _set_placed(self, positions: int) -> None:
+        """Marks the positions as placed."""
+        self._placed |= positions
+        self._not_placed &= ~positions & ALL
+
+    def _likely_rotation(self, priors: dict[CubeColor, float]) -> int:
+        """Returns the rotation with the most likely placements on the unknown lower positions."""
+        unknown = [i for i in range(4) if self._config[UNKNOWN] >> i & 1]
+        current = self._rotated % 4
+        best_rotation, best_score = current, 0.0
+        # Prefers the shorter rotation if the placements are equally likely
+        for quarters in sorted(range(4), key=self._planner.cost_model.rotation_cost):
+            rotation = (current + quarters) % 4
+            score = sum(priors.get(MAGAZINES[(i + rotation) % 4], 0.0) for i in unknown
+                        if MAGAZINES[(i + rotation) % 4] in CUBE_COLORS)
+            if score > best_score + 1e-9:
+                best_rotation, best_score = rotation, score
+        return best_rotation
+
+    def _ready_rotation(self, i: int) -> int:
+        """Returns the rotation of the grid that brings the magazine of the cube above its position."""
+        return (MAGAZINES.index(self._color(i)) - i % 4) % 4
+
+    def _place_ready(self) -> None:
+        """Rotates the grid to the rotation with the most cubes ready and places them."""
+        current = self._rotated % 4
+        rotation = max(range(4), key=lambda r: (len(self._ready[r]),
+                                                -self._planner.cost_model.rotation_cost(r - current)))
+        self.rotate_grid(rotation - current, rotate_pos=True)
+
+        cubes = [0, 0, 0]
+        for i in self._ready[rotation]:
+            code = COLOR_CODES[self._color(i)]
+            cubes[code - RED] += 1
+            self._set_placed(1 << i)
+            if i < 4 and self._not_placed >> (i + 4) & 1:
+                if self._config[code] >> (i + 4) & 1:
+                    cubes[code - RED] += 1
+                    self._set_placed(1 << (i + 4))
+                else:
+                    self._ready[self._ready_rotation(i + 4)].add(i + 4)
+        self._ready[rotation] = set()
+        self._logger.info('Place cubes command queued - red: %s, yellow: %s, blue: %s', *cubes)
+        self._queue_command(CommandBuilder.place_cubes(*cubes))
+
+    def _apply_steps(self, steps: list[PlanStep]) -> None:
+        """Queues the commands of the steps of a build plan."""
+        for step in steps:
+            self.rotate_grid(step.rotation, rotate_pos=True)
+            if any(step.cubes):
+                self._logger.info('Place cubes command queued - red: %s, yellow: %s, blue: %s', *step.cubes)
+                self._queue_command(CommandBuilder.place_cubes(*step.cubes))
+
+    def _color(self, i: int) -> CubeColor:
+        """Returns the color of the position in the configuration."""
+        return next((COLORS[code] for code, mask in enumerate(self._config) if mask >> i & 1), CubeColor.UNKNOWN)
+
+    @staticmethod
+    def _pack(config: list[CubeColor]) -> list[int]:
+        """Returns the mask of the positions for each color code."""
+        masks = [0] * len(COLORS)
+        for i, color in enumerate(config):
+            masks[COLOR_CODES.get(color, UNKNOWN)] |= 1 << i
+        return masks
 
     @staticmethod
-    def array_false(array: list[bool]) -> bool:
-        """Returns true if the entire array is false."""
-        return not any(array)
+    def _unpack(masks: list[int], size: int) -> list[CubeColor]:
+        """Returns the colors of the positions."""
+        config = [CubeColor.UNKNOWN] * size
+        for code, mask in enumerate(masks):
+            for i in range(size):
+                if mask >> i & 1:
+                    config[i] = COLORS[code]
+        return config
+
+    def _start_plan(self) -> None:
+        """Starts collecting the commands in a plan, if an optimizer is used."""
+        if self._optimizer is not None:
+            self._plan = []
+
+    def _send_plan(self) -> None:
+        """Sends the optimized commands of the collected plan."""
+        if self._optimizer is not None and self._plan is not None:
+            for message in self._optimizer.optimize(self._plan):
+                self._send(message)
+        self._plan = None
+
+    def _queue_command(self, message: Message) -> None:
+        """Adds the command to the collected plan or sends it directly."""
+        if self._plan is not None:
+            self._plan.append(message)
+        else:
+            self._send(message)
+
+    def _send(self, message: Message) -> None:
+        """Sends the command and tracks its execution in the build plan."""
+        self._build_plan.add(message)
+        self._uart_write.put(message)
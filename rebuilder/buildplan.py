@@ -0,0 +1,109 @@
+"""Implements the tracking of the build commands executed by the electronics controller."""
+import time
+from dataclasses import dataclass
+from threading import Condition
+
+from uart.command import Command, Message
+from .simulator import MachineTimings
+
+
+@dataclass
+class BuildStep:
+    """A command of the build plan and the times it was sent and finished at."""
+    message: Message
+    predicted: float
+    sent: float
+    started: float = 0.0
+    finished: float = 0.0
+    success: bool = True
+
+    @property
+    def command(self) -> Command:
+        """Returns the command of the step."""
+        return Command(self.message.cmd)
+
+    @property
+    def is_finished(self) -> bool:
+        """Returns true if the execution of the step has finished."""
+        return self.finished > 0.0
+
+    @property
+    def duration(self) -> float:
+        """Returns the measured execution time of the step."""
+        return self.finished - self.started if self.is_finished else 0.0
+
+
+class BuildPlan:
+    """Tracks the execution of the commands the builder sent to the electronics controller.
+
+    The controller executes the commands in order and reports each one with an execution finished
+    message that only contains the command type, so the steps are completed first in, first out
+    per command type. A step starts when it was sent or when the step before it finished.
+    """
+
+    def __init__(self, timings: MachineTimings | None = None) -> None:
+        self._timings = timings if timings is not None else MachineTimings()
+        self._condition = Condition()
+        self._steps: list[BuildStep] = []
+
+    @property
+    def steps(self) -> list[BuildStep]:
+        """Returns the steps of the plan."""
+        with self._condition:
+            return self._steps.copy()
+
+    @property
+    def steps_total(self) -> int:
+        """Returns the number of steps of the plan."""
+        with self._condition:
+            return len(self._steps)
+
+    @property
+    def steps_finished(self) -> int:
+        """Returns the number of finished steps."""
+        with self._condition:
+            return sum(1 for step in self._steps if step.is_finished)
+
+    @property
+    def progress(self) -> tuple[int, int]:
+        """Returns the number of finished steps and the number of steps of the plan."""
+        with self._condition:
+            return sum(1 for step in self._steps if step.is_finished), len(self._steps)
+
+    @property
+    def is_finished(self) -> bool:
+        """Returns true if all steps of the plan have finished."""
+        with self._condition:
+            return all(step.is_finished for step in self._steps)
+
+    def add(self, message: Message) -> BuildStep:
+        """Adds the sent command to the plan."""
+        step = BuildStep(message, self._timings.command_time(message), time.monotonic())
+        with self._condition:
+            self._steps.append(step)
+        return step
+
+    def complete(self, command: Command, success: bool = True) -> BuildStep | None:
+        """Completes the oldest unfinished step of the command, returns none if there is no such step."""
+        now = time.monotonic()
+        with self._condition:
+            previous = 0.0
+            for step in self._steps:
+                if not step.is_finished and step.command == command:
+                    step.started = max(step.sent, previous)
+                    step.finished = now
+                    step.success = success
+                    self._condition.notify_all()
+                    return step
+                previous = max(previous, step.finished)
+        return None
+
+    def pending(self) -> list[Message]:
+        """Returns the commands that have not finished yet, the application itself does not replan them."""
+        with self._condition:
+            return [step.message for step in self._steps if not step.is_finished]
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits until all steps have finished, returns false on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: all(step.is_finished for step in self._steps), timeout)
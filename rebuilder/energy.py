@@ -0,0 +1,149 @@
+"""Implements the energy model of the build commands measured on the machine.
+
+Print the energy report of the runs with: python3 -m rebuilder.energy
+"""
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+
+import shared.config as app_config
+from uart.command import Command, Message
+from .planner import CostModel
+
+MIN_ROTATION_SAMPLES = 5
+MIN_PLACEMENT_SAMPLES = 3
+
+
+@dataclass
+class LinearFit:
+    """The sums to fit the energy as a linear function of a variable with the least squares method."""
+    count: int = 0
+    sum_x: float = 0.0
+    sum_y: float = 0.0
+    sum_xx: float = 0.0
+    sum_xy: float = 0.0
+
+    def add(self, x: float, y: float) -> None:
+        """Adds the sample."""
+        self.count += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+
+    def fit(self) -> tuple[float, float] | None:
+        """Returns the intercept and slope, none if the samples do not determine them."""
+        denominator = self.count * self.sum_xx - self.sum_x * self.sum_x
+        if self.count == 0 or abs(denominator) < 1e-9:
+            return None
+        slope = (self.count * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        return (self.sum_y - slope * self.sum_x) / self.count, slope
+
+
+@dataclass
+class RunEnergy:
+    """The energy and duration of the runs of a mode."""
+    runs: int = 0
+    energy: float = 0.0
+    duration: float = 0.0
+
+    @property
+    def mean_energy(self) -> float:
+        """Returns the mean energy of a run in Wh."""
+        return self.energy / self.runs if self.runs > 0 else 0.0
+
+    @property
+    def mean_duration(self) -> float:
+        """Returns the mean duration of a run in seconds."""
+        return self.duration / self.runs if self.runs > 0 else 0.0
+
+
+@dataclass
+class EnergyData:
+    """The persistent data of the energy model."""
+    rotation: LinearFit = field(default_factory=LinearFit)
+    placement: LinearFit = field(default_factory=LinearFit)
+    modes: dict[str, RunEnergy] = field(default_factory=dict)
+
+
+class EnergyModel:
+    """Learns the energy of the build commands from the measured energy of the machine.
+
+    The energy of a rotation is fitted as a base energy plus the energy per degree, the energy of
+    a placement as a base energy plus the energy per double placed. The learned costs are used by
+    the build planner to find the plan with the lowest energy instead of the shortest duration.
+    """
+
+    def __init__(self, path: str = app_config.ENERGY_MODEL_FILE) -> None:
+        self._logger = logging.getLogger('rebuilder.energy')
+        self._path = path
+        self._data = EnergyData()
+
+    @property
+    def modes(self) -> dict[str, RunEnergy]:
+        """Returns the energy of the runs per mode."""
+        return self._data.modes.copy()
+
+    def load(self) -> None:
+        """Loads the energy model file."""
+        try:
+            with open(self._path, 'r', encoding='utf-8') as energy_file:
+                data = json.load(energy_file)
+            self._data = EnergyData(LinearFit(**data.get('rotation', {})), LinearFit(**data.get('placement', {})),
+                                    {mode: RunEnergy(**run) for mode, run in data.get('modes', {}).items()})
+            self._logger.info('Energy model loaded: %s', self._path)
+        except FileNotFoundError:
+            self._logger.info('Energy model %s not found, starting without measurements', self._path)
+        except (PermissionError, json.JSONDecodeError, AttributeError, TypeError) as error:
+            self._logger.error('Failed to read %s file: %s', self._path, error)
+
+    def save(self) -> None:
+        """Writes the energy model file."""
+        temp_path = f'{self._path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as energy_file:
+                json.dump(asdict(self._data), energy_file, indent=2)
+            os.replace(temp_path, self._path)
+        except (FileNotFoundError, PermissionError) as error:
+            self._logger.error('Failed to write %s file: %s', self._path, error)
+
+    def record(self, message: Message, energy: float) -> None:
+        """Records the energy measured for the execution of the command."""
+        command = Command(message.cmd)
+        if command == Command.ROTATE_GRID:
+            self._data.rotation.add(abs(message.data.rotate_grid.degrees), energy)
+        elif command == Command.PLACE_CUBES:
+            place = message.data.place_cubes
+            cubes = (place.cubes_red, place.cubes_yellow, place.cubes_blue)
+            self._data.placement.add(sum(1 for count in cubes if count > 1), energy)
+
+    def record_run(self, mode: str, energy: float, duration: float) -> None:
+        """Records the energy in Wh and the duration of a run in the mode."""
+        run = self._data.modes.setdefault(mode, RunEnergy())
+        run.runs += 1
+        run.energy += energy
+        run.duration += duration
+
+    def cost_model(self) -> CostModel | None:
+        """Returns the energy of the commands as cost model, none if not enough commands were measured."""
+        if self._data.rotation.count < MIN_ROTATION_SAMPLES or self._data.placement.count < MIN_PLACEMENT_SAMPLES:
+            return None
+        rotation = self._data.rotation.fit()
+        if rotation is None:
+            # All rotations were measured with the same degrees, e.g. only quarter turns
+            rotation = (self._data.rotation.sum_y / self._data.rotation.count, 0.0)
+        placement = self._data.placement.fit()
+        if placement is None:
+            placement = (self._data.placement.sum_y / self._data.placement.count, 0.0)
+        return CostModel(rotation=max(rotation[0], 0.0), rotation_per_degree=max(rotation[1], 0.0),
+                         placement=max(placement[0], 0.0), double_placement=max(placement[1], 0.0))
+
+
+if __name__ == '__main__':
+    energy_model = EnergyModel()
+    energy_model.load()
+    for name, run_energy in sorted(energy_model.modes.items()):
+        print(f'{name:<10} - runs: {run_energy.runs}, mean energy: {run_energy.mean_energy:.4f}Wh, '
+              f'mean duration: {run_energy.mean_duration:.3f}s')
+    print(f'Cost model: {energy_model.cost_model()}')
@@ -0,0 +1,235 @@
+"""Implements the history of the runs with the timing of their phases.
+
+Print the summary of the recorded runs with: python3 -m rebuilder.history [--limit 20]
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+import shared.config as app_config
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    mode TEXT NOT NULL,
+    config TEXT NOT NULL,
+    energy REAL NOT NULL,
+    api_start_latency REAL,
+    api_pending INTEGER NOT NULL,
+    duration_config REAL,
+    duration_build REAL,
+    duration_total REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    phase TEXT NOT NULL,
+    time REAL NOT NULL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_run_id ON events (run_id);
+'''
+METRICS = ('duration_config', 'duration_build', 'duration_total', 'energy')
+
+
+class RunPhase(StrEnum):
+    """The phases of a run recorded in the history."""
+    INIT = 'init'
+    START = 'start'
+    POSITION = 'position'
+    CONFIG = 'config'
+    COMMAND = 'command'
+    LIFT_DOWN = 'lift_down'
+
+
+@dataclass
+class RunEvent:
+    """An event of a run with its time in seconds since the epoch."""
+    phase: RunPhase
+    time: float
+    detail: str = ''
+
+
+@dataclass
+class RunRecord:
+    """The record of a run with the events of its phases and its results."""
+    mode: str = ''
+    config: dict[str, str] = field(default_factory=dict)
+    energy: float = 0.0
+    api_start_latency: float | None = None
+    api_pending: int = 0
+    events: list[RunEvent] = field(default_factory=list)
+
+    def time_of(self, phase: RunPhase) -> float | None:
+        """Returns the time of the first event of the phase, none if the run did not reach it."""
+        return next((event.time for event in self.events if event.phase == phase), None)
+
+    @property
+    def duration_config(self) -> float | None:
+        """Returns the seconds from the start until the configuration was complete."""
+        return self._duration(RunPhase.START, RunPhase.CONFIG)
+
+    @property
+    def duration_build(self) -> float | None:
+        """Returns the seconds from the complete configuration until the lift was down."""
+        return self._duration(RunPhase.CONFIG, RunPhase.LIFT_DOWN)
+
+    @property
+    def duration_total(self) -> float | None:
+        """Returns the seconds from the start until the lift was down."""
+        return self._duration(RunPhase.START, RunPhase.LIFT_DOWN)
+
+    def _duration(self, begin: RunPhase, end: RunPhase) -> float | None:
+        """Returns the seconds between the first events of the phases."""
+        begin_time, end_time = self.time_of(begin), self.time_of(end)
+        return end_time - begin_time if begin_time is not None and end_time is not None else None
+
+
+class RunHistory:
+    """Records the runs and their phases in an embedded SQLite database.
+
+    The events of the current run are collected in memory and the run is written in a single
+    transaction when it is saved, so recording an event never waits for the disk. The summary
+    aggregates the durations of the phases over the recorded runs.
+    """
+
+    def __init__(self, path: str = app_config.HISTORY_FILE) -> None:
+        self._logger = logging.getLogger('rebuilder.history')
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._run = RunRecord()
+
+    def open(self) -> bool:
+        """Opens the database and creates the tables, returns false if it can not be opened."""
+        with self._lock:
+            try:
+                self._connection = sqlite3.connect(self._path, check_same_thread=False)
+                self._connection.executescript(SCHEMA)
+            except sqlite3.Error as error:
+                self._logger.error('Failed to open run history %s: %s', self._path, error)
+                self._connection = None
+                return False
+        self._logger.info('Run history opened: %s', self._path)
+        return True
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def begin(self) -> None:
+        """Begins recording a new run with the init phase."""
+        with self._lock:
+            self._run = RunRecord(events=[RunEvent(RunPhase.INIT, time.time())])
+
+    def record(self, phase: RunPhase, detail: str = '') -> None:
+        """Records the event of the phase in the current run."""
+        with self._lock:
+            self._run.events.append(RunEvent(phase, time.time(), detail))
+
+    def finish(self, mode: str, config: dict[str, str], energy: float, api_start_latency: float | None,
+               api_pending: int) -> RunRecord:
+        """Finishes the current run with its results and returns the record to save."""
+        with self._lock:
+            run, self._run = self._run, RunRecord()
+        run.mode = mode
+        run.config = config
+        run.energy = energy
+        run.api_start_latency = api_start_latency
+        run.api_pending = api_pending
+        return run
+
+    def save(self, run: RunRecord) -> None:
+        """Writes the run with its events to the database."""
+        with self._lock:
+            if self._connection is None:
+                self._logger.warning('Run history not open, run not saved')
+                return
+            try:
+                with self._connection:
+                    cursor = self._connection.execute(
+                        'INSERT INTO runs (created, mode, config, energy, api_start_latency, api_pending, '
+                        'duration_config, duration_build, duration_total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (run.time_of(RunPhase.INIT) or time.time(), run.mode, json.dumps(run.config), run.energy,
+                         run.api_start_latency, run.api_pending, run.duration_config, run.duration_build,
+                         run.duration_total))
+                    self._connection.executemany(
+                        'INSERT INTO events (run_id, phase, time, detail) VALUES (?, ?, ?, ?)',
+                        [(cursor.lastrowid, str(event.phase), event.time, event.detail) for event in run.events])
+            except sqlite3.Error as error:
+                self._logger.error('Failed to save run: %s', error)
+                return
+        self._logger.info('Run saved with %s events', len(run.events))
+
+    def runs(self, limit: int | None = None, mode: str | None = None) -> list[dict[str, Any]]:
+        """Returns the latest runs, newest first, optionally only the runs of the mode."""
+        with self._lock:
+            if self._connection is None:
+                return []
+            cursor = self._connection.execute(
+                'SELECT id, created, mode, config, energy, api_start_latency, api_pending, duration_config, '
+                'duration_build, duration_total FROM runs WHERE ? IS NULL OR mode = ? ORDER BY id DESC LIMIT ?',
+                (mode, mode, limit if limit is not None else -1))
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for row in rows:
+            row['config'] = json.loads(row['config'])
+        return rows
+
+    def events(self, run_id: int) -> list[RunEvent]:
+        """Returns the events of the run in the order they were recorded."""
+        with self._lock:
+            if self._connection is None:
+                return []
+            cursor = self._connection.execute(
+                'SELECT phase, time, detail FROM events WHERE run_id = ? ORDER BY rowid', (run_id,))
+            return [RunEvent(RunPhase(phase), event_time, detail) for phase, event_time, detail in cursor.fetchall()]
+
+    def summary(self, limit: int | None = None, mode: str | None = None) -> dict[str, Any]:
+        """Returns the percentiles of the durations and the energy of the latest runs and the runs themselves."""
+        runs = self.runs(limit, mode)
+        summary: dict[str, Any] = {'count': len(runs)}
+        for metric in METRICS:
+            summary[metric] = self._aggregate([run[metric] for run in runs if run[metric] is not None])
+        summary['runs'] = runs
+        return summary
+
+    @staticmethod
+    def _aggregate(values: list[float]) -> dict[str, float] | None:
+        """Returns the median, the 95th percentile, the mean and the extremes of the values."""
+        if not values:
+            return None
+        if len(values) == 1:
+            p50 = p95 = values[0]
+        else:
+            quantiles = statistics.quantiles(values, n=100, method='inclusive')
+            p50, p95 = quantiles[49], quantiles[94]
+        return {'p50': p50, 'p95': p95, 'mean': statistics.mean(values), 'min': min(values), 'max': max(values)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run history summary')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--mode', default=None)
+    args = parser.parse_args()
+
+    run_history = RunHistory()
+    run_history.open()
+    run_summary = run_history.summary(args.limit, args.mode)
+    print(f'Runs: {run_summary["count"]}')
+    for name in METRICS:
+        aggregate = run_summary[name]
+        if aggregate is not None:
+            print(f'{name:<16} - p50: {aggregate["p50"]:.3f}, p95: {aggregate["p95"]:.3f}, '
+                  f'mean: {aggregate["mean"]:.3f}, min: {aggregate["min"]:.3f}, max: {aggregate["max"]:.3f}')
+    run_history.close()
@@ -0,0 +1,75 @@
+"""Implements the optimization of the build plan before it is sent to the electronics controller."""
+import logging
+
+from uart.command import Command, Message
+from uart.commandbuilder import CommandBuilder
+
+MAX_CUBES_PER_COLOR = 2
+
+
+class PlanOptimizer:
+    """Compacts the commands of a build plan to save round trips and physical motion.
+
+    Adjacent rotations are merged into a single rotation and rotations by a multiple of 360°
+    are dropped. Adjacent place cubes commands without a rotation in between are merged,
+    because the magazines drop onto the same positions. The firmware supports placing at most
+    two cubes per color with a single command (one per level).
+    """
+
+    def __init__(self) -> None:
+        self._logger = logging.getLogger('rebuilder.optimizer')
+        self.commands_saved = 0
+        self.degrees_saved = 0
+
+    def reset(self) -> None:
+        """Resets the statistics of the optimizer."""
+        self.commands_saved = 0
+        self.degrees_saved = 0
+
+    def optimize(self, plan: list[Message]) -> list[Message]:
+        """Returns the optimized build plan."""
+        optimized: list[Message] = []
+        for message in plan:
+            previous = optimized[-1] if optimized else None
+            if Command(message.cmd) == Command.ROTATE_GRID:
+                if previous is not None and Command(previous.cmd) == Command.ROTATE_GRID:
+                    optimized.pop()
+                    message = CommandBuilder.rotate_grid(previous.data.rotate_grid.degrees +
+                                                         message.data.rotate_grid.degrees)
+                if message.data.rotate_grid.degrees % 360 != 0:
+                    optimized.append(message)
+            elif Command(message.cmd) == Command.PLACE_CUBES:
+                if previous is not None and self._can_merge_place_cubes(previous, message):
+                    optimized.pop()
+                    message = CommandBuilder.place_cubes(
+                        previous.data.place_cubes.cubes_red + message.data.place_cubes.cubes_red,
+                        previous.data.place_cubes.cubes_yellow + message.data.place_cubes.cubes_yellow,
+                        previous.data.place_cubes.cubes_blue + message.data.place_cubes.cubes_blue)
+                optimized.append(message)
+            else:
+                optimized.append(message)
+
+        commands_saved = len(plan) - len(optimized)
+        degrees_saved = self.rotation_degrees(plan) - self.rotation_degrees(optimized)
+        if commands_saved > 0 or degrees_saved > 0:
+            self._logger.info('Optimized build plan - commands saved: %s, degrees saved: %s°',
+                              commands_saved, degrees_saved)
+        self.commands_saved += commands_saved
+        self.degrees_saved += degrees_saved
+        return optimized
+
+    @staticmethod
+    def rotation_degrees(plan: list[Message]) -> int:
+        """Returns the total degrees the grid is rotated by the build plan."""
+        return sum(abs(msg.data.rotate_grid.degrees) for msg in plan if Command(msg.cmd) == Command.ROTATE_GRID)
+
+    @staticmethod
+    def _can_merge_place_cubes(first: Message, second: Message) -> bool:
+        """Returns true if the two place cubes commands can be merged into one command."""
+        if Command(first.cmd) != Command.PLACE_CUBES:
+            return False
+        first_data = first.data.place_cubes
+        second_data = second.data.place_cubes
+        return (first_data.cubes_red + second_data.cubes_red <= MAX_CUBES_PER_COLOR and
+                first_data.cubes_yellow + second_data.cubes_yellow <= MAX_CUBES_PER_COLOR and
+                first_data.cubes_blue + second_data.cubes_blue <= MAX_CUBES_PER_COLOR)
@@ -0,0 +1,153 @@
+"""Implements the search for the optimal build plan."""
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Iterator
+
+from shared.enumerations import CubeColor
+from uart.command import Command, Message
+from uart.commandbuilder import CommandBuilder
+
+# The colors of the magazines above the positions 1-4 when the grid is not rotated
+MAGAZINES = [CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE]
+CUBE_COLORS = [CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE]
+
+
+@dataclass
+class CostModel:
+    """The time in seconds the commands of a build plan take to execute."""
+    rotation: float = 0.2
+    rotation_per_degree: float = 0.005
+    placement: float = 0.5
+    double_placement: float = 0.1
+
+    @staticmethod
+    def rotation_degrees(quarters: int) -> int:
+        """Returns the degrees the grid travels to rotate by the quarter turns in the shorter direction."""
+        return min(quarters % 4, -quarters % 4) * 90
+
+    def rotation_cost(self, quarters: int) -> float:
+        """Returns the cost of rotating the grid by the quarter turns."""
+        degrees = self.rotation_degrees(quarters)
+        return self.rotation + degrees * self.rotation_per_degree if degrees > 0 else 0.0
+
+    def placement_cost(self, cubes: tuple[int, int, int]) -> float:
+        """Returns the cost of placing the red, yellow and blue cubes with a single command."""
+        return self.placement + sum(self.double_placement for count in cubes if count > 1) if any(cubes) else 0.0
+
+    def plan_cost(self, plan: list[Message]) -> float:
+        """Returns the cost of the commands of a build plan."""
+        cost = 0.0
+        for message in plan:
+            if Command(message.cmd) == Command.ROTATE_GRID:
+                cost += self.rotation_cost(message.data.rotate_grid.degrees // 90)
+            elif Command(message.cmd) == Command.PLACE_CUBES:
+                place = message.data.place_cubes
+                cost += self.placement_cost((place.cubes_red, place.cubes_yellow, place.cubes_blue))
+        return cost
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """A step of the build plan, either a rotation by quarter turns or a placement of red, yellow and blue cubes."""
+    rotation: int = 0
+    cubes: tuple[int, int, int] = (0, 0, 0)
+
+
+class BuildPlanner:
+    """Searches the build plan with the lowest cost for a cube configuration.
+
+    The state space consists of the rotation of the grid (4 values) and the placed positions
+    (8 bits). The plan includes the cost to return the grid to its start position at the end.
+    """
+
+    def __init__(self, cost_model: CostModel | None = None) -> None:
+        self.cost_model = cost_model if cost_model is not None else CostModel()
+
+    def plan(self, config: list[CubeColor], rotation: int = 0, placed: int = 0) -> list[PlanStep]:
+        """Returns the build plan for the configuration, starting at the rotation with the placed positions."""
+        target = sum(1 << i for i, color in enumerate(config) if color in CUBE_COLORS) | placed
+        start = (rotation % 4, placed)
+        costs = {start: 0.0}
+        previous: dict[tuple[int, int], tuple[tuple[int, int], PlanStep]] = {}
+        counter = itertools.count()
+        heap = [(0.0, next(counter), start)]
+        best_cost = float('inf')
+        best_state = start
+
+        while heap:
+            cost, _, state = heapq.heappop(heap)
+            if cost > costs.get(state, float('inf')):
+                continue
+            if cost >= best_cost:
+                break
+
+            rot, mask = state
+            if mask == target:
+                total = cost + self.cost_model.rotation_cost(-rot)
+                if total < best_cost:
+                    best_cost, best_state = total, state
+                continue
+
+            for step, next_state in self._transitions(config, rot, mask):
+                step_cost = self.cost_model.rotation_cost(step.rotation) + self.cost_model.placement_cost(step.cubes)
+                if cost + step_cost < costs.get(next_state, float('inf')):
+                    costs[next_state] = cost + step_cost
+                    previous[next_state] = (state, step)
+                    heapq.heappush(heap, (cost + step_cost, next(counter), next_state))
+
+        steps: list[PlanStep] = []
+        state = best_state
+        while state != start:
+            state, step = previous[state]
+            steps.append(step)
+        return steps[::-1]
+
+    def plan_cost(self, steps: list[PlanStep], rotation: int = 0) -> float:
+        """Returns the cost of the plan, including the return of the grid to its start position."""
+        for step in steps:
+            rotation += step.rotation
+        return (sum(self.cost_model.rotation_cost(step.rotation) + self.cost_model.placement_cost(step.cubes)
+                    for step in steps) + self.cost_model.rotation_cost(-rotation))
+
+    @staticmethod
+    def to_messages(steps: list[PlanStep]) -> list[Message]:
+        """Returns the commands of the build plan."""
+        messages = []
+        for step in steps:
+            if step.rotation % 4 != 0:
+                messages.append(CommandBuilder.rotate_grid(step.rotation * 90))
+            if any(step.cubes):
+                messages.append(CommandBuilder.place_cubes(*step.cubes))
+        return messages
+
+    @staticmethod
+    def _transitions(config: list[CubeColor], rotation: int, mask: int) -> Iterator[tuple[PlanStep, tuple[int, int]]]:
+        """Yields the possible steps and the resulting states."""
+        for quarters in range(1, 4):
+            yield PlanStep(rotation=quarters), ((rotation + quarters) % 4, mask)
+
+        options = []
+        for color in CUBE_COLORS:
+            pos = (MAGAZINES.index(color) - rotation) % 4
+            color_options = [(0, 0)]
+            if not mask & (1 << pos):
+                if config[pos] == color:
+                    color_options.append((1, 1 << pos))
+                    if config[pos + 4] == color:
+                        color_options.append((2, (1 << pos) | (1 << (pos + 4))))
+            elif not mask & (1 << (pos + 4)) and config[pos + 4] == color:
+                color_options.append((1, 1 << (pos + 4)))
+            options.append(color_options)
+
+        for (red, red_mask), (yellow, yellow_mask), (blue, blue_mask) in itertools.product(*options):
+            if red or yellow or blue:
+                yield PlanStep(cubes=(red, yellow, blue)), (rotation, mask | red_mask | yellow_mask | blue_mask)
+
+
+def all_configurations() -> Iterator[list[CubeColor]]:
+    """Yields all valid cube configurations, a cube on the upper level always needs a cube below it."""
+    colors = [CubeColor.NONE] + CUBE_COLORS
+    stacks = [(lower, upper) for lower in colors for upper in colors if lower != CubeColor.NONE or upper == lower]
+    for combination in itertools.product(stacks, repeat=4):
+        yield [stack[0] for stack in combination] + [stack[1] for stack in combination]
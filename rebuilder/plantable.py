@@ -0,0 +1,155 @@
+"""Implements the precomputed table with the build plans of all cube configurations.
+
+Generate the table with: python3 -m rebuilder.plantable
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from dataclasses import astuple
+from typing import BinaryIO, Iterable
+
+import shared.config as app_config
+from shared.enumerations import CubeColor
+from .planner import BuildPlanner, CostModel, PlanStep, all_configurations
+
+MAGIC = b'PLAN'
+VERSION = 2
+HEADER = struct.Struct('<4sB3x8s')
+RECORD_SIZE = 16
+MAX_STEPS = RECORD_SIZE - 1
+NO_PLAN = 0xFF
+COLOR_CODES = {CubeColor.NONE: 0, CubeColor.RED: 1, CubeColor.YELLOW: 2, CubeColor.BLUE: 3}
+CONFIGURATIONS = len(COLOR_CODES) ** 8
+
+
+class PlanTable:
+    """Provides the precomputed build plans of all cube configurations with a lookup in constant time.
+
+    The file starts with a header followed by a record of 16 bytes for each of the 4^8 configurations.
+    The first byte of a record contains the number of steps, each following byte encodes a step:
+    a rotation by quarter turns in the lower two bits or, if the highest bit is set, a placement
+    with two bits for each of the red, yellow and blue cubes.
+    """
+
+    def __init__(self, cost_model: CostModel) -> None:
+        self._logger = logging.getLogger('rebuilder.plan_table')
+        self._fingerprint = self.fingerprint(cost_model)
+        self._file: BinaryIO | None = None
+        self._mmap: mmap.mmap | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Returns true if the plan table is loaded."""
+        return self._mmap is not None
+
+    def load(self, path: str = app_config.PLAN_TABLE_FILE) -> bool:
+        """Maps the plan table file into memory, returns false if it is missing or does not match the cost model."""
+        self.close()
+        try:
+            self._file = open(path, 'rb')  # pylint: disable=consider-using-with
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, PermissionError, ValueError, OSError) as error:
+            self._logger.warning('Failed to load plan table %s: %s', path, error)
+            self.close()
+            return False
+
+        if len(self._mmap) != HEADER.size + CONFIGURATIONS * RECORD_SIZE:
+            self._logger.warning('Invalid plan table size: %s', path)
+            self.close()
+            return False
+
+        magic, version, fingerprint = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or fingerprint != self._fingerprint:
+            self._logger.warning('Plan table %s does not match the current cost model', path)
+            self.close()
+            return False
+
+        self._logger.info('Plan table loaded: %s', path)
+        return True
+
+    def close(self) -> None:
+        """Unmaps the plan table file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def matches(self, cost_model: CostModel) -> bool:
+        """Returns true if the plans of the table are optimized for the cost model."""
+        return self._fingerprint == self.fingerprint(cost_model)
+
+    def lookup(self, config: list[CubeColor]) -> list[PlanStep] | None:
+        """Returns the build plan of the configuration, none if the table has no plan for it."""
+        index = self.index(config)
+        if self._mmap is None or index is None:
+            return None
+
+        offset = HEADER.size + index * RECORD_SIZE
+        length = self._mmap[offset]
+        if length == NO_PLAN:
+            return None
+        return [self._decode_step(step) for step in self._mmap[offset + 1:offset + 1 + length]]
+
+    @staticmethod
+    def index(config: list[CubeColor]) -> int | None:
+        """Returns the index of the configuration in the table, none if a position is unknown."""
+        index = 0
+        for color in reversed(config):
+            if color not in COLOR_CODES:
+                return None
+            index = index * len(COLOR_CODES) + COLOR_CODES[color]
+        return index
+
+    @staticmethod
+    def fingerprint(cost_model: CostModel) -> bytes:
+        """Returns the fingerprint of the cost model the plans are optimized for."""
+        return hashlib.blake2b(repr(astuple(cost_model)).encode(), digest_size=8).digest()
+
+    @staticmethod
+    def generate(planner: BuildPlanner, path: str = app_config.PLAN_TABLE_FILE,
+                 configs: Iterable[list[CubeColor]] | None = None) -> int:
+        """Generates the plan table file with the plans of the configurations, returns the number of plans."""
+        records = bytearray([NO_PLAN] + [0] * (RECORD_SIZE - 1)) * CONFIGURATIONS
+        count = 0
+        for config in configs if configs is not None else all_configurations():
+            index = PlanTable.index(config)
+            steps = planner.plan(config)
+            if index is None or len(steps) > MAX_STEPS:
+                continue
+            offset = index * RECORD_SIZE
+            records[offset:offset + RECORD_SIZE] = bytes([len(steps)] + [PlanTable._encode_step(step) for step in steps]
+                                                         + [0] * (MAX_STEPS - len(steps)))
+            count += 1
+
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as table_file:
+            table_file.write(HEADER.pack(MAGIC, VERSION, PlanTable.fingerprint(planner.cost_model)))
+            table_file.write(records)
+        os.replace(temp_path, path)
+        return count
+
+    @staticmethod
+    def _encode_step(step: PlanStep) -> int:
+        """Encodes the step into a single byte."""
+        if any(step.cubes):
+            red, yellow, blue = step.cubes
+            return 0x80 | red | (yellow << 2) | (blue << 4)
+        return step.rotation % 4
+
+    @staticmethod
+    def _decode_step(value: int) -> PlanStep:
+        """Decodes the step from a single byte."""
+        if value & 0x80:
+            return PlanStep(cubes=(value & 0x03, (value >> 2) & 0x03, (value >> 4) & 0x03))
+        return PlanStep(rotation=value & 0x03)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(f'Generating plan table: {app_config.PLAN_TABLE_FILE}')
+    plans = PlanTable.generate(BuildPlanner())
+    print(f'Plans generated for {plans} of {len(list(all_configurations()))} configurations')
@@ -0,0 +1,170 @@
+"""Implements the discrete-event simulation of the machine executing the build commands."""
+import heapq
+import itertools
+import queue
+from dataclasses import dataclass, field
+
+from shared.enumerations import CubeColor
+from uart.command import Command, Message
+from .planner import CUBE_COLORS, MAGAZINES
+
+
+@dataclass
+class MachineTimings:
+    """The timings in seconds and the power draw in watts of the machine."""
+    rotation: float = 0.2
+    rotation_speed: float = 200.0
+    placement: float = 0.5
+    double_placement: float = 0.1
+    lift: float = 2.0
+    prime_magazine: float = 0.25
+    command_overhead: float = 0.0
+
+    idle_power: float = 2.0
+    rotation_power: float = 6.0
+    placement_power: float = 4.0
+    lift_power: float = 8.0
+
+    def rotation_time(self, degrees: int) -> float:
+        """Returns the time the grid takes to rotate by the degrees."""
+        return self.rotation + abs(degrees) / self.rotation_speed if degrees % 360 != 0 else 0.0
+
+    def placement_time(self, cubes: tuple[int, int, int]) -> float:
+        """Returns the time to place the red, yellow and blue cubes with a single command."""
+        return self.placement + sum(self.double_placement for count in cubes if count > 1) if any(cubes) else 0.0
+
+    def command_time(self, message: Message) -> float:
+        """Returns the time the machine takes to execute the command."""
+        command = Command(message.cmd)
+        if command == Command.ROTATE_GRID:
+            return self.rotation_time(message.data.rotate_grid.degrees)
+        if command == Command.PLACE_CUBES:
+            place = message.data.place_cubes
+            return self.placement_time((place.cubes_red, place.cubes_yellow, place.cubes_blue))
+        if command == Command.MOVE_LIFT:
+            return self.lift
+        if command == Command.PRIME_MAGAZINE:
+            return self.prime_magazine
+        return 0.0
+
+
+@dataclass
+class SimulationResult:
+    """The predicted outcome of executing the build commands."""
+    duration: float = 0.0
+    energy: float = 0.0
+    busy: dict[Command, float] = field(default_factory=dict)
+    commands: int = 0
+    rotation: int = 0
+    degrees: int = 0
+    stacks: list[list[CubeColor]] = field(default_factory=lambda: [[], [], [], []])
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def config(self) -> list[CubeColor]:
+        """Returns the built cube configuration."""
+        stacks = [stack + [CubeColor.NONE] * (2 - len(stack)) for stack in self.stacks]
+        return [stack[0] for stack in stacks] + [stack[1] for stack in stacks]
+
+
+class BuildSimulator:
+    """Predicts the duration and energy of a build by simulating the command execution of the machine.
+
+    The commands arrive at the given times and are executed one after another in their order,
+    like on the electronics controller. A pause overtakes the waiting commands and stops the
+    execution after the running command until the build is resumed.
+    The energy includes the idle power for the whole duration and the power of the active drives.
+    """
+
+    def __init__(self, timings: MachineTimings | None = None) -> None:
+        self.timings = timings if timings is not None else MachineTimings()
+        self._events: list[tuple[float, int, Message]] = []
+        self._counter = itertools.count()
+
+    def submit(self, message: Message, at: float = 0.0) -> None:
+        """Submits the command that arrives at the time in seconds."""
+        heapq.heappush(self._events, (at, next(self._counter), message))
+
+    def submit_all(self, messages: list[Message], at: float = 0.0) -> None:
+        """Submits the commands that arrive together at the time in seconds."""
+        for message in messages:
+            self.submit(message, at)
+
+    def submit_queue(self, uart_write: queue.Queue, at: float = 0.0) -> None:
+        """Submits the commands waiting in the queue, as put there by the builder, at the time in seconds."""
+        while True:
+            try:
+                self.submit(uart_write.get_nowait(), at)
+            except queue.Empty:
+                break
+
+    def run(self) -> SimulationResult:
+        """Executes the submitted commands and returns the predicted result."""
+        result = SimulationResult()
+        time = 0.0
+        active_energy = 0.0
+        paused = False
+        while self._events:
+            event = self._next_event(time, paused)
+            if event is None:
+                result.errors.append('Build paused but never resumed')
+                break
+            self._events.remove(event)
+            heapq.heapify(self._events)
+
+            at, _, message = event
+            command = Command(message.cmd)
+            time = max(time, at)
+            power = self._execute(command, message, result)
+            duration = self.timings.command_time(message) + self.timings.command_overhead
+            time += duration
+            active_energy += duration * power
+            result.busy[command] = result.busy.get(command, 0.0) + duration
+            result.commands += 1
+            if command in (Command.PAUSE_BUILD, Command.RESUME_BUILD):
+                paused = command == Command.PAUSE_BUILD
+
+        self._events = []
+        result.duration = time
+        result.energy = (time * self.timings.idle_power + active_energy) / 3600
+        return result
+
+    def _next_event(self, time: float, paused: bool) -> tuple[float, int, Message] | None:
+        """Returns the next command to execute, pause and resume overtake the commands waiting for execution."""
+        if paused:
+            return min((event for event in self._events if Command(event[2].cmd) == Command.RESUME_BUILD),
+                       default=None)
+        start = max(time, self._events[0][0])
+        return min((event for event in self._events
+                    if Command(event[2].cmd) in (Command.PAUSE_BUILD, Command.RESUME_BUILD) and event[0] <= start),
+                   default=self._events[0])
+
+    def _execute(self, command: Command, message: Message, result: SimulationResult) -> float:
+        """Applies the command to the simulated machine, returns its power draw."""
+        if command == Command.ROTATE_GRID:
+            degrees = message.data.rotate_grid.degrees
+            result.rotation = (result.rotation + degrees) % 360
+            result.degrees += abs(degrees)
+            return self.timings.rotation_power
+
+        if command == Command.PLACE_CUBES:
+            place = message.data.place_cubes
+            cubes = (place.cubes_red, place.cubes_yellow, place.cubes_blue)
+            for color, count in zip(CUBE_COLORS, cubes):
+                if count == 0:
+                    continue
+                pos = (MAGAZINES.index(color) - result.rotation // 90) % 4
+                if result.rotation % 90 != 0:
+                    result.errors.append(f'{color} cubes placed with the grid at {result.rotation}°')
+                elif len(result.stacks[pos]) + count > 2:
+                    result.errors.append(f'{color} cubes placed on the full position {pos + 1}')
+                else:
+                    result.stacks[pos].extend([color] * count)
+            return self.timings.placement_power
+
+        if command == Command.MOVE_LIFT:
+            return self.timings.lift_power
+
+        if command == Command.PRIME_MAGAZINE:
+            return self.timings.placement_power
+        return 0.0
@@ -0,0 +1,119 @@
+"""Implements the queue of the actions requested from the website."""
+import itertools
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any
+
+from shared.data import ActionRequest, SharedStatus, StatusData
+from shared.enumerations import Action, ActionState
+
+ACTION_HISTORY = 10
+
+
+@dataclass
+class ActionMetrics:
+    """The latency metrics of an action in seconds, from the request until the action was handled."""
+    count: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    last_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Returns the mean latency."""
+        return self.total_latency / self.count if self.count > 0 else 0.0
+
+    def record(self, latency: float) -> None:
+        """Records the latency of an action."""
+        self.count += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.last_latency = latency
+
+
+class ActionQueue:
+    """Queues the actions requested from the website and tracks their state in the shared status.
+
+    Every action gets an id and is published with its state in the status, so the website can
+    await the result of its request on the status events. The consumer blocks until an action
+    arrives and is woken up with none when the queue is closed.
+    """
+
+    def __init__(self, status_data: SharedStatus, history: int = ACTION_HISTORY) -> None:
+        self._logger = logging.getLogger('shared.action_queue')
+        self._status_data = status_data
+        self._history = history
+        self._queue: queue.Queue[ActionRequest | None] = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._metrics: dict[Action, ActionMetrics] = {}
+
+    def submit(self, action: Action) -> ActionRequest:
+        """Publishes the action as pending and queues it."""
+        with self._lock:
+            request = ActionRequest(next(self._ids), action, time_created=time.time_ns())
+        self._status_data.modify(lambda status: replace(status, actions=(*status.actions, request)[-self._history:]))
+        self._queue.put(request)
+        return request
+
+    def get(self, timeout: float | None = None) -> ActionRequest | None:
+        """Waits for the next action, returns none if the queue was closed."""
+        return self._queue.get(timeout=timeout)
+
+    def close(self) -> None:
+        """Wakes up the consumer waiting for the next action."""
+        self._queue.put(None)
+
+    def accept(self, request: ActionRequest, message: str = '') -> ActionRequest:
+        """Marks the action as accepted, its effect is still in progress."""
+        return self._handle(request, ActionState.ACCEPTED, message)
+
+    def reject(self, request: ActionRequest, message: str) -> ActionRequest:
+        """Marks the action as rejected."""
+        return self._handle(request, ActionState.REJECTED, message, finished=True)
+
+    def finish(self, request: ActionRequest, success: bool = True, message: str = '') -> ActionRequest:
+        """Marks the action as finished or failed after its effect completed."""
+        state = ActionState.FINISHED if success else ActionState.FAILED
+        changes: dict[str, Any] = {'state': state, 'time_finished': time.time_ns()}
+        if message:
+            changes['message'] = message
+        request = self._update(request, **changes)
+        self._logger.info('Action %s %s after %.3fms', request.action, state, request.latency_finished * 1000)
+        return request
+
+    def find(self, request_id: int) -> ActionRequest | None:
+        """Returns the latest state of the action, none if it is not in the history anymore."""
+        return next((request for request in self._status_data.snapshot.actions if request.id == request_id), None)
+
+    def metrics(self) -> dict[Action, ActionMetrics]:
+        """Returns a copy of the latency metrics of each action."""
+        with self._lock:
+            return {action: replace(metrics) for action, metrics in self._metrics.items()}
+
+    def _handle(self, request: ActionRequest, state: ActionState, message: str,
+                finished: bool = False) -> ActionRequest:
+        """Marks the action as handled and records the latency until it was handled."""
+        now = time.time_ns()
+        request = self._update(request, state=state, message=message, time_handled=now,
+                               time_finished=now if finished else 0)
+        with self._lock:
+            self._metrics.setdefault(request.action, ActionMetrics()).record(request.latency_handled)
+        self._logger.info('Action %s %s after %.3fms', request.action, state, request.latency_handled * 1000)
+        return request
+
+    def _update(self, request: ActionRequest, **changes: Any) -> ActionRequest:
+        """Publishes the changes of the latest state of the action and returns the changed action."""
+        updated = [request]
+
+        def _change(status: StatusData) -> StatusData:
+            latest = next((action for action in status.actions if action.id == request.id), request)
+            updated[0] = replace(latest, **changes)
+            return replace(status, actions=tuple(
+                updated[0] if action.id == request.id else action for action in status.actions))
+
+        self._status_data.modify(_change)
+        return updated[0]
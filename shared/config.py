@@ -1,10 +1,15 @@
 """The shared logging configuration that should be used in all parts of the application."""
 import json
 import logging
+import os
 import sys
 from typing import Any
 
 CONFIG_FILE = 'config.json'
+PLAN_TABLE_FILE = 'plans.bin'
+ENERGY_MODEL_FILE = 'energy.json'
+OUTBOX_FILE = 'outbox.json'
+HISTORY_FILE = 'history.db'
 
 LOGGING_CONFIG = {
     'version': 1,
@@ -40,28 +45,30 @@ LOGGING_CONFIG = {
 }
 
 
-def read_config_file() -> dict[str, Any]:
+def read_config_file(path: str = CONFIG_FILE) -> dict[str, Any]:
     """Parses the configuration file."""
     logger = logging.getLogger('config')
     try:
-        logger.info('Parsing configuration file: %s', CONFIG_FILE)
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as config_file:
+        logger.info('Parsing configuration file: %s', path)
+        with open(path, 'r', encoding='utf-8') as config_file:
             return json.load(config_file)
     except (FileNotFoundError, PermissionError) as error:
-        logger.error('Failed to read %s file: %s', CONFIG_FILE, error)
+        logger.error('Failed to read %s file: %s', path, error)
     except json.JSONDecodeError as error:
-        logger.error('Failed to parse %s file: %s', CONFIG_FILE, error)
+        logger.error('Failed to parse %s file: %s', path, error)
     return {}
 
 
-def write_config_file(config: dict[str, Any]) -> None:
-    """Writes the configuration file."""
+def write_config_file(config: dict[str, Any], path: str = CONFIG_FILE) -> None:
+    """Writes the configuration file, replacing it atomically."""
     logger = logging.getLogger('config')
+    temp_path = f'{path}.tmp'
     try:
-        logger.info('Writing configuration file: %s', CONFIG_FILE)
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as config_file:
+        logger.info('Writing configuration file: %s', path)
+        with open(temp_path, 'w', encoding='utf-8') as config_file:
             json.dump(config, config_file, indent=2)
+        os.replace(temp_path, path)
     except (FileNotFoundError, PermissionError) as error:
-        logger.error('Failed to write %s file: %s', CONFIG_FILE, error)
-    except json.JSONDecodeError as error:
-        logger.error('Failed to parse data: %s', error)
+        logger.error('Failed to write %s file: %s', path, error)
+    except (TypeError, ValueError) as error:
+        logger.error('Failed to serialize data: %s', error)
@@ -0,0 +1,110 @@
+"""Implements the in-memory store of the configuration file."""
+import copy
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable
+
+from shared.config import CONFIG_FILE, read_config_file, write_config_file
+
+WRITE_DELAY = 0.5
+
+ConfigListener = Callable[[str, dict[str, Any]], None]
+
+
+class ConfigStore:
+    """Holds the configuration file in memory and writes the changes back in the background.
+
+    Every change increments the version and the entity tag of the configuration, which is used
+    to reject updates based on an outdated configuration. The changes are written to the file
+    after a short delay, so that consecutive changes are written only once, and the listeners
+    are notified with the changed section.
+    """
+
+    def __init__(self, path: str = CONFIG_FILE, write_delay: float = WRITE_DELAY) -> None:
+        self._logger = logging.getLogger('shared.config_store')
+        self._path = path
+        self._write_delay = write_delay
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._config: dict[str, Any] = {}
+        self._etag = self._hash(self._config)
+        self._version = 0
+        self._dirty = False
+        self._timer: threading.Timer | None = None
+        self._listeners: list[ConfigListener] = []
+
+    @property
+    def version(self) -> int:
+        """Returns the version of the configuration, incremented on every change."""
+        return self._version
+
+    @property
+    def etag(self) -> str:
+        """Returns the entity tag of the configuration."""
+        return self._etag
+
+    def load(self) -> dict[str, Any]:
+        """Reads the configuration file into the store and returns it."""
+        config = read_config_file(self._path)
+        with self._lock:
+            self._config = config
+            self._etag = self._hash(config)
+            self._version += 1
+            return copy.deepcopy(config)
+
+    def get(self, section: str) -> tuple[dict[str, Any], str]:
+        """Returns a copy of the section and the entity tag of the configuration."""
+        with self._lock:
+            return copy.deepcopy(self._config.get(section, {})), self._etag
+
+    def update(self, section: str, data: dict[str, Any], etag: str | None = None) -> str | None:
+        """Replaces the section and returns the new entity tag, none if the entity tag does not match."""
+        with self._lock:
+            if etag is not None and etag != self._etag:
+                self._logger.warning('Configuration changed since entity tag %s', etag)
+                return None
+            self._config[section] = copy.deepcopy(data)
+            self._etag = self._hash(self._config)
+            self._version += 1
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self._write_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            new_etag = self._etag
+            listeners = self._listeners.copy()
+
+        for listener in listeners:
+            listener(section, copy.deepcopy(data))
+        return new_etag
+
+    def add_listener(self, listener: ConfigListener) -> None:
+        """Adds the listener that is called with the section and its data after every change."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def flush(self) -> None:
+        """Writes the pending changes to the configuration file."""
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                config = copy.deepcopy(self._config)
+                self._dirty = False
+            write_config_file(config, self._path)
+
+    def close(self) -> None:
+        """Cancels the delayed write and writes the pending changes."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    @staticmethod
+    def _hash(config: dict[str, Any]) -> str:
+        """Returns the hash of the configuration."""
+        return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=8).hexdigest()
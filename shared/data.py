@@ -1,8 +1,10 @@
 """Shared data classes that are used in different parts of the application."""
-from dataclasses import dataclass, field
-from typing import Any
+import json
+from dataclasses import asdict, dataclass, field, replace
+from threading import Condition
+from typing import Any, Callable
 
-from shared.enumerations import CubeColor, Status
+from shared.enumerations import Action, ActionState, CubeColor, Status
 
 
 @dataclass
@@ -21,9 +23,13 @@ class AppConfiguration:
     serial_read: str = '/dev/ttyAMA0'
     serial_write: str = '/dev/ttyAMA0'
 
+    web_server: str = 'waitress'
+    web_threads: int = 8
+
     app_efficiency_mode: bool = False
     app_fast_mode: bool = False
     app_incremental_build: bool = False
+    app_speculative_build: bool = False
     app_confidence: int = 25
     app_recognition_timeout: int = 180
 
@@ -42,9 +48,13 @@ class AppConfiguration:
         self.serial_read = data.get('serial', {}).get('read', self.serial_read)
         self.serial_write = data.get('serial', {}).get('write', self.serial_write)
 
+        self.web_server = data.get('web', {}).get('server', self.web_server)
+        self.web_threads = data.get('web', {}).get('threads', self.web_threads)
+
         self.app_efficiency_mode = data.get('app', {}).get('efficiency_mode', self.app_efficiency_mode)
         self.app_fast_mode = data.get('app', {}).get('fast_mode', self.app_fast_mode)
         self.app_incremental_build = data.get('app', {}).get('incremental_build', self.app_incremental_build)
+        self.app_speculative_build = data.get('app', {}).get('speculative_build', self.app_speculative_build)
         self.app_confidence = data.get('app', {}).get('confidence', self.app_confidence)
         self.app_recognition_timeout = data.get('app', {}).get('recognition_timeout', self.app_recognition_timeout)
 
@@ -55,6 +65,7 @@ class AppConfiguration:
                 'efficiency_mode': self.app_efficiency_mode,
                 'fast_mode': self.app_fast_mode,
                 'incremental_build': self.app_incremental_build,
+                'speculative_build': self.app_speculative_build,
                 'confidence': self.app_confidence,
                 'recognition_timeout': self.app_recognition_timeout
             },
@@ -74,15 +85,21 @@ class AppConfiguration:
                 'read': self.serial_read,
                 'write': self.serial_write
             },
+            'web': {
+                'server': self.web_server,
+                'threads': self.web_threads
+            },
         }
 
     def validate(self) -> tuple[bool, str]:
         """Validates the configuration of the application."""
         for key, value in self.__dict__.items():
-            if key in ('app_confidence', 'app_recognition_timeout', 'serial_baud_rate'):
+            if key in ('app_confidence', 'app_recognition_timeout', 'serial_baud_rate', 'web_threads'):
                 result = isinstance(value, int) and value > 0
-            elif key in ('app_incremental_build', 'app_efficiency_mode', 'app_fast_mode'):
+            elif key in ('app_incremental_build', 'app_speculative_build', 'app_efficiency_mode', 'app_fast_mode'):
                 result = isinstance(value, bool)
+            elif key == 'web_server':
+                result = value in ('flask', 'waitress')
             else:
                 result = isinstance(value, str) and bool(value.strip())
 
@@ -142,10 +159,37 @@ class CubeConfiguration:
         ]
 
 
-@dataclass
+@dataclass(frozen=True)
+class ActionRequest:
+    """An immutable snapshot of an action requested from the website and its state."""
+    id: int
+    action: Action
+    state: ActionState = ActionState.PENDING
+    message: str = ''
+    time_created: int = 0
+    time_handled: int = 0
+    time_finished: int = 0
+
+    @property
+    def is_done(self) -> bool:
+        """Returns true if the action was rejected, finished or failed."""
+        return self.state in (ActionState.REJECTED, ActionState.FINISHED, ActionState.FAILED)
+
+    @property
+    def latency_handled(self) -> float:
+        """Returns the seconds from the request until the action was accepted or rejected."""
+        return (self.time_handled - self.time_created) / 1_000_000_000 if self.time_handled else 0.0
+
+    @property
+    def latency_finished(self) -> float:
+        """Returns the seconds from the request until the effect of the action completed."""
+        return (self.time_finished - self.time_created) / 1_000_000_000 if self.time_finished else 0.0
+
+
+@dataclass(frozen=True)
 class StatusData:
-    """Holds the status of the 3D Re-Builder application."""
-    config: list[CubeColor] = field(default_factory=lambda: [CubeColor.UNKNOWN for _ in range(8)])
+    """An immutable snapshot of the status of the 3D Re-Builder application."""
+    config: tuple[CubeColor, ...] = tuple(CubeColor.UNKNOWN for _ in range(8))
     energy: float = 0.0
     status: Status = Status.IDLE
     steps_finished: int = 0
@@ -153,17 +197,7 @@ class StatusData:
     time_config: int = 0
     time_end: int = 0
     time_start: int = 0
-
-    def reset(self) -> None:
-        """Resets the status."""
-        self.config = [CubeColor.UNKNOWN for _ in range(8)]
-        self.energy = 0.0
-        self.status = Status.IDLE
-        self.steps_finished = 0
-        self.steps_total = 10
-        self.time_config = 0
-        self.time_end = 0
-        self.time_start = 0
+    actions: tuple[ActionRequest, ...] = ()
 
     @property
     def duration_config(self) -> float:
@@ -174,3 +208,60 @@ class StatusData:
     def duration_total(self) -> float:
         """Returns the total duration for the run."""
         return (self.time_end - self.time_start) / 1_000_000_000
+
+
+class SharedStatus:
+    """Shares the status of the 3D Re-Builder application between the threads.
+
+    The writers publish a new immutable snapshot of the status with its version, the readers get
+    the latest published snapshot without locking and therefore always see a consistent status.
+    The writers are serialized and wake up the threads waiting for a change, e.g. to push the
+    status to the user interface.
+    """
+
+    def __init__(self) -> None:
+        self._condition = Condition()
+        self._published = (StatusData(), 0)
+        self._json = ('', -1)
+
+    @property
+    def snapshot(self) -> StatusData:
+        """Returns the latest snapshot of the status."""
+        return self._published[0]
+
+    @property
+    def version(self) -> int:
+        """Returns the version of the status, incremented on every change."""
+        return self._published[1]
+
+    def update(self, **values: Any) -> StatusData:
+        """Publishes a snapshot with the changed values and returns it."""
+        return self.modify(lambda status: replace(status, **values))
+
+    def modify(self, change: Callable[[StatusData], StatusData]) -> StatusData:
+        """Publishes the snapshot the change creates from the latest snapshot and returns it."""
+        with self._condition:
+            status, version = self._published
+            status = change(status)
+            self._published = (status, version + 1)
+            self._condition.notify_all()
+            return status
+
+    def reset(self, **values: Any) -> StatusData:
+        """Publishes the default status with the values and returns it, the requested actions are kept."""
+        return self.modify(lambda status: StatusData(**({'actions': status.actions} | values)))
+
+    def to_json(self) -> tuple[str, int]:
+        """Returns the latest snapshot serialized as JSON and its version, serialized only once per version."""
+        status, version = self._published
+        data, json_version = self._json
+        if json_version != version:
+            data = json.dumps(asdict(status))
+            self._json = (data, version)
+        return data, version
+
+    def wait_for_change(self, version: int, timeout: float | None = None) -> int:
+        """Waits until the status differs from the version, returns the current version."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._published[1] != version, timeout)
+            return self._published[1]
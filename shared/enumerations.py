@@ -12,6 +12,19 @@ class Action(StrEnum):
     RESET = 'reset'
 
 
+class ActionState(StrEnum):
+    """The states of an action requested from the website.
+
+    An action is accepted or rejected when it is handled and accepted actions are finished or
+    failed when their effect completed.
+    """
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+
+
 class CubeColor(StrEnum):
     """The colors a cube in the configuration can have.
 
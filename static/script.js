@@ -1,11 +1,13 @@
 "use strict"
 
 const actionEndpoint = "/action"
+const debugEndpoint = "/debug"
+const eventsEndpoint = "/events"
 const settingsEndpoint = "/settings"
 const statusEndpoint = "/status"
 
 const pollingInterval = 1000;
-let statusFetchTask = setInterval(fetchStatus, pollingInterval);
+let statusFetchTask;
 
 const formatter = new Intl.NumberFormat("de-ch", {
     minimumFractionDigits: 3,
@@ -22,27 +24,28 @@ const endTimeText = document.getElementById("end-time-value");
 const energyText = document.getElementById("energy-value");
 const progressText = document.getElementById("build-progress-value");
 const progressBar = document.getElementById("build-progress")
+const actionText = document.getElementById("action-value");
 
 const homeButton = document.getElementById("btn-home");
 homeButton.addEventListener("click", () => {
     homePage.classList.add("active");
     settingsPage.classList.remove("active");
-    statusFetchTask = setInterval(fetchStatus, pollingInterval);
+    subscribeStatus();
 });
 
 const initButton = document.getElementById("btn-init");
 initButton.addEventListener("click", () => {
-    sendPostRequest(actionEndpoint, {"action": "init"}).then();
+    sendAction("init").then(showAction);
 });
 
 const startButton = document.getElementById("btn-start");
 startButton.addEventListener("click", () => {
-    sendPostRequest(actionEndpoint, {"action": "start"}).then();
+    sendAction("start").then(showAction);
 });
 
 const pauseButton = document.getElementById("btn-pause");
 pauseButton.addEventListener("click", () => {
-    sendPostRequest(actionEndpoint, {"action": "stop"}).then();
+    sendAction("stop").then(showAction);
 });
 
 // Settings Page
@@ -51,6 +54,7 @@ const settingsPage = document.getElementById("settings");
 const efficiencyModeInput = document.getElementById("efficiency-mode")
 const fastModeInput = document.getElementById("fast-mode")
 const incrementalBuildInput = document.getElementById("incremental-build")
+const speculativeBuildInput = document.getElementById("speculative-build")
 
 const confidenceInput = document.getElementById("confidence");
 const confidenceText = document.getElementById("confidence-value");
@@ -68,13 +72,16 @@ const settingsButton = document.getElementById("btn-settings");
 settingsButton.addEventListener("click", () => {
     settingsPage.classList.add("active");
     homePage.classList.remove("active");
-    clearInterval(statusFetchTask);
+    unsubscribeStatus();
     sendGetRequest(settingsEndpoint)
         .then(data => {
-            const {efficiency_mode, fast_mode, incremental_build, confidence, recognition_timeout} = data;
+            const {
+                efficiency_mode, fast_mode, incremental_build, speculative_build, confidence, recognition_timeout
+            } = data;
             efficiencyModeInput.checked = efficiency_mode || false;
             fastModeInput.checked = fast_mode || false;
             incrementalBuildInput.checked = incremental_build || false;
+            speculativeBuildInput.checked = speculative_build || false;
             confidenceInput.value = confidence || 25;
             confidenceText.textContent = confidenceInput.value + " frames";
             recognitionTimeoutInput.value = recognition_timeout || 180;
@@ -88,6 +95,7 @@ saveButton.addEventListener("click", () => {
         "efficiency_mode": efficiencyModeInput.checked,
         "fast_mode": fastModeInput.checked,
         "incremental_build": incrementalBuildInput.checked,
+        "speculative_build": speculativeBuildInput.checked,
         "confidence": parseInt(confidenceInput.value),
         "recognition_timeout": parseInt(recognitionTimeoutInput.value, 10)
     }).then();
@@ -108,6 +116,24 @@ resetButton.addEventListener("click", () => {
     sendPostRequest(actionEndpoint, {"action": "reset"}).then();
 });
 
+// Debug Page
+const debugPage = document.getElementById("debug");
+const debugView = document.getElementById("debug-view");
+
+const debugButton = document.getElementById("btn-debug");
+debugButton.addEventListener("click", () => {
+    debugPage.classList.add("active");
+    settingsPage.classList.remove("active");
+    debugView.src = debugEndpoint;
+});
+
+const debugBackButton = document.getElementById("btn-debug-back");
+debugBackButton.addEventListener("click", () => {
+    settingsPage.classList.add("active");
+    debugPage.classList.remove("active");
+    debugView.removeAttribute("src");
+});
+
 // HTTP Requests
 async function sendGetRequest(url) {
     try {
@@ -142,33 +168,102 @@ async function sendPostRequest(url, data) {
     }
 }
 
+// Actions
+const pendingActions = new Map();
+let latestActions = [];
+
+async function sendAction(action) {
+    const responseText = await sendPostRequest(actionEndpoint, {"action": action});
+    let request;
+    try {
+        request = JSON.parse(responseText);
+    } catch (error) {
+        return undefined;
+    }
+    showAction(request);
+    const result = new Promise(resolve => pendingActions.set(request.id, resolve));
+    // The status with the result may have arrived before the response
+    updateActions(latestActions);
+    return result;
+}
+
+function updateActions(actions) {
+    latestActions = actions || [];
+    for (const request of latestActions) {
+        const resolve = pendingActions.get(request.id);
+        if (!resolve) {
+            continue;
+        }
+        if (["rejected", "finished", "failed"].includes(request.state)) {
+            pendingActions.delete(request.id);
+            resolve(request);
+        } else {
+            showAction(request);
+        }
+    }
+}
+
+function showAction(request) {
+    if (request) {
+        actionText.textContent = request.action + ": " + request.state + (request.message ? " (" + request.message + ")" : "");
+    }
+}
+
 // App
+let statusSource;
+subscribeStatus();
+
+function subscribeStatus() {
+    if (!window.EventSource) {
+        statusFetchTask = setInterval(fetchStatus, pollingInterval);
+        return;
+    }
+    statusSource = new EventSource(eventsEndpoint);
+    statusSource.addEventListener("message", (event) => {
+        updateStatus(JSON.parse(event.data));
+    });
+}
+
+function unsubscribeStatus() {
+    clearInterval(statusFetchTask);
+    if (statusSource) {
+        statusSource.close();
+        statusSource = undefined;
+    }
+}
 
 async function fetchStatus() {
     sendGetRequest(statusEndpoint)
         .then(data => {
-            const {config, energy, status, steps_finished, steps_total, time_config, time_end, time_start} = data;
-            let startDate;
-            if (time_start) {
-                startDate = new Date(time_start / 1e6).toLocaleTimeString('de-ch')
+            if (data) {
+                updateStatus(data);
             }
-            const startToConfig = Math.max(0, (time_config - time_start) / 1e9);
-            const startToEnd = Math.max(0, (time_end - time_start) / 1e9);
-
-            updateButtonState(status);
-            updateConfigState(config);
-
-            statusText.textContent = status || "idle";
-            startTimeText.textContent = startDate || "00:00:00";
-            configTimeText.textContent = formatter.format(startToConfig || 0) + "s";
-            endTimeText.textContent = formatter.format(startToEnd || 0) + "s";
-            energyText.textContent = formatter.format(energy || 0) + " Wh";
-            progressText.textContent = (Math.round((100 / steps_total) * steps_finished) || "0") + "%";
-            progressBar.max = steps_total || 0;
-            progressBar.value = steps_finished || 0;
         });
 }
 
+function updateStatus(data) {
+    const {actions, config, energy, status, steps_finished, steps_total, time_config, time_end, time_start} = data;
+    let startDate;
+    if (time_start) {
+        startDate = new Date(time_start / 1e6).toLocaleTimeString('de-ch')
+    }
+    const startToConfig = Math.max(0, (time_config - time_start) / 1e9);
+    const startToEnd = Math.max(0, (time_end - time_start) / 1e9);
+
+    updateButtonState(status);
+    updateConfigState(config);
+    updateActions(actions);
+
+    statusText.textContent = status || "idle";
+    startTimeText.textContent = startDate || "00:00:00";
+    configTimeText.textContent = formatter.format(startToConfig || 0) + "s";
+    endTimeText.textContent = formatter.format(startToEnd || 0) + "s";
+    energyText.textContent = formatter.format(energy || 0) + " Wh";
+    progressText.textContent = (Math.round((100 / steps_total) * steps_finished) || "0") + "%";
+    progressBar.max = steps_total || 0;
+    progressBar.value = steps_finished || 0;
+}
+
 function updateButtonState(status) {
     switch (status) {
         case "init":
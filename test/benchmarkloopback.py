@@ -0,0 +1,121 @@
+"""Benchmark of the UART communication and the build execution using the simulated electronics controller.
+
+Run with: python3 -m test.benchmarkloopback [--runs 10] [--delay-scale 0.1] [--packet-loss 0.01]
+"""
+import argparse
+import queue
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from rebuilder.builder import Builder
+from rebuilder.optimizer import PlanOptimizer
+from shared.data import AppConfiguration
+from shared.enumerations import CubeColor
+from uart.command import Command
+from uart.commandqueue import CommandQueue
+from uart.communicator import UartCommunicator
+from .electronicssimulator import ElectronicsSimulator, SimulatorSettings
+from .virtualserial import VirtualSerialPort
+
+CONFIGS = [
+    [CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED,
+     CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED],
+    [CubeColor.RED, CubeColor.BLUE, CubeColor.YELLOW, CubeColor.BLUE,
+     CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE],
+    [CubeColor.BLUE, CubeColor.BLUE, CubeColor.BLUE, CubeColor.BLUE,
+     CubeColor.YELLOW, CubeColor.RED, CubeColor.YELLOW, CubeColor.RED],
+]
+
+
+@dataclass
+class BenchmarkResult:
+    """The results of the loopback benchmark."""
+    commands: int = 0
+    duration: float = 0.0
+    failed_builds: int = 0
+    build_durations: list[float] = field(default_factory=list)
+    ack_latencies: list[float] = field(default_factory=list)
+
+
+def run_benchmark(settings: SimulatorSettings, runs: int, timeout: float = 60.0) -> BenchmarkResult:
+    """Builds the configurations through the communicator and the simulated electronics controller."""
+    port = VirtualSerialPort(timeout=0.1)
+    app_config = AppConfiguration()
+    app_config.serial_read = port.name
+    app_config.serial_write = port.name
+    read_queue: queue.Queue = queue.Queue()
+    write_queue = CommandQueue()
+    communicator = UartCommunicator(app_config, read_queue, write_queue)
+    simulator = ElectronicsSimulator(port, settings=settings)
+    builder = Builder(write_queue, PlanOptimizer())
+    communicator.start()
+    simulator.start()
+
+    result = BenchmarkResult()
+    benchmark_start = time.perf_counter()
+    try:
+        for run in range(runs):
+            builder.reset()
+            builder.set_config(CONFIGS[run % len(CONFIGS)].copy())
+            build_start = time.perf_counter()
+            builder.build(build_doubles_first=True)
+            builder.finish_build()
+            if _wait_for_lift(read_queue, timeout):
+                result.build_durations.append(time.perf_counter() - build_start)
+            else:
+                result.failed_builds += 1
+    finally:
+        result.duration = time.perf_counter() - benchmark_start
+        result.ack_latencies = communicator.ack_latencies
+        result.commands = len(result.ack_latencies)
+        simulator.stop()
+        communicator.halt()
+        communicator.shutdown()
+        port.close()
+    return result
+
+
+def _wait_for_lift(read_queue: queue.Queue, timeout: float) -> bool:
+    """Waits until the lift finished moving, returns false on timeout."""
+    deadline = time.perf_counter() + timeout
+    while (remaining := deadline - time.perf_counter()) > 0:
+        try:
+            message = read_queue.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if (Command(message.cmd) == Command.EXECUTION_FINISHED and
+                message.data.exec_finished.cmd == Command.MOVE_LIFT.value):
+            return True
+    return False
+
+
+def _print_result(result: BenchmarkResult) -> None:
+    """Prints the results of the benchmark."""
+    print(f'Commands: {result.commands}, duration: {result.duration:.3f}s, '
+          f'throughput: {result.commands / result.duration:.1f} commands/s')
+    if len(result.ack_latencies) >= 2:
+        latencies = [latency * 1000 for latency in result.ack_latencies]
+        quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        print(f'Ack latency mean: {statistics.mean(latencies):.3f}ms, p50: {quantiles[49]:.3f}ms, '
+              f'p95: {quantiles[94]:.3f}ms, p99: {quantiles[98]:.3f}ms, max: {max(latencies):.3f}ms')
+    if result.build_durations:
+        print(f'Build duration mean: {statistics.mean(result.build_durations):.3f}s, '
+              f'min: {min(result.build_durations):.3f}s, max: {max(result.build_durations):.3f}s')
+    print(f'Failed builds: {result.failed_builds}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='UART loopback benchmark')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--delay-scale', type=float, default=0.1)
+    parser.add_argument('--packet-loss', type=float, default=0.0)
+    parser.add_argument('--corruption', type=float, default=0.0)
+    parser.add_argument('--nak-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    simulator_settings = SimulatorSettings(packet_loss=args.packet_loss, corruption=args.corruption,
+                                           nak_rate=args.nak_rate, seed=args.seed)
+    simulator_settings.delays = {cmd: delay * args.delay_scale for cmd, delay in simulator_settings.delays.items()}
+    _print_result(run_benchmark(simulator_settings, args.runs))
@@ -0,0 +1,85 @@
+"""Benchmark of the build planner against the greedy build algorithm over all cube configurations.
+
+Run with: python3 -m test.benchmarkplanner
+"""
+import queue
+import statistics
+import time
+
+from rebuilder.builder import Builder
+from rebuilder.optimizer import PlanOptimizer
+from rebuilder.planner import BuildPlanner, PlanStep, all_configurations
+from rebuilder.simulator import BuildSimulator
+from uart.command import Command, Message
+
+
+def _greedy_plan(config) -> list[Message]:
+    """Returns the commands of the greedy build algorithm, including the return to the start position."""
+    uart_write: queue.Queue = queue.Queue()
+    builder = Builder(uart_write, PlanOptimizer())
+    builder.set_config(config.copy())
+    builder.build(build_doubles_first=True)
+    builder.finish_build()
+    messages = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+    return [message for message in messages if Command(message.cmd) != Command.MOVE_LIFT]
+
+
+def _planned(planner: BuildPlanner, config) -> list[Message]:
+    """Returns the commands of the planner, including the return to the start position."""
+    steps = planner.plan(config)
+    rotation = sum(step.rotation for step in steps)
+    return planner.to_messages(steps + [PlanStep(rotation=-rotation)])
+
+
+def _simulate(simulator: BuildSimulator, plan: list[Message]) -> tuple[float, float]:
+    """Returns the simulated duration and energy of the commands."""
+    simulator.submit_all(plan)
+    result = simulator.run()
+    return result.duration, result.energy
+
+
+def run_benchmark() -> None:
+    """Compares the cost, commands, rotation degrees and simulated duration of the greedy and the planned builds."""
+    planner = BuildPlanner()
+    simulator = BuildSimulator()
+    cost_model = planner.cost_model
+    greedy_costs, planned_costs, improvements = [], [], []
+    greedy_commands = planned_commands = greedy_degrees = planned_degrees = 0
+    planning_times = []
+    greedy_simulated, planned_simulated = [], []
+
+    for config in all_configurations():
+        greedy = _greedy_plan(config)
+        start = time.perf_counter()
+        planned = _planned(planner, config)
+        planning_times.append(time.perf_counter() - start)
+
+        greedy_cost = cost_model.plan_cost(greedy)
+        planned_cost = cost_model.plan_cost(planned)
+        greedy_costs.append(greedy_cost)
+        planned_costs.append(planned_cost)
+        improvements.append(greedy_cost - planned_cost)
+        greedy_commands += len(greedy)
+        planned_commands += len(planned)
+        greedy_degrees += PlanOptimizer.rotation_degrees(greedy)
+        planned_degrees += PlanOptimizer.rotation_degrees(planned)
+        greedy_simulated.append(_simulate(simulator, greedy))
+        planned_simulated.append(_simulate(simulator, planned))
+
+    print(f'Configurations: {len(greedy_costs)}')
+    print(f'Greedy  - mean cost: {statistics.mean(greedy_costs):.3f}s, max cost: {max(greedy_costs):.3f}s, '
+          f'commands: {greedy_commands}, rotation: {greedy_degrees}°')
+    print(f'Planner - mean cost: {statistics.mean(planned_costs):.3f}s, max cost: {max(planned_costs):.3f}s, '
+          f'commands: {planned_commands}, rotation: {planned_degrees}°')
+    print(f'Improved configurations: {sum(1 for value in improvements if value > 1e-9)}, '
+          f'worse configurations: {sum(1 for value in improvements if value < -1e-9)}, '
+          f'mean saving: {statistics.mean(improvements):.3f}s, max saving: {max(improvements):.3f}s')
+    for name, simulated in (('Greedy ', greedy_simulated), ('Planner', planned_simulated)):
+        print(f'{name} - simulated mean duration: {statistics.mean(value[0] for value in simulated):.3f}s, '
+              f'mean energy: {statistics.mean(value[1] for value in simulated) * 1000:.3f}mWh')
+    print(f'Planning time mean: {statistics.mean(planning_times) * 1000:.3f}ms, '
+          f'max: {max(planning_times) * 1000:.3f}ms')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,63 @@
+"""Benchmark of the UART frame delivery latency using a pseudo-terminal pair.
+
+Run with: python3 -m test.benchmarkuart
+"""
+import queue
+import random
+import statistics
+import time
+
+from shared.data import AppConfiguration
+from uart.command import Command, DataUnion
+from uart.commandbuilder import CommandBuilder
+from uart.communicator import PREAMBLE, UartCommunicator
+from .virtualserial import VirtualSerialPort
+
+FRAMES = 500
+
+
+def _frame() -> bytes:
+    """Creates the frame of an execution finished command."""
+    data = DataUnion()
+    data.exec_finished.cmd = Command.PLACE_CUBES.value
+    return PREAMBLE + bytes(CommandBuilder.other_command(Command.EXECUTION_FINISHED, data))
+
+
+def run_benchmark() -> list[float]:
+    """Measures the time from writing the last byte of a frame until it is delivered to the read queue."""
+    port = VirtualSerialPort()
+    app_config = AppConfiguration()
+    app_config.serial_read = port.name
+    app_config.serial_write = port.name
+    read_queue: queue.Queue = queue.Queue()
+    communicator = UartCommunicator(app_config, read_queue, queue.Queue())
+    communicator.start()
+    # Opening the port flushes its input, so the frames are written after the reader connected
+    deadline = time.monotonic() + 2.0
+    while not communicator.health[0].connected and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    latencies = []
+    try:
+        frame = _frame()
+        for _ in range(FRAMES):
+            split = random.randint(1, len(frame) - 1)
+            port.write(frame[:split])
+            time.sleep(random.uniform(0.0, 0.002))
+            start = time.perf_counter()
+            port.write(frame[split:])
+            read_queue.get(timeout=5.0)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        communicator.halt()
+        communicator.shutdown()
+        port.close()
+    return latencies
+
+
+if __name__ == '__main__':
+    results = run_benchmark()
+    quantiles = statistics.quantiles(results, n=100, method='inclusive')
+    print(f'Frames: {len(results)}')
+    print(f'Latency mean: {statistics.mean(results):.3f}ms, p50: {quantiles[49]:.3f}ms, '
+          f'p95: {quantiles[94]:.3f}ms, max: {max(results):.3f}ms')
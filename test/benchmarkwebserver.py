@@ -0,0 +1,148 @@
+"""Benchmark of the web server with concurrent clients while the cube recognition is running.
+
+Run with: python3 -m test.benchmarkwebserver [--clients 8] [--requests 200] [--server waitress]
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+import requests
+
+from shared.actionqueue import ActionQueue
+from shared.configstore import ConfigStore
+from shared.data import AppConfiguration, SharedStatus
+from shared.enumerations import CubeColor
+from video.recognition import LOWER_RED_LOW, UPPER_RED_LOW
+from web.server import WEB_HOST, WEB_PORT, WebServer
+
+BASE_URL = f'http://{WEB_HOST}:{WEB_PORT}'
+FRAME_RATE = 30
+
+
+@dataclass
+class BenchmarkResult:
+    """The results of the web server benchmark."""
+    duration: float = 0.0
+    errors: int = 0
+    frames: int = 0
+    action_latency: float = 0.0
+    latencies: dict[str, list[float]] = field(default_factory=lambda: {'/status': [], '/action': []})
+
+
+def run_benchmark(server: str, clients: int, requests_per_client: int, recognition: bool) -> BenchmarkResult:
+    """Sends status and action requests from the clients to the web server."""
+    app_config = AppConfiguration()
+    app_config.web_server = server
+    status_data = SharedStatus()
+    web_queue = ActionQueue(status_data)
+    web_server = WebServer(app_config, ConfigStore(), web_queue, status_data)
+    web_server.start()
+    _wait_for_server()
+
+    result = BenchmarkResult()
+    halt_event = threading.Event()
+    workers = [threading.Thread(target=_drain_actions, args=(web_queue,))]
+    if recognition:
+        workers.append(threading.Thread(target=_recognize, args=(status_data, halt_event, result)))
+    for worker in workers:
+        worker.start()
+
+    benchmark_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            for latencies, errors in executor.map(lambda _: _client(requests_per_client), range(clients)):
+                for endpoint, values in latencies.items():
+                    result.latencies[endpoint].extend(values)
+                result.errors += errors
+    finally:
+        result.duration = time.perf_counter() - benchmark_start
+        halt_event.set()
+        web_queue.close()
+        for worker in workers:
+            worker.join()
+        web_server.halt()
+        web_server.stop()
+    metrics = web_queue.metrics()
+    result.action_latency = max((metrics.mean_latency for metrics in metrics.values()), default=0.0) * 1000
+    return result
+
+
+def _wait_for_server(timeout: float = 5.0) -> None:
+    """Waits until the web server accepts requests."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            requests.get(f'{BASE_URL}/status', timeout=1.0)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    raise TimeoutError('Web server did not start')
+
+
+def _client(count: int) -> tuple[dict[str, list[float]], int]:
+    """Alternately requests the status and sends an action, returns the latencies and the number of errors."""
+    latencies: dict[str, list[float]] = {'/status': [], '/action': []}
+    errors = 0
+    with requests.Session() as session:
+        for i in range(count):
+            start = time.perf_counter()
+            if i % 2 == 0:
+                endpoint, response = '/status', session.get(f'{BASE_URL}/status', timeout=5.0)
+            else:
+                endpoint, response = '/action', session.post(f'{BASE_URL}/action', json={'action': 'reset'},
+                                                             timeout=5.0)
+            latencies[endpoint].append((time.perf_counter() - start) * 1000)
+            errors += 0 if response.ok else 1
+    return latencies, errors
+
+
+def _drain_actions(web_queue: ActionQueue) -> None:
+    """Consumes the actions like the web action handler of the application until the queue is closed."""
+    while (request := web_queue.get()) is not None:
+        web_queue.finish(web_queue.accept(request))
+
+
+def _recognize(status_data: SharedStatus, halt_event: threading.Event, result: BenchmarkResult) -> None:
+    """Filters frames at the frame rate of the camera and updates the recognized configuration in the status."""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    colors = [CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE, CubeColor.NONE]
+    while not halt_event.is_set():
+        start = time.perf_counter()
+        hsv = cv2.cvtColor(cv2.GaussianBlur(frame, (5, 5), 0), cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, LOWER_RED_LOW, UPPER_RED_LOW)
+        status_data.update(config=tuple(colors[(result.frames + i + int(mask[i, 0])) % len(colors)] for i in range(8)))
+        result.frames += 1
+        time.sleep(max(0.0, 1 / FRAME_RATE - (time.perf_counter() - start)))
+
+
+def _print_result(server: str, result: BenchmarkResult) -> None:
+    """Prints the results of the benchmark."""
+    count = sum(len(latencies) for latencies in result.latencies.values())
+    print(f'{server} - requests: {count}, duration: {result.duration:.3f}s, '
+          f'throughput: {count / result.duration:.1f} requests/s, errors: {result.errors}, frames: {result.frames}, '
+          f'action latency: {result.action_latency:.3f}ms')
+    for endpoint, latencies in result.latencies.items():
+        if len(latencies) >= 2:
+            quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+            print(f'  {endpoint:<8} mean: {statistics.mean(latencies):.3f}ms, p50: {quantiles[49]:.3f}ms, '
+                  f'p95: {quantiles[94]:.3f}ms, p99: {quantiles[98]:.3f}ms, max: {max(latencies):.3f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Web server benchmark')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--server', choices=['waitress', 'flask'], default=None)
+    parser.add_argument('--no-recognition', action='store_true')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    for server_name in [args.server] if args.server else ['waitress', 'flask']:
+        _print_result(server_name, run_benchmark(server_name, args.clients, args.requests, not args.no_recognition))
@@ -0,0 +1,63 @@
+"""Helper functions to record the commands of the build algorithm for all cube configurations.
+
+Update the stored baseline with: python3 -m test.builderbaseline
+"""
+import gzip
+import json
+import os
+import queue
+
+from rebuilder.builder import Builder
+from rebuilder.planner import all_configurations
+from rebuilder.simulator import BuildSimulator, SimulationResult
+from shared.enumerations import CubeColor
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'data', 'builderbaseline.json.gz')
+COLOR_KEYS = {CubeColor.NONE: '-', CubeColor.RED: 'r', CubeColor.YELLOW: 'y', CubeColor.BLUE: 'b'}
+
+
+def config_key(config: list[CubeColor]) -> str:
+    """Returns the short key of the cube configuration used in the baseline."""
+    return ''.join(COLOR_KEYS[color] for color in config)
+
+
+def simulate_build(simulator: BuildSimulator, config: list[CubeColor], build_doubles_first: bool) -> SimulationResult:
+    """Builds the configuration with the build algorithm and returns the simulated result of its commands."""
+    uart_write: queue.Queue = queue.Queue()
+    builder = Builder(uart_write)
+    builder.set_config(config.copy())
+    builder.build(build_doubles_first)
+    builder.finish_build()
+    simulator.submit_queue(uart_write)
+    return simulator.run()
+
+
+def record() -> dict[str, list[int]]:
+    """Returns the commands and rotation degrees without and with doubles first for all configurations."""
+    simulator = BuildSimulator()
+    baseline = {}
+    for config in all_configurations():
+        values = []
+        for build_doubles_first in (False, True):
+            result = simulate_build(simulator, config, build_doubles_first)
+            values.extend([result.commands, result.degrees])
+        baseline[config_key(config)] = values
+    return baseline
+
+
+def load() -> dict[str, list[int]]:
+    """Loads the stored baseline."""
+    with gzip.open(BASELINE_FILE, 'rt', encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save(baseline: dict[str, list[int]]) -> None:
+    """Stores the baseline, the file content only changes if the baseline changes."""
+    data = json.dumps(baseline, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    with gzip.GzipFile(BASELINE_FILE, 'wb', mtime=0) as baseline_file:
+        baseline_file.write(data)
+
+
+if __name__ == '__main__':
+    print(f'Recording build algorithm baseline: {BASELINE_FILE}')
+    save(record())
@@ -0,0 +1,184 @@
+"""Local stand-in for the Cube API used for integration and latency testing.
+
+Run with: python3 -m test.cubeapiserver [--port 8000] [--latency 0.05] [--error-rate 0.1] [--token <token>]
+and set the address of the API in the configuration to e.g. http://127.0.0.1:8000.
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+TEAM_PATH = re.compile(r'^/cubes/team(\d+)(?:/(start|config|end))?$')
+
+
+@dataclass
+class CubeApiSettings:
+    """The settings of the Cube API stand-in.
+
+    Each request is answered after the latency plus a random jitter. The requests are rejected
+    with the error rate as service unavailable and, if a token is set, as unauthorized if they
+    do not carry the token.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    token: str = ''
+    seed: int | None = None
+
+
+@dataclass
+class ReceivedRequest:
+    """A request received by the Cube API stand-in."""
+    method: str
+    path: str
+    status: int
+    received: float
+    data: Any = None
+
+
+@dataclass
+class TeamRun:
+    """The run of a team as recorded by the Cube API stand-in."""
+    start: float = 0.0
+    config: dict[str, Any] = field(default_factory=dict)
+    end: float = 0.0
+
+
+class CubeApiServer:
+    """Serves the endpoints of the Cube API on the local host."""
+
+    def __init__(self, settings: CubeApiSettings | None = None, port: int = 0) -> None:
+        self._logger = logging.getLogger('test.cube_api_server')
+        self.settings = settings if settings is not None else CubeApiSettings()
+        self._random = random.Random(self.settings.seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+        self.requests: list[ReceivedRequest] = []
+        self.runs: dict[str, TeamRun] = {}
+
+    @property
+    def address(self) -> str:
+        """Returns the address to configure as the address of the Cube API."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host!s}:{port}'
+
+    def start(self) -> None:
+        """Starts serving the requests in the background."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops serving the requests."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def handle(self, method: str, path: str, token: str, data: Any) -> tuple[int, Any]:
+        """Handles the request and returns the status code and the response data."""
+        time.sleep(self.settings.latency + self._random.uniform(0.0, self.settings.jitter))
+        status, response = self._respond(method, path, token, data)
+        with self._lock:
+            self.requests.append(ReceivedRequest(method, path, status, time.perf_counter(), data))
+        self._logger.info('%s %s - %s', method, path, status)
+        return status, response
+
+    def _respond(self, method: str, path: str, token: str, data: Any) -> tuple[int, Any]:
+        """Returns the status code and the response data of the request."""
+        if self.settings.token and token != self.settings.token:
+            return 401, {'message': 'Unauthorized'}
+        with self._lock:
+            if self._random.random() < self.settings.error_rate:
+                return 503, {'message': 'Service Unavailable'}
+
+            if method == 'GET' and path == '/cubes':
+                return 200, {'teams': sorted(self.runs)}
+            match = TEAM_PATH.match(path)
+            if match is None:
+                return 404, {'message': 'Not Found'}
+
+            team, action = match.groups()
+            if method == 'GET' and action is None:
+                run = self.runs.get(team)
+                return (200, run.config) if run is not None else (404, {'message': 'Not Found'})
+            if method != 'POST' or action is None:
+                return 405, {'message': 'Method Not Allowed'}
+            if action == 'start':
+                self.runs[team] = TeamRun(start=time.time())
+            elif team not in self.runs:
+                return 400, {'message': 'Run not started'}
+            elif action == 'config':
+                if not isinstance(data, dict) or 'config' not in data:
+                    return 400, {'message': 'Invalid config'}
+                self.runs[team].config = data
+            else:
+                self.runs[team].end = time.time()
+            return 200, {'message': 'OK'}
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        """Returns the request handler class that forwards the requests to this server."""
+        api_server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            """Answers the requests with keep-alive connections like the Cube API."""
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Handles a GET request."""
+                self._answer(*api_server.handle('GET', self.path, self.headers.get('Auth', ''), None))
+
+            def do_POST(self):  # pylint: disable=invalid-name
+                """Handles a POST request."""
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length > 0 else b''
+                try:
+                    data = json.loads(body) if body else None
+                except json.JSONDecodeError:
+                    self._answer(400, {'message': 'Invalid JSON'})
+                    return
+                self._answer(*api_server.handle('POST', self.path, self.headers.get('Auth', ''), data))
+
+            def log_message(self, format, *_):  # pylint: disable=redefined-builtin
+                """Suppresses the access log of the request handler."""
+
+            def _answer(self, status: int, data: Any) -> None:
+                """Sends the response."""
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return _Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cube API stand-in server')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--token', default='')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = CubeApiServer(CubeApiSettings(args.latency, args.jitter, args.error_rate, args.token, args.seed),
+                           args.port)
+    print(f'Cube API stand-in serving on {server.address}')
+    server.start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,69 +1,131 @@
 """Helper classes to simulate the electronics controller used for development."""
 import concurrent.futures
+import logging
 import queue
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from queue import Queue
-from threading import Event
+from threading import Event, Lock
 
 import serial
 
 from uart.command import ButtonState, Command, DataUnion, LiftState, Message, WerniState
 from uart.commandbuilder import CommandBuilder
+from uart.communicator import FRAME_SIZE, PREAMBLE
+from .virtualserial import VirtualSerialPort
+
+
+@dataclass
+class SimulatorSettings:
+    """The settings of the electronics controller simulator.
+
+    The fault probabilities are applied to each frame: lost frames are neither acknowledged
+    nor executed, corrupted frames have a flipped byte and rejected frames are answered with
+    a CRC error to force a retransmission.
+    """
+    delays: dict[Command, float] = field(default_factory=lambda: {
+        Command.MOVE_LIFT: 2.0,
+        Command.ROTATE_GRID: 0.25,
+        Command.PLACE_CUBES: 0.25,
+        Command.PRIME_MAGAZINE: 0.25
+    })
+    packet_loss: float = 0.0
+    corruption: float = 0.0
+    nak_rate: float = 0.0
+    seed: int | None = None
 
 
 class ElectronicsSimulator:
     """Simulates the electronics controller."""
 
-    def __init__(self, read_port: str, write_port: str) -> None:
+    def __init__(self, read_port: serial.Serial | VirtualSerialPort,
+                 write_port: serial.Serial | VirtualSerialPort | None = None,
+                 settings: SimulatorSettings | None = None) -> None:
+        self._logger = logging.getLogger('test.electronics_simulator')
         self._read_port = read_port
-        self._write_port = write_port
+        self._write_port = write_port if write_port is not None else read_port
+        self._settings = settings if settings is not None else SimulatorSettings()
+        self._random = random.Random(self._settings.seed)
+        self._executor: ThreadPoolExecutor | None = None
         self._halt_event = Event()
         self._pause_event = Event()
+        self._write_lock = Lock()
         self._message_queue: Queue = Queue()
+        self.executed: list[Command] = []
+
+    def start(self) -> None:
+        """Starts the simulated reader and execution in the background."""
+        self._halt_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._executor.submit(self.simulate_reader)
+        self._executor.submit(self.simulate_execution)
+
+    def stop(self) -> None:
+        """Stops the simulated reader and execution."""
+        self._halt_event.set()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def press_start(self) -> None:
+        """Simulates a click on the start button."""
+        self._write(self._send_io_state(start_state=ButtonState.LONG_CLICKED, stop_state=ButtonState.RELEASED))
+
+    def press_stop(self) -> None:
+        """Simulates a click on the stop button."""
+        self._write(self._send_io_state(start_state=ButtonState.RELEASED, stop_state=ButtonState.SHORT_CLICKED))
 
     def control_simulator(self) -> None:
         """Controls the simulator."""
         while not self._halt_event.is_set():
             action = int(input('Action (1 start, 2 stop, 3 exit): '))
             if action == 1:
-                self._write(self._send_io_state(start_state=ButtonState.LONG_CLICKED, stop_state=ButtonState.RELEASED))
+                self.press_start()
             elif action == 2:
-                self._write(self._send_io_state(start_state=ButtonState.RELEASED, stop_state=ButtonState.SHORT_CLICKED))
+                self.press_stop()
             elif action == 3:
                 self._halt_event.set()
 
     def simulate_reader(self) -> None:
         """Simulates the uart reader."""
         last_id = 0
+        data = b''
         while not self._halt_event.is_set():
-            message = self._read()
+            message, data = self._read(data)
             if not message:
                 continue
 
-            if CommandBuilder.calculate_checksum(message) != message.checksum:
-                print('CRC error')
+            if self._random.random() < self._settings.packet_loss:
+                self._logger.info('Dropping message %s', message.id)
+                continue
+
+            if (CommandBuilder.calculate_checksum(message) != message.checksum or
+                    self._random.random() < self._settings.nak_rate):
+                self._logger.info('CRC error')
                 self._write(CommandBuilder.other_command(Command.CRC_ERROR))
                 continue
 
             if last_id == message.id:
-                print('NACK')
+                self._logger.info('NACK')
                 self._write(CommandBuilder.other_command(Command.NOT_ACKNOWLEDGE))
                 continue
 
             last_id = message.id
             command = Command(message.cmd)
-            print(f'Received command: {command}')
+            self._logger.info('Received command: %s', command)
             self._write(CommandBuilder.other_command(Command.ACKNOWLEDGE))
 
             if command == Command.GET_STATE:
-                print('Sending state: LIFT_DOWN')
+                self._logger.info('Sending state: LIFT_DOWN')
                 self._write(self._send_state(LiftState.LIFT_DOWN))
             elif command == Command.PAUSE_BUILD:
-                print('Pausing build')
+                self._logger.info('Pausing build')
                 self._pause_event.set()
                 self._write(self._exec_finished(command))
             elif command == Command.RESUME_BUILD:
-                print('Resuming build')
+                self._logger.info('Resuming build')
                 self._pause_event.clear()
                 self._write(self._exec_finished(command))
             else:
@@ -77,16 +139,14 @@ class ElectronicsSimulator:
                 continue
 
             try:
-                message = self._message_queue.get(timeout=2.0)
+                message = self._message_queue.get(timeout=0.1)
             except queue.Empty:
                 continue
 
             command = Command(message.cmd)
-            print(f'Execute command: {command}')
-            if command == Command.MOVE_LIFT:
-                time.sleep(2)
-            elif command in (Command.ROTATE_GRID, Command.PLACE_CUBES, Command.PRIME_MAGAZINE):
-                time.sleep(0.25)
+            self._logger.info('Execute command: %s', command)
+            time.sleep(self._settings.delays.get(command, 0.0))
+            self.executed.append(command)
             self._write(self._exec_finished(command))
 
     @staticmethod
@@ -111,36 +171,47 @@ class ElectronicsSimulator:
         """Creates the message for the execution finished command."""
         data = DataUnion()
         data.exec_finished.cmd = cmd.value
+        data.exec_finished.success = 1
         return CommandBuilder.other_command(Command.EXECUTION_FINISHED, data)
 
-    def _read(self) -> Message | None:
-        """Reads data from the UART connection."""
-        ser = serial.Serial(self._read_port, 115200, timeout=2.0)
-        data = ser.read(23)
-        if not data:
-            return None
+    def _read(self, data: bytes) -> tuple[Message | None, bytes]:
+        """Reads the next message from the UART connection, returns the message and the remaining data."""
+        preamble_pos = data.find(PREAMBLE)
+        if preamble_pos < 0 or len(data) - preamble_pos < FRAME_SIZE:
+            try:
+                data += self._read_port.read(FRAME_SIZE)
+            except (OSError, serial.SerialException):
+                return None, b''
+            preamble_pos = data.find(PREAMBLE)
 
-        if data[:4] != b'AAAB':
-            print('Invalid preamble')
-            return None
+        if preamble_pos < 0:
+            return None, data[-(len(PREAMBLE) - 1):]
 
-        message_data = data[4:]
-        return Message.from_buffer_copy(message_data)
+        data = data[preamble_pos:]
+        if len(data) < FRAME_SIZE:
+            return None, data
+        return Message.from_buffer_copy(data[len(PREAMBLE):FRAME_SIZE]), data[FRAME_SIZE:]
 
     def _write(self, command: Message | bytes) -> None:
         """Writes the command to the UART connection."""
-        ser = serial.Serial(self._write_port, 115200)
-        if isinstance(command, Message):
-            ser.write(b'AAAB' + command)
-        else:
-            ser.write(command)
+        data = PREAMBLE + bytes(command) if isinstance(command, Message) else command
+        if self._random.random() < self._settings.corruption:
+            index = self._random.randrange(len(PREAMBLE), len(data))
+            data = data[:index] + bytes([data[index] ^ 0xFF]) + data[index + 1:]
+        with self._write_lock:
+            try:
+                self._write_port.write(data)
+            except (OSError, serial.SerialException) as error:
+                self._logger.warning('Failed to write message: %s', error)
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     serial_read = input('Select UART read port: ')
     serial_write = input('Select UART write port: ')
 
-    simulator = ElectronicsSimulator(serial_read, serial_write)
+    simulator = ElectronicsSimulator(serial.Serial(serial_read, 115200, timeout=0.1),
+                                     serial.Serial(serial_write, 115200))
     with concurrent.futures.ThreadPoolExecutor() as executor:
         executor.submit(simulator.control_simulator)
         executor.submit(simulator.simulate_reader)
@@ -0,0 +1,22 @@
+"""Helper functions to create the test data shared by several tests."""
+import cv2
+import numpy as np
+
+from rebuilder.history import RunEvent, RunPhase, RunRecord
+from video.recognition import FRAME_CROP_H, FRAME_CROP_W
+
+
+def cube_frame() -> np.ndarray:
+    """Creates a cropped frame with the reference contour and a blue cube on the positions 1, 2, 7 and 8."""
+    frame = np.zeros((FRAME_CROP_H, FRAME_CROP_W, 3), dtype=np.uint8)
+    cv2.rectangle(frame, (0, 290), (210, FRAME_CROP_H - 1), (255, 255, 255), -1)
+    cv2.rectangle(frame, (150, 50), (350, 350), (255, 0, 0), -1)
+    return frame
+
+
+def history_run(mode: str, start: float, config: float, end: float) -> RunRecord:
+    """Creates the record of a run that started, completed the configuration and ended at the times."""
+    return RunRecord(mode=mode, events=[
+        RunEvent(RunPhase.INIT, start - 5.0), RunEvent(RunPhase.START, start),
+        RunEvent(RunPhase.POSITION, start + 1.0, '1=red'), RunEvent(RunPhase.CONFIG, config),
+        RunEvent(RunPhase.COMMAND, config + 1.0, 'PLACE_CUBES'), RunEvent(RunPhase.LIFT_DOWN, end)])
@@ -0,0 +1,73 @@
+"""Unit tests for the queue of the actions requested from the website."""
+import queue
+import threading
+import time
+import unittest
+
+from shared.actionqueue import ActionQueue
+from shared.data import SharedStatus
+from shared.enumerations import Action, ActionState, Status
+
+
+class TestActionQueue(unittest.TestCase):
+    """Test class for the action queue."""
+
+    def setUp(self):
+        self.status = SharedStatus()
+        self.web_queue = ActionQueue(self.status, history=3)
+
+    def test_submit(self):
+        request = self.web_queue.submit(Action.INIT)
+        self.assertEqual((1, ActionState.PENDING), (request.id, request.state))
+        self.assertEqual(2, self.web_queue.submit(Action.START).id)
+        self.assertEqual((request,), self.status.snapshot.actions[:1])
+        self.assertEqual(request, self.web_queue.get(timeout=1.0))
+        for _ in range(3):
+            self.web_queue.submit(Action.STOP)
+        self.assertEqual([3, 4, 5], [action.id for action in self.status.snapshot.actions])
+        self.assertIsNone(self.web_queue.find(1))
+
+    def test_states(self):
+        request = self.web_queue.submit(Action.STOP)
+        accepted = self.web_queue.accept(request)
+        self.assertEqual(ActionState.ACCEPTED, accepted.state)
+        self.assertFalse(accepted.is_done)
+        self.assertGreaterEqual(accepted.latency_handled, 0.0)
+
+        finished = self.web_queue.finish(request, success=False, message='Timeout')
+        self.assertEqual((ActionState.FAILED, 'Timeout'), (finished.state, finished.message))
+        self.assertEqual(accepted.time_handled, finished.time_handled)
+        self.assertGreaterEqual(finished.latency_finished, accepted.latency_handled)
+        self.assertTrue(finished.is_done)
+        self.assertEqual(finished, self.web_queue.find(request.id))
+
+        rejected = self.web_queue.reject(self.web_queue.submit(Action.START), 'Not possible while idle')
+        self.assertEqual(ActionState.REJECTED, rejected.state)
+        self.assertEqual(rejected.time_handled, rejected.time_finished)
+        self.assertEqual({Action.STOP: 1, Action.START: 1},
+                         {action: metrics.count for action, metrics in self.web_queue.metrics().items()})
+
+    def test_reset_keeps_actions(self):
+        request = self.web_queue.submit(Action.INIT)
+        self.status.reset(status=Status.INIT)
+        self.assertEqual((request,), self.status.snapshot.actions)
+
+    def test_get_wakes_on_arrival(self):
+        received = []
+
+        def _consume():
+            while (request := self.web_queue.get()) is not None:
+                received.append((request, time.perf_counter()))
+
+        thread = threading.Thread(target=_consume)
+        thread.start()
+        time.sleep(0.05)
+        submitted = time.perf_counter()
+        self.web_queue.submit(Action.RESET)
+        self.web_queue.close()
+        thread.join(timeout=2.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(Action.RESET, received[0][0].action)
+        self.assertLess(received[0][1] - submitted, 0.5)
+        with self.assertRaises(queue.Empty):
+            self.web_queue.get(timeout=0.01)
@@ -0,0 +1,73 @@
+"""Unit tests for the static assets of the user interface."""
+import gzip
+import os
+import tempfile
+import unittest
+
+from flask import Flask, request
+
+from web.assets import CACHE_IMMUTABLE, CACHE_REVALIDATE, StaticAssets
+
+SCRIPT = b'function update() {\n    console.log("update");\n}\n' * 20
+
+
+class TestStaticAssets(unittest.TestCase):
+    """Test class for the static assets."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        for name, data in (('index.html', b'<link href="styles.css"><script src="script.js"></script>'),
+                           ('script.js', SCRIPT), ('styles.css', b'h1 {}')):
+            with open(os.path.join(self.temp_dir.name, name), 'wb') as asset_file:
+                asset_file.write(data)
+        self.assets = StaticAssets(self.temp_dir.name)
+        self.assets.load()
+        self.app = Flask('test', static_folder=None)
+
+        @self.app.route('/<path:name>')
+        def _asset(name):
+            response = self.assets.response(name, request)
+            return response if response is not None else ('Not found', 404)
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _hashed_names(self):
+        index = self.client.get('/index.html').get_data(as_text=True)
+        return index.split('"')[1], index.split('"')[3]
+
+    def test_hashed_names(self):
+        styles, script = self._hashed_names()
+        self.assertRegex(styles, r'^styles\.[0-9a-f]{16}\.css$')
+        self.assertRegex(script, r'^script\.[0-9a-f]{16}\.js$')
+
+        response = self.client.get(f'/{script}')
+        self.assertEqual(SCRIPT, response.get_data())
+        self.assertEqual(CACHE_IMMUTABLE, response.headers['Cache-Control'])
+        self.assertEqual('text/javascript', response.mimetype)
+        self.assertEqual(CACHE_REVALIDATE, self.client.get('/script.js').headers['Cache-Control'])
+        self.assertEqual(CACHE_REVALIDATE, self.client.get('/index.html').headers['Cache-Control'])
+        self.assertEqual(404, self.client.get('/missing.js').status_code)
+
+    def test_compression(self):
+        response = self.client.get('/script.js', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual('gzip', response.content_encoding)
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(SCRIPT, gzip.decompress(response.get_data()))
+        self.assertLess(int(response.headers['Content-Length']), len(SCRIPT))
+
+        response = self.client.get('/styles.css', headers={'Accept-Encoding': 'gzip'})
+        self.assertIsNone(response.content_encoding)
+        self.assertEqual(b'h1 {}', response.get_data())
+        self.assertIsNone(self.client.get('/script.js').content_encoding)
+
+    def test_etag(self):
+        response = self.client.get('/script.js', headers={'Accept-Encoding': 'gzip'})
+        etag, _ = response.get_etag()
+        self.assertTrue(etag.endswith('-gzip'))
+        response = self.client.get('/script.js', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.get_data())
+        self.assertEqual(200, self.client.get('/script.js', headers={'If-None-Match': f'"{etag}"'}).status_code)
@@ -1,12 +1,29 @@
 """Unit tests for the build algorithm."""
+import itertools
 import queue
+import random
 import unittest
 
 from rebuilder.builder import Builder, CubeState
+from rebuilder.planner import CUBE_COLORS, MAGAZINES, all_configurations
 from shared.enumerations import CubeColor
 from uart.command import Command
 
 
+def _built_stacks(messages) -> tuple[list[list[CubeColor]], int]:
+    """Replays the commands and returns the cubes stacked on the positions and the final rotation."""
+    stacks: list[list[CubeColor]] = [[], [], [], []]
+    rotation = 0
+    for message in messages:
+        if Command(message.cmd) == Command.ROTATE_GRID:
+            rotation = (rotation + message.data.rotate_grid.degrees // 90) % 4
+        elif Command(message.cmd) == Command.PLACE_CUBES:
+            place = message.data.place_cubes
+            for color, count in zip(CUBE_COLORS, [place.cubes_red, place.cubes_yellow, place.cubes_blue]):
+                stacks[(MAGAZINES.index(color) - rotation) % 4].extend([color] * count)
+    return stacks, rotation
+
+
 class TestBuildAlgorithm(unittest.TestCase):
     """Test class for the build algorithm."""
 
@@ -50,7 +67,7 @@ class TestBuildAlgorithm(unittest.TestCase):
         builder.rotate_grid(-5)
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         builder.rotate_grid(-4)
         self.assertTrue(uart_write.empty())
@@ -68,7 +85,7 @@ class TestBuildAlgorithm(unittest.TestCase):
         builder.rotate_grid(-1)
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         builder.rotate_grid(0)
         self.assertTrue(uart_write.empty())
@@ -86,7 +103,7 @@ class TestBuildAlgorithm(unittest.TestCase):
         builder.rotate_grid(3)
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         builder.rotate_grid(4)
         self.assertTrue(uart_write.empty())
@@ -154,11 +171,6 @@ class TestBuildAlgorithm(unittest.TestCase):
         self.assertEqual(message.data.place_cubes.cubes_yellow, 0)
         self.assertEqual(message.data.place_cubes.cubes_blue, 0)
 
-    def test_array_false(self):
-        self.assertFalse(Builder.array_false([True, True, True, True]))
-        self.assertFalse(Builder.array_false([False, True, False, False]))
-        self.assertTrue(Builder.array_false([False, False, False, False]))
-
     def test_match_with_config(self):
         builder = Builder(queue.Queue())
         matches, config = builder.match_with_config([CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE])
@@ -169,10 +181,6 @@ class TestBuildAlgorithm(unittest.TestCase):
         self.assertEqual([True, True, True, False], matches)
         self.assertEqual([CubeColor.NONE, CubeColor.NONE, CubeColor.NONE, CubeColor.RED], config)
 
-    def test_config_none(self):
-        self.assertEqual(True, Builder.config_none([CubeColor.NONE, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE]))
-        self.assertEqual(False, Builder.config_none([CubeColor.RED, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE]))
-
     def test_build_config_1(self):
         uart_write = queue.Queue()
         builder = Builder(uart_write)
@@ -313,7 +321,7 @@ class TestBuildAlgorithm(unittest.TestCase):
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.PLACE_CUBES)
@@ -323,7 +331,7 @@ class TestBuildAlgorithm(unittest.TestCase):
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.MOVE_LIFT)
@@ -372,7 +380,7 @@ class TestBuildAlgorithm(unittest.TestCase):
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.PLACE_CUBES)
@@ -396,7 +404,7 @@ class TestBuildAlgorithm(unittest.TestCase):
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.MOVE_LIFT)
@@ -474,7 +482,7 @@ class TestBuildAlgorithm(unittest.TestCase):
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
-        self.assertEqual(message.data.rotate_grid.degrees, 270)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
 
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.PLACE_CUBES)
@@ -499,3 +507,119 @@ class TestBuildAlgorithm(unittest.TestCase):
         message = uart_write.get(timeout=2.0)
         self.assertEqual(Command(message.cmd), Command.MOVE_LIFT)
         self.assertEqual(message.data.move_lift, 1)
+
+    def test_speculate_pre_rotation(self):
+        uart_write = queue.Queue()
+        builder = Builder(uart_write)
+        priors = {CubeColor.NONE: 0.2, CubeColor.RED: 0.6, CubeColor.YELLOW: 0.1, CubeColor.BLUE: 0.1}
+
+        builder.set_config(
+            [CubeColor.UNKNOWN, CubeColor.NONE, CubeColor.UNKNOWN, CubeColor.UNKNOWN, CubeColor.UNKNOWN,
+             CubeColor.NONE, CubeColor.UNKNOWN, CubeColor.UNKNOWN])
+        builder.speculate(priors)
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
+        self.assertEqual([CubeColor.BLUE, CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW], builder.pos)
+
+        builder.speculate(priors)
+        self.assertTrue(uart_write.empty())
+
+    def test_speculate_certain_cubes(self):
+        uart_write = queue.Queue()
+        builder = Builder(uart_write)
+
+        builder.set_config(
+            [CubeColor.RED, CubeColor.UNKNOWN, CubeColor.YELLOW, CubeColor.UNKNOWN, CubeColor.RED,
+             CubeColor.BLUE, CubeColor.UNKNOWN, CubeColor.UNKNOWN])
+        builder.speculate({})
+
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
+        self.assertEqual(message.data.rotate_grid.degrees, 90)
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.PLACE_CUBES)
+        self.assertEqual(message.data.place_cubes.cubes_red, 2)
+        self.assertEqual(message.data.place_cubes.cubes_yellow, 0)
+        self.assertEqual(message.data.place_cubes.cubes_blue, 0)
+        self.assertTrue(uart_write.empty())
+        self.assertEqual([CubeState.PLACED, CubeState.UNKNOWN, CubeState.UNKNOWN, CubeState.UNKNOWN,
+                          CubeState.PLACED, CubeState.UNKNOWN, CubeState.UNKNOWN, CubeState.UNKNOWN],
+                         builder.cube_states)
+
+    def test_speculate_rollback(self):
+        uart_write = queue.Queue()
+        builder = Builder(uart_write)
+        config = [CubeColor.YELLOW, CubeColor.NONE, CubeColor.BLUE, CubeColor.RED, CubeColor.YELLOW,
+                  CubeColor.NONE, CubeColor.NONE, CubeColor.BLUE]
+
+        builder.set_config(
+            [CubeColor.UNKNOWN, CubeColor.NONE, CubeColor.UNKNOWN, CubeColor.UNKNOWN, CubeColor.UNKNOWN,
+             CubeColor.NONE, CubeColor.UNKNOWN, CubeColor.UNKNOWN])
+        builder.speculate({CubeColor.RED: 0.9})
+        builder.set_config(
+            [CubeColor.YELLOW, CubeColor.NONE, CubeColor.BLUE, CubeColor.RED, CubeColor.YELLOW,
+             CubeColor.NONE, CubeColor.UNKNOWN, CubeColor.UNKNOWN])
+        builder.speculate({CubeColor.RED: 0.9})
+        builder.set_config(config.copy())
+        builder.build_planned()
+        builder.finish_build()
+
+        messages = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+        rotation = sum(msg.data.rotate_grid.degrees for msg in messages if Command(msg.cmd) == Command.ROTATE_GRID)
+        self.assertEqual(0, rotation % 360)
+        placed = [msg.data.place_cubes for msg in messages if Command(msg.cmd) == Command.PLACE_CUBES]
+        self.assertEqual(config.count(CubeColor.RED), sum(place.cubes_red for place in placed))
+        self.assertEqual(config.count(CubeColor.YELLOW), sum(place.cubes_yellow for place in placed))
+        self.assertEqual(config.count(CubeColor.BLUE), sum(place.cubes_blue for place in placed))
+        self.assertTrue(all(state == CubeState.PLACED for state in builder.cube_states))
+
+    def test_build_resolved(self):
+        uart_write = queue.Queue()
+        builder = Builder(uart_write)
+        builder.build_resolved({4: CubeColor.YELLOW, 1: CubeColor.NONE, 5: CubeColor.NONE})
+        self.assertTrue(uart_write.empty())
+
+        builder.build_resolved({0: CubeColor.YELLOW})
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
+        self.assertEqual(message.data.rotate_grid.degrees, 180)
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.PLACE_CUBES)
+        self.assertEqual(message.data.place_cubes.cubes_red, 0)
+        self.assertEqual(message.data.place_cubes.cubes_yellow, 2)
+        self.assertEqual(message.data.place_cubes.cubes_blue, 0)
+        self.assertTrue(uart_write.empty())
+
+        builder.build_resolved({0: CubeColor.RED, 2: CubeColor.BLUE})
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.ROTATE_GRID)
+        self.assertEqual(message.data.rotate_grid.degrees, -90)
+        message = uart_write.get(timeout=2.0)
+        self.assertEqual(Command(message.cmd), Command.PLACE_CUBES)
+        self.assertEqual(message.data.place_cubes.cubes_red, 0)
+        self.assertEqual(message.data.place_cubes.cubes_yellow, 0)
+        self.assertEqual(message.data.place_cubes.cubes_blue, 1)
+        self.assertTrue(uart_write.empty())
+
+    def test_build_resolved_orderings(self):
+        rng = random.Random(42)
+        for config in itertools.islice(all_configurations(), 3, None, 53):
+            for _ in range(5):
+                uart_write = queue.Queue()
+                builder = Builder(uart_write)
+                positions = list(range(8))
+                rng.shuffle(positions)
+                while positions:
+                    count = rng.randint(1, 3)
+                    builder.build_resolved({i: config[i] for i in positions[:count]})
+                    positions = positions[count:]
+                builder.finish_build()
+
+                messages = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+                stacks, rotation = _built_stacks(messages)
+                expected = [[color for color in (config[i], config[i + 4]) if color != CubeColor.NONE]
+                            for i in range(4)]
+                self.assertEqual(expected, stacks)
+                self.assertEqual(0, rotation)
+                self.assertTrue(all(state == CubeState.PLACED for state in builder.cube_states))
@@ -0,0 +1,31 @@
+"""Exhaustive regression tests of the build algorithm over all cube configurations."""
+import unittest
+
+from rebuilder.planner import all_configurations
+from rebuilder.simulator import BuildSimulator
+from shared.enumerations import CubeColor
+from . import builderbaseline
+
+
+class TestBuilderExhaustive(unittest.TestCase):
+    """Test class for the build algorithm over all cube configurations."""
+
+    def test_all_configurations(self):
+        baseline = builderbaseline.load()
+        simulator = BuildSimulator()
+        regressions = []
+        for config in all_configurations():
+            key = builderbaseline.config_key(config)
+            for mode, build_doubles_first in enumerate((False, True)):
+                result = builderbaseline.simulate_build(simulator, config, build_doubles_first)
+                self.assertEqual([], result.errors, key)
+                self.assertEqual(config, result.config, key)
+                self.assertEqual(sum(1 for color in config if color != CubeColor.NONE),
+                                 sum(len(stack) for stack in result.stacks), key)
+                self.assertEqual(0, result.rotation, key)
+
+                commands, degrees = baseline[key][2 * mode:2 * mode + 2]
+                if result.commands > commands or result.degrees > degrees:
+                    regressions.append(f'{key} (doubles first: {build_doubles_first}) - commands: '
+                                       f'{commands} -> {result.commands}, degrees: {degrees} -> {result.degrees}')
+        self.assertEqual([], regressions[:10], f'{len(regressions)} regressions against the baseline')
@@ -0,0 +1,76 @@
+"""Unit tests for the tracking of the build plan execution."""
+import queue
+import threading
+import time
+import unittest
+
+from rebuilder.builder import Builder
+from rebuilder.buildplan import BuildPlan
+from rebuilder.optimizer import PlanOptimizer
+from rebuilder.simulator import MachineTimings
+from shared.enumerations import CubeColor
+from uart.command import Command, MoveLift
+from uart.commandbuilder import CommandBuilder
+
+
+class TestBuildPlan(unittest.TestCase):
+    """Test class for the build plan."""
+
+    def test_complete(self):
+        build_plan = BuildPlan(MachineTimings(placement=1.0, lift=3.0))
+        rotate = build_plan.add(CommandBuilder.rotate_grid(90))
+        place_1 = build_plan.add(CommandBuilder.place_cubes(1, 0, 0))
+        place_2 = build_plan.add(CommandBuilder.place_cubes(0, 1, 0))
+        lift = build_plan.add(CommandBuilder.move_lift(MoveLift.MOVE_DOWN))
+        self.assertEqual(4, build_plan.steps_total)
+        self.assertEqual(0, build_plan.steps_finished)
+        self.assertAlmostEqual(1.0, place_1.predicted)
+        self.assertAlmostEqual(3.0, lift.predicted)
+
+        self.assertIsNone(build_plan.complete(Command.PRIME_MAGAZINE))
+        self.assertIs(rotate, build_plan.complete(Command.ROTATE_GRID))
+        self.assertIsNone(build_plan.complete(Command.ROTATE_GRID))
+        self.assertEqual(rotate.sent, rotate.started)
+        self.assertIs(place_1, build_plan.complete(Command.PLACE_CUBES, success=False))
+        self.assertFalse(place_1.success)
+        self.assertEqual(rotate.finished, place_1.started)
+        self.assertEqual(2, build_plan.steps_finished)
+        self.assertEqual((2, 4), build_plan.progress)
+        self.assertFalse(build_plan.is_finished)
+        self.assertEqual([Command.PLACE_CUBES, Command.MOVE_LIFT],
+                         [Command(message.cmd) for message in build_plan.pending()])
+
+        self.assertIs(place_2, build_plan.complete(Command.PLACE_CUBES))
+        self.assertIs(lift, build_plan.complete(Command.MOVE_LIFT))
+        self.assertTrue(build_plan.is_finished)
+        self.assertGreaterEqual(lift.duration, 0.0)
+
+    def test_wait(self):
+        build_plan = BuildPlan()
+        build_plan.add(CommandBuilder.rotate_grid(90))
+        self.assertFalse(build_plan.wait(timeout=0.01))
+
+        timer = threading.Timer(0.05, build_plan.complete, [Command.ROTATE_GRID])
+        timer.start()
+        start = time.monotonic()
+        self.assertTrue(build_plan.wait(timeout=2.0))
+        self.assertLess(time.monotonic() - start, 1.0)
+        timer.join()
+
+    def test_builder_build_plan(self):
+        uart_write = queue.Queue()
+        builder = Builder(uart_write, PlanOptimizer())
+        builder.set_config(
+            [CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED, CubeColor.RED, CubeColor.YELLOW,
+             CubeColor.NONE, CubeColor.RED])
+        build_plan = builder.build_planned()
+        self.assertIs(build_plan, builder.finish_build())
+        self.assertEqual(uart_write.qsize(), build_plan.steps_total)
+
+        for _ in range(uart_write.qsize()):
+            self.assertIsNotNone(build_plan.complete(Command(uart_write.get_nowait().cmd)))
+        self.assertTrue(build_plan.is_finished)
+
+        builder.reset()
+        self.assertIsNot(build_plan, builder.build_plan)
+        self.assertEqual(0, builder.build_plan.steps_total)
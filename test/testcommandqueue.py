@@ -0,0 +1,59 @@
+"""Unit tests for the prioritized command queue."""
+import queue
+import time
+import unittest
+
+from uart.command import Command, MoveLift
+from uart.commandbuilder import CommandBuilder
+from uart.commandqueue import CommandQueue, Lane
+
+
+class TestCommandQueue(unittest.TestCase):
+    """Test class for the prioritized command queue."""
+
+    def test_lane(self):
+        self.assertEqual(Lane.CONTROL, CommandQueue.lane(CommandBuilder.other_command(Command.PAUSE_BUILD)))
+        self.assertEqual(Lane.CONTROL, CommandQueue.lane(CommandBuilder.other_command(Command.RESUME_BUILD)))
+        self.assertEqual(Lane.CONTROL, CommandQueue.lane(CommandBuilder.other_command(Command.RESET_WERNI)))
+        self.assertEqual(Lane.TELEMETRY, CommandQueue.lane(CommandBuilder.other_command(Command.GET_STATE)))
+        self.assertEqual(Lane.BUILD, CommandQueue.lane(CommandBuilder.rotate_grid(90)))
+        self.assertEqual(Lane.BUILD, CommandQueue.lane(CommandBuilder.place_cubes(1, 0, 0)))
+        self.assertEqual(Lane.BUILD, CommandQueue.lane(CommandBuilder.move_lift(MoveLift.MOVE_DOWN)))
+        self.assertEqual(Lane.BUILD, CommandQueue.lane('invalid'))
+
+    def test_priority(self):
+        command_queue = CommandQueue()
+        for _ in range(10):
+            command_queue.put(CommandBuilder.rotate_grid(90))
+        command_queue.put(CommandBuilder.other_command(Command.GET_STATE))
+        command_queue.put(CommandBuilder.other_command(Command.PAUSE_BUILD))
+        command_queue.put(CommandBuilder.place_cubes(1, 0, 0))
+
+        self.assertEqual(13, command_queue.qsize())
+        self.assertEqual(Command.PAUSE_BUILD, Command(command_queue.get_nowait().cmd))
+        self.assertEqual(Command.GET_STATE, Command(command_queue.get_nowait().cmd))
+        for _ in range(10):
+            self.assertEqual(Command.ROTATE_GRID, Command(command_queue.get_nowait().cmd))
+        self.assertEqual(Command.PLACE_CUBES, Command(command_queue.get_nowait().cmd))
+        self.assertTrue(command_queue.empty())
+        self.assertRaises(queue.Empty, command_queue.get, timeout=0.01)
+
+    def test_metrics(self):
+        command_queue = CommandQueue()
+        command_queue.put(CommandBuilder.rotate_grid(90))
+        command_queue.put(CommandBuilder.place_cubes(1, 0, 0))
+        time.sleep(0.05)
+        command_queue.put(CommandBuilder.other_command(Command.PAUSE_BUILD))
+        while not command_queue.empty():
+            command_queue.get_nowait()
+
+        metrics = command_queue.metrics()
+        self.assertEqual(1, metrics[Lane.CONTROL].count)
+        self.assertEqual(0, metrics[Lane.TELEMETRY].count)
+        self.assertEqual(2, metrics[Lane.BUILD].count)
+        self.assertLess(metrics[Lane.CONTROL].max_delay, 0.05)
+        self.assertGreaterEqual(metrics[Lane.BUILD].mean_delay, 0.05)
+
+        command_queue.reset_metrics()
+        self.assertEqual(0, command_queue.metrics()[Lane.BUILD].count)
+        self.assertEqual(0.0, command_queue.metrics()[Lane.BUILD].mean_delay)
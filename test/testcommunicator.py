@@ -0,0 +1,81 @@
+"""Unit tests for the UART communicator."""
+import queue
+import time
+import unittest
+
+from shared.data import AppConfiguration
+from uart.command import Command, DataUnion
+from uart.commandbuilder import CommandBuilder
+from uart.communicator import FRAME_SIZE, PREAMBLE, UartCommunicator
+from .virtualserial import VirtualSerialPort
+
+
+def _exec_finished(cmd: Command) -> bytes:
+    """Creates the frame of an execution finished command."""
+    data = DataUnion()
+    data.exec_finished.cmd = cmd.value
+    return PREAMBLE + bytes(CommandBuilder.other_command(Command.EXECUTION_FINISHED, data))
+
+
+class TestUartCommunicator(unittest.TestCase):
+    """Test class for the UART communicator."""
+
+    def setUp(self):
+        self.port = VirtualSerialPort()
+        app_config = AppConfiguration()
+        app_config.serial_read = self.port.name
+        app_config.serial_write = self.port.name
+        self.read_queue = queue.Queue()
+        self.communicator = UartCommunicator(app_config, self.read_queue, queue.Queue())
+        self.communicator.start()
+        # Opening the port flushes its input, so the frames are written after the reader connected
+        deadline = time.monotonic() + 2.0
+        while not self.communicator.health[0].connected and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def tearDown(self):
+        self.communicator.halt()
+        self.communicator.shutdown()
+        self.port.close()
+
+    def test_frame_size(self):
+        self.assertEqual(23, FRAME_SIZE)
+        self.assertEqual(FRAME_SIZE, len(_exec_finished(Command.ROTATE_GRID)))
+
+    def test_split_frame(self):
+        frame = _exec_finished(Command.ROTATE_GRID)
+        self.port.write(frame[:3])
+        time.sleep(0.05)
+        self.port.write(frame[3:10])
+        time.sleep(0.05)
+        self.assertTrue(self.read_queue.empty())
+        self.port.write(frame[10:])
+
+        message = self.read_queue.get(timeout=1.0)
+        self.assertEqual(Command.EXECUTION_FINISHED, Command(message.cmd))
+        self.assertEqual(Command.ROTATE_GRID, Command(message.data.exec_finished.cmd))
+
+    def test_multiple_frames(self):
+        commands = [Command.ROTATE_GRID, Command.PLACE_CUBES, Command.MOVE_LIFT]
+        self.port.write(b''.join(_exec_finished(cmd) for cmd in commands))
+
+        for cmd in commands:
+            message = self.read_queue.get(timeout=1.0)
+            self.assertEqual(cmd, Command(message.data.exec_finished.cmd))
+        self.assertTrue(self.read_queue.empty())
+
+    def test_garbage_between_frames(self):
+        self.port.write(b'\x00AA' + _exec_finished(Command.PLACE_CUBES))
+        self.port.write(b'AAA\xff' + _exec_finished(Command.MOVE_LIFT))
+
+        message = self.read_queue.get(timeout=1.0)
+        self.assertEqual(Command.PLACE_CUBES, Command(message.data.exec_finished.cmd))
+        message = self.read_queue.get(timeout=1.0)
+        self.assertEqual(Command.MOVE_LIFT, Command(message.data.exec_finished.cmd))
+
+    def test_halt(self):
+        time.sleep(0.1)
+        start = time.perf_counter()
+        self.communicator.halt()
+        self.communicator.shutdown()
+        self.assertLess(time.perf_counter() - start, 0.5)
@@ -0,0 +1,73 @@
+"""Unit tests for the in-memory store of the configuration file."""
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from shared.configstore import ConfigStore
+
+
+class TestConfigStore(unittest.TestCase):
+    """Test class for the configuration store."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.temp_dir.name, 'config.json')
+        with open(self.path, 'w', encoding='utf-8') as config_file:
+            json.dump({'app': {'confidence': 25}, 'api': {'team_nr': '03'}}, config_file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read(self):
+        with open(self.path, 'r', encoding='utf-8') as config_file:
+            return json.load(config_file)
+
+    def test_load(self):
+        config_store = ConfigStore(self.path)
+        self.assertEqual({}, config_store.get('app')[0])
+        self.assertEqual('03', config_store.load()['api']['team_nr'])
+        settings, etag = config_store.get('app')
+        self.assertEqual({'confidence': 25}, settings)
+        self.assertEqual(config_store.etag, etag)
+        settings['confidence'] = 50
+        self.assertEqual(25, config_store.get('app')[0]['confidence'])
+
+    def test_update(self):
+        config_store = ConfigStore(self.path, write_delay=60.0)
+        config_store.load()
+        etag = config_store.etag
+        version = config_store.version
+
+        new_etag = config_store.update('app', {'confidence': 40}, etag)
+        self.assertIsNotNone(new_etag)
+        self.assertNotEqual(etag, new_etag)
+        self.assertEqual(version + 1, config_store.version)
+        self.assertIsNone(config_store.update('app', {'confidence': 50}, etag))
+        self.assertEqual(40, config_store.get('app')[0]['confidence'])
+        self.assertEqual(new_etag, config_store.update('app', {'confidence': 40}))
+
+        self.assertEqual(25, self._read()['app']['confidence'])
+        config_store.close()
+        self.assertEqual({'app': {'confidence': 40}, 'api': {'team_nr': '03'}}, self._read())
+        self.assertFalse(os.path.exists(f'{self.path}.tmp'))
+
+    def test_write_behind(self):
+        config_store = ConfigStore(self.path, write_delay=0.05)
+        config_store.load()
+        config_store.update('app', {'confidence': 30})
+        config_store.update('app', {'confidence': 35})
+        deadline = time.monotonic() + 2.0
+        while self._read()['app']['confidence'] != 35 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(35, self._read()['app']['confidence'])
+
+    def test_listener(self):
+        config_store = ConfigStore(self.path, write_delay=60.0)
+        changes = []
+        config_store.add_listener(lambda section, data: changes.append((section, data)))
+        config_store.update('app', {'confidence': 30})
+        config_store.update('app', {'confidence': 35}, 'outdated')
+        self.assertEqual([('app', {'confidence': 30})], changes)
+        config_store.close()
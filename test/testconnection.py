@@ -0,0 +1,70 @@
+"""Unit tests for the persistent serial connection."""
+import unittest
+
+from uart.connection import BACKOFF_INITIAL, BACKOFF_MAX, SerialConnection
+from .virtualserial import VirtualSerialPort
+
+
+class TestSerialConnection(unittest.TestCase):
+    """Test class for the persistent serial connection."""
+
+    def test_read_write(self):
+        port = VirtualSerialPort(timeout=1.0)
+        connection = SerialConnection(port.name, 115200, 0.1)
+        try:
+            self.assertEqual(b'', connection.read())
+            port.write(b'hello')
+            data = connection.read()
+            while len(data) < 5:
+                data += connection.read()
+            self.assertEqual(b'hello', data)
+            self.assertTrue(connection.write(b'world'))
+            self.assertEqual(b'world', port.read(5))
+
+            health = connection.health
+            self.assertTrue(health.connected)
+            self.assertGreater(health.uptime, 0.0)
+            self.assertEqual(0, health.reconnects)
+            self.assertEqual('', health.last_error)
+        finally:
+            connection.close()
+            port.close()
+        self.assertFalse(connection.health.connected)
+        self.assertEqual(0.0, connection.health.uptime)
+
+    def test_backoff(self):
+        connection = SerialConnection('/dev/nonexistent-uart', 115200, 0.01)
+        self.assertFalse(connection.write(b'data'))
+        self.assertEqual(BACKOFF_INITIAL, connection.backoff)
+
+        for _ in range(50):
+            self.assertEqual(b'', connection.read())
+        self.assertGreater(connection.backoff, BACKOFF_INITIAL)
+        self.assertLessEqual(connection.backoff, BACKOFF_MAX)
+
+        health = connection.health
+        self.assertFalse(health.connected)
+        self.assertGreater(health.errors, 1)
+        self.assertEqual(0, health.reconnects)
+        self.assertIn('nonexistent-uart', health.last_error)
+
+    def test_reconnect(self):
+        port = VirtualSerialPort(timeout=1.0)
+        connection = SerialConnection(port.name, 115200, 0.1)
+        try:
+            self.assertTrue(connection.write(b'first'))
+            self.assertEqual(b'first', port.read(5))
+
+            # Simulate a fault of the underlying connection
+            connection._fail(connection._serial, OSError('simulated fault'))  # pylint: disable=protected-access
+            self.assertFalse(connection.health.connected)
+            self.assertEqual('simulated fault', connection.health.last_error)
+
+            while not connection.write(b'second'):
+                pass
+            self.assertEqual(b'second', port.read(6))
+            self.assertEqual(1, connection.health.reconnects)
+            self.assertLessEqual(connection.backoff, BACKOFF_INITIAL)
+        finally:
+            connection.close()
+            port.close()
@@ -0,0 +1,174 @@
+"""Unit tests for the Cube API client."""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from shared.data import AppConfiguration
+from web.api import CubeApi
+from .cubeapiserver import CubeApiServer, CubeApiSettings
+
+
+class TestCubeApi(unittest.TestCase):
+    """Test class for the outbox of the Cube API client."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.outbox_path = os.path.join(self.temp_dir.name, 'outbox.json')
+        self.app_config = AppConfiguration()
+        self.app_config.api_address = '127.0.0.1:9'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _read(self):
+        with open(self.outbox_path, 'r', encoding='utf-8') as outbox_file:
+            return json.load(outbox_file)
+
+    def test_outbox_survives_restart(self):
+        cube_api = CubeApi(self.app_config, self.outbox_path)
+        cube_api.start()
+        cube_api.submit_config({'1': 'red'}, datetime(2024, 5, 1, 12, 0, 0))
+        cube_api.submit_end()
+        time.sleep(0.05)
+        cube_api.shutdown()
+        self.assertEqual(['/cubes/team03/config', '/cubes/team03/end'], [entry['path'] for entry in self._read()])
+        self.assertEqual({'time': '2024-05-01T12:00:00', 'config': {'1': 'red'}}, self._read()[0]['data'])
+
+        cube_api = CubeApi(self.app_config, self.outbox_path)
+        cube_api.start()
+        self.assertEqual(['/cubes/team03/config', '/cubes/team03/end'], [entry.path for entry in cube_api.outbox])
+        cube_api.shutdown()
+
+    def test_earlier_runs_dropped(self):
+        now = time.time()
+        with open(self.outbox_path, 'w', encoding='utf-8') as outbox_file:
+            json.dump([{'path': '/cubes/team03/end', 'data': None, 'created': now - 60.0, 'run': now - 90.0},
+                       {'path': '/cubes/team03/end', 'data': None, 'created': now, 'run': now - 30.0}], outbox_file)
+
+        cube_api = CubeApi(self.app_config, self.outbox_path)
+        cube_api.start()
+        self.assertEqual(1, len(cube_api.outbox))
+        cube_api.shutdown()
+        self.assertEqual([now], [entry['created'] for entry in self._read()])
+
+    def test_invalid_outbox(self):
+        with open(self.outbox_path, 'w', encoding='utf-8') as outbox_file:
+            outbox_file.write('{')
+
+        cube_api = CubeApi(self.app_config, self.outbox_path)
+        cube_api.start()
+        self.assertEqual([], cube_api.outbox)
+        cube_api.shutdown()
+
+    def test_delivery_not_blocking(self):
+        cube_api = CubeApi(self.app_config, self.outbox_path)
+        cube_api.start()
+        cube_api.submit_end()
+        started = threading.Event()
+        cube_api.submit(lambda: started.set() or True)
+        self.assertTrue(started.wait(2.0))
+        self.assertEqual(1, len(cube_api.outbox))
+        cube_api.shutdown()
+
+    def test_start_run_drops_previous_run(self):
+        cube_api = CubeApi(self.app_config, self.outbox_path)
+        cube_api.start()
+        cube_api.submit_end()
+        cube_api.start_run()
+        self.assertEqual([], cube_api.outbox)
+        cube_api.submit_end()
+        self.assertEqual(1, len(cube_api.outbox))
+        cube_api.shutdown()
+        self.assertEqual([cube_api.outbox[0].run], [entry['run'] for entry in self._read()])
+
+
+class TestCubeApiIntegration(unittest.TestCase):
+    """Test class for the Cube API client with the local stand-in of the Cube API."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.server = CubeApiServer(CubeApiSettings(latency=0.02, token='secret', seed=1))
+        self.server.start()
+        self.app_config = AppConfiguration()
+        self.app_config.api_address = self.server.address
+        self.app_config.api_token = 'secret'
+
+    def tearDown(self):
+        self.server.stop()
+        self.temp_dir.cleanup()
+
+    def _cube_api(self):
+        cube_api = CubeApi(self.app_config, os.path.join(self.temp_dir.name, 'outbox.json'))
+        cube_api.start()
+        return cube_api
+
+    @staticmethod
+    def _wait_for_outbox(cube_api, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while cube_api.outbox and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_run(self):
+        cube_api = self._cube_api()
+        self.assertTrue(cube_api.get_availability())
+        self.assertTrue(cube_api.post_start())
+        self.assertGreaterEqual(cube_api.start_latency, 0.02)
+
+        completed = time.perf_counter()
+        cube_api.submit_config({'1': 'red', '2': ''}, datetime(2024, 5, 1, 12, 0, 0))
+        cube_api.submit_end()
+        self._wait_for_outbox(cube_api)
+        cube_api.shutdown()
+
+        config_request = next(request for request in self.server.requests if request.path.endswith('/config'))
+        self.assertEqual(200, config_request.status)
+        self.assertLess(config_request.received - completed, 1.0)
+        self.assertEqual({'1': 'red', '2': ''}, self.server.runs['03'].config['config'])
+        self.assertGreater(self.server.runs['03'].end, 0.0)
+        self.assertEqual(2, len(cube_api.delivery_latencies))
+        self.assertGreaterEqual(min(cube_api.delivery_latencies), 0.02)
+
+    def test_errors_retried(self):
+        self.server.settings.error_rate = 0.5
+        cube_api = self._cube_api()
+        while not cube_api.post_start():
+            pass
+        for _ in range(3):
+            cube_api.submit_config({'1': 'blue'}, datetime.now())
+        self._wait_for_outbox(cube_api, timeout=20.0)
+        cube_api.shutdown()
+
+        statuses = [request.status for request in self.server.requests if request.path.endswith('/config')]
+        self.assertEqual(3, statuses.count(200))
+        self.assertIn(503, statuses)
+
+    def test_previous_run_not_sent_after_start(self):
+        self.server.settings.error_rate = 1.0
+        cube_api = self._cube_api()
+        cube_api.submit_end()
+        time.sleep(0.1)
+        self.server.settings.error_rate = 0.0
+        cube_api.start_run()
+        cube_api.submit_config({'1': 'red'}, datetime.now())
+        self._wait_for_outbox(cube_api)
+        cube_api.shutdown()
+
+        received = [request.path.rsplit('/', 1)[1] for request in self.server.requests if request.status == 200]
+        self.assertEqual(['start', 'config'], received)
+        self.assertEqual(0.0, self.server.runs['03'].end)
+        self.assertIsNotNone(cube_api.start_latency)
+
+    def test_unauthorized(self):
+        self.app_config.api_token = 'wrong'
+        cube_api = self._cube_api()
+        self.assertFalse(cube_api.post_start())
+        self.assertIsNone(cube_api.start_latency)
+        cube_api.submit_end()
+        self._wait_for_outbox(cube_api)
+        cube_api.shutdown()
+        self.assertEqual([], cube_api.outbox)
+        self.assertEqual([401, 401], [request.status for request in self.server.requests])
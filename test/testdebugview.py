@@ -0,0 +1,61 @@
+"""Unit tests for the live debug view of the cube image recognition."""
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from shared.enumerations import CubeColor
+from video.debug import DebugView
+from video.recognition import FRAME_CROP_H, FRAME_CROP_W, CubeRecognition
+from .fixtures import cube_frame
+
+
+class TestDebugView(unittest.TestCase):
+    """Test class for the debug view."""
+
+    def test_analyze_frame(self):
+        details = CubeRecognition.analyze_frame(cube_frame())
+        self.assertEqual(0, details.offset)
+        self.assertIsNotNone(details.contour_cube)
+        self.assertEqual([CubeColor.BLUE], [color for color, _, _ in details.contour_map])
+        expected = [CubeColor.BLUE, CubeColor.BLUE] + [CubeColor.UNKNOWN] * 4 + [CubeColor.BLUE, CubeColor.BLUE]
+        self.assertEqual(expected, CubeRecognition.process_frame(cube_frame()))
+        self.assertEqual(-1, CubeRecognition.analyze_frame(np.zeros_like(cube_frame())).offset)
+
+    def test_annotate(self):
+        frame = cube_frame()
+        image = DebugView.annotate(frame, {'1': {CubeColor.BLUE: 12, CubeColor.NONE: 2}})
+        self.assertEqual(frame.shape, image.shape)
+        self.assertFalse(np.array_equal(frame, image))
+        self.assertTrue(np.array_equal(cube_frame(), frame))
+
+        image = cv2.imdecode(np.frombuffer(DebugView.encode(image, 0.5, 70), np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual((FRAME_CROP_H // 2, FRAME_CROP_W // 2, 3), image.shape)
+
+    def test_placeholder(self):
+        image = cv2.imdecode(np.frombuffer(DebugView().placeholder, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual((FRAME_CROP_H // 2, FRAME_CROP_W // 2, 3), image.shape)
+
+    def test_inactive(self):
+        debug_view = DebugView()
+        debug_view.put_frame(cube_frame(), {})
+        self.assertFalse(debug_view.active)
+        self.assertEqual((b'', 0), debug_view.wait_for_frame(0, timeout=0.01))
+
+    def test_subscribe(self):
+        debug_view = DebugView(interval=0.01)
+        debug_view.subscribe()
+        self.assertTrue(debug_view.active)
+        debug_view.put_frame(cube_frame(), {})
+        jpeg, version = debug_view.wait_for_frame(0, timeout=2.0)
+        self.assertEqual(1, version)
+        self.assertTrue(jpeg.startswith(b'\xff\xd8'))
+
+        debug_view.unsubscribe()
+        deadline = time.monotonic() + 2.0
+        while debug_view._thread is not None and time.monotonic() < deadline:  # pylint: disable=protected-access
+            time.sleep(0.01)
+        self.assertIsNone(debug_view._thread)  # pylint: disable=protected-access
+        debug_view.put_frame(cube_frame(), {})
+        self.assertEqual(1, debug_view.wait_for_frame(1, timeout=0.05)[1])
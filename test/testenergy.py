@@ -0,0 +1,102 @@
+"""Unit tests for the energy model."""
+import itertools
+import os
+import tempfile
+import unittest
+
+from rebuilder.energy import EnergyModel, LinearFit
+from rebuilder.planner import BuildPlanner, all_configurations
+from uart.command import MoveLift
+from uart.commandbuilder import CommandBuilder
+
+
+class TestEnergyModel(unittest.TestCase):
+    """Test class for the energy model."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, 'energy.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_linear_fit(self):
+        fit = LinearFit()
+        self.assertIsNone(fit.fit())
+        fit.add(90, 5.0)
+        fit.add(90, 5.0)
+        self.assertIsNone(fit.fit())
+        fit.add(180, 8.0)
+        fit.add(270, 11.0)
+        intercept, slope = fit.fit()
+        self.assertAlmostEqual(2.0, intercept)
+        self.assertAlmostEqual(1 / 30, slope)
+
+    def test_cost_model(self):
+        energy_model = EnergyModel(self.path)
+        for degrees in (90, 180, -90, 90):
+            energy_model.record(CommandBuilder.rotate_grid(degrees), 10.0 + abs(degrees) * 0.5)
+        for cubes in ((1, 0, 0), (2, 1, 0), (0, 0, 1)):
+            energy_model.record(CommandBuilder.place_cubes(*cubes), 3.0 + (2.0 if 2 in cubes else 0.0))
+        energy_model.record(CommandBuilder.move_lift(MoveLift.MOVE_DOWN), 100.0)
+        self.assertIsNone(energy_model.cost_model())
+
+        energy_model.record(CommandBuilder.rotate_grid(180), 100.0)
+        cost_model = energy_model.cost_model()
+        self.assertIsNotNone(cost_model)
+        self.assertAlmostEqual(10.0, cost_model.rotation)
+        self.assertAlmostEqual(0.5, cost_model.rotation_per_degree)
+        self.assertAlmostEqual(3.0, cost_model.placement)
+        self.assertAlmostEqual(2.0, cost_model.double_placement)
+
+    def test_cost_model_same_degrees(self):
+        energy_model = EnergyModel(self.path)
+        for degrees, energy in ((90, 50.0), (-90, 54.0), (90, 52.0), (90, 50.0), (-90, 54.0)):
+            energy_model.record(CommandBuilder.rotate_grid(degrees), energy)
+        for _ in range(3):
+            energy_model.record(CommandBuilder.place_cubes(1, 0, 0), 3.0)
+        cost_model = energy_model.cost_model()
+        self.assertIsNotNone(cost_model)
+        self.assertAlmostEqual(52.0, cost_model.rotation)
+        self.assertEqual(0.0, cost_model.rotation_per_degree)
+
+    def test_persistence(self):
+        energy_model = EnergyModel(self.path)
+        energy_model.load()
+        energy_model.record(CommandBuilder.rotate_grid(90), 10.0)
+        energy_model.record_run('efficiency', 0.02, 30.0)
+        energy_model.record_run('efficiency', 0.04, 40.0)
+        energy_model.record_run('default', 0.05, 20.0)
+        energy_model.save()
+
+        loaded = EnergyModel(self.path)
+        loaded.load()
+        self.assertEqual(2, loaded.modes['efficiency'].runs)
+        self.assertAlmostEqual(0.03, loaded.modes['efficiency'].mean_energy)
+        self.assertAlmostEqual(35.0, loaded.modes['efficiency'].mean_duration)
+        self.assertAlmostEqual(0.05, loaded.modes['default'].mean_energy)
+
+    def test_invalid_file(self):
+        for content in ('[]', '{"modes": []}', '{"rotation": {"unknown": 1}}'):
+            with open(self.path, 'w', encoding='utf-8') as energy_file:
+                energy_file.write(content)
+            energy_model = EnergyModel(self.path)
+            energy_model.load()
+            self.assertEqual({}, energy_model.modes)
+
+    def test_energy_planning(self):
+        energy_model = EnergyModel(self.path)
+        for degrees in (90, 180, -90) * 2:
+            energy_model.record(CommandBuilder.rotate_grid(degrees), 20.0 + abs(degrees) * 0.2)
+        for _ in range(3):
+            energy_model.record(CommandBuilder.place_cubes(1, 0, 0), 1.0)
+
+        # Rotations use much more energy than placements, the plan avoids them where possible
+        energy_planner = BuildPlanner(energy_model.cost_model())
+        time_planner = BuildPlanner()
+        for config in itertools.islice(all_configurations(), 7, None, 211):
+            energy_plan = energy_planner.plan(config)
+            time_plan = time_planner.plan(config)
+            self.assertLessEqual(energy_planner.plan_cost(energy_plan), energy_planner.plan_cost(time_plan) + 1e-9)
+            self.assertLessEqual(sum(1 for step in energy_plan if step.rotation),
+                                 sum(1 for step in time_plan if step.rotation))
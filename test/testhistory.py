@@ -0,0 +1,64 @@
+"""Unit tests for the history of the runs."""
+import os
+import tempfile
+import unittest
+
+from rebuilder.history import RunHistory, RunPhase
+from .fixtures import history_run
+
+
+class TestRunHistory(unittest.TestCase):
+    """Test class for the run history."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.temp_dir.name, 'history.db')
+        self.run_history = RunHistory(self.path)
+        self.assertTrue(self.run_history.open())
+
+    def tearDown(self):
+        self.run_history.close()
+        self.temp_dir.cleanup()
+
+    def test_record(self):
+        self.run_history.begin()
+        self.run_history.record(RunPhase.START)
+        self.run_history.record(RunPhase.POSITION, '2=blue')
+        self.run_history.record(RunPhase.CONFIG)
+        self.run_history.record(RunPhase.LIFT_DOWN)
+        run = self.run_history.finish('fast', {'1': 'red'}, 0.25, 0.1, 1)
+        self.assertEqual([RunPhase.INIT, RunPhase.START, RunPhase.POSITION, RunPhase.CONFIG, RunPhase.LIFT_DOWN],
+                         [event.phase for event in run.events])
+        self.assertGreaterEqual(run.duration_total, run.duration_config)
+        self.assertEqual([], self.run_history.finish('fast', {}, 0.0, None, 0).events)
+
+        self.run_history.save(run)
+        self.run_history.close()
+        self.run_history.open()
+        runs = self.run_history.runs()
+        self.assertEqual(1, len(runs))
+        self.assertEqual(('fast', {'1': 'red'}, 0.25, 0.1, 1),
+                         (runs[0]['mode'], runs[0]['config'], runs[0]['energy'], runs[0]['api_start_latency'],
+                          runs[0]['api_pending']))
+        self.assertEqual(run.events, self.run_history.events(runs[0]['id']))
+
+    def test_durations(self):
+        run = history_run('default', 10.0, 40.0, 100.0)
+        self.assertEqual((30.0, 60.0, 90.0), (run.duration_config, run.duration_build, run.duration_total))
+        run.events = run.events[:3]
+        self.assertEqual((None, None, None), (run.duration_config, run.duration_build, run.duration_total))
+
+    def test_summary(self):
+        for i in range(1, 21):
+            self.run_history.save(history_run('fast' if i % 2 == 0 else 'default', 0.0, float(i), 100.0))
+        summary = self.run_history.summary()
+        self.assertEqual(20, summary['count'])
+        self.assertAlmostEqual(10.5, summary['duration_config']['p50'])
+        self.assertAlmostEqual(19.05, summary['duration_config']['p95'])
+        self.assertEqual((1.0, 20.0), (summary['duration_config']['min'], summary['duration_config']['max']))
+        self.assertEqual(100.0, summary['duration_total']['p95'])
+
+        summary = self.run_history.summary(limit=3, mode='fast')
+        self.assertEqual([20.0, 18.0, 16.0], [run['duration_config'] for run in summary['runs']])
+        self.assertEqual(18.0, summary['duration_config']['p50'])
+        self.assertIsNone(self.run_history.summary(mode='efficiency')['duration_config'])
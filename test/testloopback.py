@@ -0,0 +1,103 @@
+"""Unit tests for the UART communication with the simulated electronics controller."""
+import queue
+import time
+import unittest
+
+from serial import Serial
+
+from rebuilder.builder import Builder
+from shared.data import AppConfiguration
+from shared.enumerations import CubeColor
+from uart.command import Command, Message
+from uart.commandbuilder import CommandBuilder
+from uart.commandqueue import CommandQueue
+from uart.communicator import FRAME_SIZE, PREAMBLE, UartCommunicator
+from .electronicssimulator import ElectronicsSimulator, SimulatorSettings
+from .virtualserial import VirtualSerialPort
+
+
+class TestLoopback(unittest.TestCase):
+    """Test class for the UART communication with the simulated electronics controller."""
+
+    def setUp(self):
+        self.port = VirtualSerialPort(timeout=0.1)
+        settings = SimulatorSettings()
+        settings.delays = {cmd: 0.01 for cmd in settings.delays}
+        self.simulator = ElectronicsSimulator(self.port, settings=settings)
+        self.simulator.start()
+
+    def tearDown(self):
+        self.simulator.stop()
+        self.port.close()
+
+    def test_build(self):
+        app_config = AppConfiguration()
+        app_config.serial_read = self.port.name
+        app_config.serial_write = self.port.name
+        read_queue = queue.Queue()
+        write_queue = CommandQueue()
+        communicator = UartCommunicator(app_config, read_queue, write_queue)
+        communicator.start()
+
+        builder = Builder(write_queue)
+        builder.set_config(
+            [CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED, CubeColor.NONE, CubeColor.NONE,
+             CubeColor.NONE, CubeColor.NONE])
+        builder.build()
+        builder.finish_build()
+
+        finished = []
+        try:
+            while Command.MOVE_LIFT not in finished:
+                message = read_queue.get(timeout=5.0)
+                self.assertEqual(Command.EXECUTION_FINISHED, Command(message.cmd))
+                finished.append(Command(message.data.exec_finished.cmd))
+        finally:
+            communicator.halt()
+            communicator.shutdown()
+
+        expected = [Command.ROTATE_GRID, Command.PLACE_CUBES, Command.ROTATE_GRID, Command.PLACE_CUBES,
+                    Command.ROTATE_GRID, Command.MOVE_LIFT]
+        self.assertEqual(expected, finished)
+        self.assertEqual(expected, self.simulator.executed)
+        self.assertEqual(len(expected), len(communicator.ack_latencies))
+
+    def test_crc_error(self):
+        message = CommandBuilder.rotate_grid(90)
+        message.checksum = (message.checksum + 1) % 256
+        with Serial(self.port.name, timeout=1.0) as connection:
+            connection.write(PREAMBLE + bytes(message))
+            response = connection.read(FRAME_SIZE)
+
+        self.assertEqual(PREAMBLE, response[:len(PREAMBLE)])
+        self.assertEqual(Command.CRC_ERROR, Command(Message.from_buffer_copy(response[len(PREAMBLE):]).cmd))
+        self.assertEqual([], self.simulator.executed)
+
+    def test_crc_error_retransmitted(self):
+        self.simulator.stop()
+        settings = SimulatorSettings(nak_rate=0.3, seed=1)
+        settings.delays = {cmd: 0.01 for cmd in settings.delays}
+        self.simulator = ElectronicsSimulator(self.port, settings=settings)
+        self.simulator.start()
+        app_config = AppConfiguration()
+        app_config.serial_read = self.port.name
+        app_config.serial_write = self.port.name
+        read_queue = queue.Queue()
+        write_queue = CommandQueue()
+        communicator = UartCommunicator(app_config, read_queue, write_queue)
+        communicator.start()
+
+        start = time.monotonic()
+        for _ in range(10):
+            write_queue.put(CommandBuilder.rotate_grid(90))
+        try:
+            for _ in range(10):
+                self.assertEqual(Command.EXECUTION_FINISHED, Command(read_queue.get(timeout=5.0).cmd))
+        finally:
+            communicator.halt()
+            communicator.shutdown()
+
+        self.assertGreater(communicator.retransmits, 0)
+        self.assertEqual([Command.ROTATE_GRID] * 10, self.simulator.executed)
+        # A retransmit after the acknowledge timeout would take 2s
+        self.assertLess(time.monotonic() - start, 2.0)
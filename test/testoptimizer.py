@@ -0,0 +1,76 @@
+"""Unit tests for the build plan optimizer."""
+import queue
+import unittest
+
+from rebuilder.builder import Builder
+from rebuilder.optimizer import PlanOptimizer
+from shared.enumerations import CubeColor
+from uart.command import Command, MoveLift
+from uart.commandbuilder import CommandBuilder
+
+
+class TestPlanOptimizer(unittest.TestCase):
+    """Test class for the build plan optimizer."""
+
+    def test_merge_rotations(self):
+        optimizer = PlanOptimizer()
+        plan = optimizer.optimize([CommandBuilder.rotate_grid(90), CommandBuilder.rotate_grid(180),
+                                   CommandBuilder.place_cubes(1, 0, 0), CommandBuilder.rotate_grid(270),
+                                   CommandBuilder.rotate_grid(180)])
+        self.assertEqual([Command.ROTATE_GRID, Command.PLACE_CUBES, Command.ROTATE_GRID],
+                         [Command(message.cmd) for message in plan])
+        self.assertEqual(-90, plan[0].data.rotate_grid.degrees)
+        self.assertEqual(90, plan[2].data.rotate_grid.degrees)
+        self.assertEqual(2, optimizer.commands_saved)
+        self.assertEqual(360, optimizer.degrees_saved)
+
+    def test_drop_zero_rotations(self):
+        optimizer = PlanOptimizer()
+        plan = optimizer.optimize([CommandBuilder.place_cubes(1, 0, 0), CommandBuilder.rotate_grid(0),
+                                   CommandBuilder.rotate_grid(90), CommandBuilder.rotate_grid(270),
+                                   CommandBuilder.move_lift(MoveLift.MOVE_DOWN)])
+        self.assertEqual([Command.PLACE_CUBES, Command.MOVE_LIFT], [Command(message.cmd) for message in plan])
+        self.assertEqual(3, optimizer.commands_saved)
+        self.assertEqual(180, optimizer.degrees_saved)
+
+        optimizer.reset()
+        self.assertEqual(0, optimizer.commands_saved)
+        self.assertEqual(0, optimizer.degrees_saved)
+
+    def test_merge_place_cubes(self):
+        optimizer = PlanOptimizer()
+        plan = optimizer.optimize([CommandBuilder.place_cubes(1, 1, 0), CommandBuilder.place_cubes(1, 0, 1),
+                                   CommandBuilder.place_cubes(0, 1, 0), CommandBuilder.rotate_grid(90),
+                                   CommandBuilder.place_cubes(0, 0, 1)])
+        self.assertEqual([Command.PLACE_CUBES, Command.ROTATE_GRID, Command.PLACE_CUBES],
+                         [Command(message.cmd) for message in plan])
+        self.assertEqual((2, 2, 1), (plan[0].data.place_cubes.cubes_red, plan[0].data.place_cubes.cubes_yellow,
+                                     plan[0].data.place_cubes.cubes_blue))
+        self.assertEqual(2, optimizer.commands_saved)
+
+    def test_keep_incompatible_place_cubes(self):
+        optimizer = PlanOptimizer()
+        plan = optimizer.optimize([CommandBuilder.place_cubes(2, 0, 0), CommandBuilder.place_cubes(1, 0, 0)])
+        self.assertEqual(2, len(plan))
+        self.assertEqual(0, optimizer.commands_saved)
+
+    def test_builder_with_optimizer(self):
+        uart_write = queue.Queue()
+        optimizer = PlanOptimizer()
+        builder = Builder(uart_write, optimizer)
+        builder.set_config(
+            [CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED, CubeColor.RED, CubeColor.YELLOW,
+             CubeColor.NONE, CubeColor.RED])
+        builder.build()
+        builder.finish_build()
+
+        commands = []
+        while not uart_write.empty():
+            message = uart_write.get_nowait()
+            commands.append(Command(message.cmd))
+            if Command(message.cmd) == Command.PLACE_CUBES:
+                self.assertLessEqual(message.data.place_cubes.cubes_red, 2)
+
+        self.assertEqual([Command.ROTATE_GRID, Command.PLACE_CUBES, Command.ROTATE_GRID, Command.PLACE_CUBES,
+                          Command.ROTATE_GRID, Command.PLACE_CUBES, Command.ROTATE_GRID, Command.MOVE_LIFT], commands)
+        self.assertEqual(1, optimizer.commands_saved)
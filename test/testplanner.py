@@ -0,0 +1,99 @@
+"""Unit tests for the build planner."""
+import itertools
+import queue
+import unittest
+
+from rebuilder.builder import Builder, CubeState
+from rebuilder.planner import MAGAZINES, BuildPlanner, CostModel, PlanStep, all_configurations
+from shared.enumerations import CubeColor
+from uart.command import Command
+from uart.commandbuilder import CommandBuilder
+
+
+def _build_result(steps: list[PlanStep]) -> tuple[list[CubeColor], int]:
+    """Applies the steps of the plan and returns the built configuration and the final rotation."""
+    stacks: list[list[CubeColor]] = [[], [], [], []]
+    rotation = 0
+    for step in steps:
+        rotation = (rotation + step.rotation) % 4
+        for color, count in zip([CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE], step.cubes):
+            stacks[(MAGAZINES.index(color) - rotation) % 4].extend([color] * count)
+    stacks = [stack + [CubeColor.NONE] * (2 - len(stack)) for stack in stacks]
+    return [stack[0] for stack in stacks] + [stack[1] for stack in stacks], rotation
+
+
+class TestBuildPlanner(unittest.TestCase):
+    """Test class for the build planner."""
+
+    def test_all_configurations(self):
+        configs = list(all_configurations())
+        self.assertEqual(13 ** 4, len(configs))
+        for config in configs:
+            for i in range(4):
+                self.assertTrue(config[i] != CubeColor.NONE or config[i + 4] == CubeColor.NONE)
+
+    def test_cost_model(self):
+        cost_model = CostModel(rotation=1.0, rotation_per_degree=0.01, placement=2.0, double_placement=0.5)
+        self.assertEqual(0.0, cost_model.rotation_cost(0))
+        self.assertEqual(0.0, cost_model.rotation_cost(4))
+        self.assertAlmostEqual(1.9, cost_model.rotation_cost(1))
+        self.assertAlmostEqual(2.8, cost_model.rotation_cost(2))
+        self.assertAlmostEqual(1.9, cost_model.rotation_cost(3))
+        self.assertAlmostEqual(1.9, cost_model.rotation_cost(-1))
+        self.assertEqual(0.0, cost_model.placement_cost((0, 0, 0)))
+        self.assertAlmostEqual(2.0, cost_model.placement_cost((1, 1, 0)))
+        self.assertAlmostEqual(3.0, cost_model.placement_cost((2, 0, 2)))
+        plan = [CommandBuilder.rotate_grid(90), CommandBuilder.place_cubes(2, 1, 0)]
+        self.assertAlmostEqual(4.4, cost_model.plan_cost(plan))
+
+    def test_plan_without_rotation(self):
+        planner = BuildPlanner()
+        config = [CubeColor.NONE, CubeColor.RED, CubeColor.YELLOW, CubeColor.BLUE,
+                  CubeColor.NONE, CubeColor.RED, CubeColor.NONE, CubeColor.BLUE]
+        self.assertEqual([PlanStep(cubes=(2, 1, 2))], planner.plan(config))
+        self.assertEqual([], planner.plan([CubeColor.NONE] * 8))
+
+    def test_plan_with_placed_cubes(self):
+        planner = BuildPlanner()
+        config = [CubeColor.RED, CubeColor.RED, CubeColor.NONE, CubeColor.NONE,
+                  CubeColor.NONE, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE]
+        self.assertEqual([PlanStep(cubes=(1, 0, 0))], planner.plan(config, rotation=1, placed=0b10))
+        self.assertEqual([PlanStep(rotation=3), PlanStep(cubes=(1, 0, 0))],
+                         planner.plan(config, rotation=1, placed=0b1))
+
+    def test_plans_are_valid(self):
+        planner = BuildPlanner()
+        for config in itertools.islice(all_configurations(), 0, None, 37):
+            steps = planner.plan(config)
+            result, _ = _build_result(steps)
+            self.assertEqual(config, result)
+
+    def test_plans_not_worse_than_greedy(self):
+        planner = BuildPlanner()
+        for config in itertools.islice(all_configurations(), 5, None, 101):
+            uart_write = queue.Queue()
+            builder = Builder(uart_write)
+            builder.set_config(config.copy())
+            builder.build(build_doubles_first=True)
+            builder.finish_build()
+            greedy = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+            greedy = [message for message in greedy if Command(message.cmd) != Command.MOVE_LIFT]
+            self.assertLessEqual(planner.plan_cost(planner.plan(config)),
+                                 planner.cost_model.plan_cost(greedy) + 1e-9)
+
+    def test_builder_build_planned(self):
+        uart_write = queue.Queue()
+        builder = Builder(uart_write)
+        builder.set_config(
+            [CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.RED, CubeColor.RED, CubeColor.YELLOW,
+             CubeColor.NONE, CubeColor.RED])
+        builder.build_planned()
+        self.assertTrue(all(state == CubeState.PLACED for state in builder.cube_states))
+        builder.finish_build()
+
+        messages = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+        self.assertEqual(Command.MOVE_LIFT, Command(messages[-1].cmd))
+        rotation = sum(msg.data.rotate_grid.degrees for msg in messages if Command(msg.cmd) == Command.ROTATE_GRID)
+        self.assertEqual(0, rotation % 360)
+        self.assertEqual(MAGAZINES, builder.pos)
+        self.assertEqual(sum(1 for msg in messages if Command(msg.cmd) == Command.PLACE_CUBES), 2)
@@ -0,0 +1,90 @@
+"""Unit tests for the precomputed plan table."""
+import itertools
+import os
+import queue
+import tempfile
+import unittest
+
+from rebuilder.builder import Builder
+from rebuilder.planner import BuildPlanner, CostModel, PlanStep, all_configurations
+from rebuilder.plantable import PlanTable
+from shared.enumerations import CubeColor
+from uart.command import Command
+
+
+class TestPlanTable(unittest.TestCase):
+    """Test class for the precomputed plan table."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, 'plans.bin')
+        self.planner = BuildPlanner()
+        self.configs = list(itertools.islice(all_configurations(), 0, None, 251))
+        PlanTable.generate(self.planner, self.path, self.configs)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_index(self):
+        self.assertEqual(0, PlanTable.index([CubeColor.NONE] * 8))
+        self.assertEqual(1, PlanTable.index([CubeColor.RED] + [CubeColor.NONE] * 7))
+        self.assertEqual(4 ** 8 - 1, PlanTable.index([CubeColor.BLUE] * 8))
+        self.assertIsNone(PlanTable.index([CubeColor.UNKNOWN] + [CubeColor.NONE] * 7))
+
+    def test_lookup(self):
+        table = PlanTable(self.planner.cost_model)
+        self.assertIsNone(table.lookup(self.configs[1]))
+        self.assertTrue(table.load(self.path))
+        try:
+            for config in self.configs:
+                self.assertEqual(self.planner.plan(config), table.lookup(config))
+            self.assertIsNone(table.lookup(self.configs[1][:7] + [CubeColor.UNKNOWN]))
+            self.assertIsNone(table.lookup([CubeColor.RED, CubeColor.RED, CubeColor.RED, CubeColor.NONE,
+                                            CubeColor.RED, CubeColor.RED, CubeColor.RED, CubeColor.NONE]))
+        finally:
+            table.close()
+        self.assertFalse(table.is_loaded)
+
+    def test_reject_other_cost_model(self):
+        table = PlanTable(CostModel(placement=10.0))
+        self.assertFalse(table.load(self.path))
+        self.assertFalse(table.load(os.path.join(self.directory.name, 'missing.bin')))
+        self.assertFalse(table.is_loaded)
+
+    def test_builder_uses_table(self):
+        config = [CubeColor.RED, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE,
+                  CubeColor.NONE, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE]
+        path = os.path.join(self.directory.name, 'single.bin')
+        PlanTable.generate(self.planner, path, [config])
+
+        # Patch the stored plan to verify the builder uses the table instead of the planner
+        with open(path, 'r+b') as table_file:
+            table_file.seek(16 + PlanTable.index(config) * 16)
+            table_file.write(bytes([3, PlanTable._encode_step(PlanStep(rotation=2)),  # pylint: disable=protected-access
+                                    PlanTable._encode_step(PlanStep(rotation=3)),  # pylint: disable=protected-access
+                                    PlanTable._encode_step(PlanStep(cubes=(1, 0, 0)))]))  # pylint: disable=protected-access
+
+        table = PlanTable(self.planner.cost_model)
+        self.assertTrue(table.load(path))
+        uart_write = queue.Queue()
+        builder = Builder(uart_write, planner=self.planner, plan_table=table)
+        builder.set_config(config)
+        builder.build_planned()
+        table.close()
+
+        messages = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+        self.assertEqual([Command.ROTATE_GRID, Command.ROTATE_GRID, Command.PLACE_CUBES],
+                         [Command(message.cmd) for message in messages])
+
+        # The table is not used if the planner switched to another cost model
+        self.assertTrue(table.load(path))
+        self.assertTrue(table.matches(self.planner.cost_model))
+        planner = BuildPlanner(CostModel(placement=10.0))
+        self.assertFalse(table.matches(planner.cost_model))
+        builder = Builder(uart_write, planner=planner, plan_table=table)
+        builder.set_config(config)
+        builder.build_planned()
+        table.close()
+
+        messages = [uart_write.get_nowait() for _ in range(uart_write.qsize())]
+        self.assertEqual([Command.ROTATE_GRID, Command.PLACE_CUBES], [Command(message.cmd) for message in messages])
@@ -0,0 +1,89 @@
+"""Unit tests for the build simulator."""
+import itertools
+import queue
+import unittest
+
+from rebuilder.builder import Builder
+from rebuilder.optimizer import PlanOptimizer
+from rebuilder.planner import all_configurations
+from rebuilder.simulator import BuildSimulator, MachineTimings
+from shared.enumerations import CubeColor
+from uart.command import Command, MoveLift
+from uart.commandbuilder import CommandBuilder
+
+
+class TestBuildSimulator(unittest.TestCase):
+    """Test class for the build simulator."""
+
+    def test_timings(self):
+        timings = MachineTimings(rotation=0.5, rotation_speed=100.0, placement=1.0, double_placement=0.25)
+        self.assertEqual(0.0, timings.rotation_time(0))
+        self.assertEqual(0.0, timings.rotation_time(360))
+        self.assertAlmostEqual(1.4, timings.rotation_time(90))
+        self.assertAlmostEqual(1.4, timings.rotation_time(-90))
+        self.assertEqual(0.0, timings.placement_time((0, 0, 0)))
+        self.assertAlmostEqual(1.0, timings.placement_time((1, 1, 1)))
+        self.assertAlmostEqual(1.5, timings.placement_time((2, 0, 2)))
+
+    def test_run(self):
+        timings = MachineTimings(lift=1.0, idle_power=3.6, rotation_power=36.0, placement_power=0.0, lift_power=0.0)
+        simulator = BuildSimulator(timings)
+        simulator.submit_all([CommandBuilder.rotate_grid(90), CommandBuilder.place_cubes(2, 1, 0),
+                              CommandBuilder.rotate_grid(270), CommandBuilder.move_lift(MoveLift.MOVE_DOWN)])
+        result = simulator.run()
+
+        self.assertEqual([], result.errors)
+        self.assertEqual(4, result.commands)
+        self.assertAlmostEqual(0.65 + 0.6 + 0.65 + 1.0, result.duration)
+        self.assertAlmostEqual(result.duration / 1000 + 1.3 / 100, result.energy)
+        self.assertAlmostEqual(1.3, result.busy[Command.ROTATE_GRID])
+        self.assertEqual(0, result.rotation)
+        self.assertEqual(180, result.degrees)
+        self.assertEqual([CubeColor.RED, CubeColor.YELLOW, CubeColor.NONE, CubeColor.NONE,
+                          CubeColor.RED, CubeColor.NONE, CubeColor.NONE, CubeColor.NONE], result.config)
+
+    def test_arrival_and_pause(self):
+        simulator = BuildSimulator(MachineTimings(placement=1.0))
+        simulator.submit(CommandBuilder.place_cubes(1, 0, 0))
+        simulator.submit(CommandBuilder.place_cubes(1, 0, 0), at=0.5)
+        simulator.submit(CommandBuilder.other_command(Command.PAUSE_BUILD), at=0.5)
+        simulator.submit(CommandBuilder.other_command(Command.RESUME_BUILD), at=3.0)
+        simulator.submit(CommandBuilder.place_cubes(0, 1, 0), at=5.0)
+        result = simulator.run()
+        self.assertAlmostEqual(6.0, result.duration)
+        self.assertEqual(5, result.commands)
+        self.assertEqual([CubeColor.RED], result.stacks[1][:1])
+
+        simulator.submit(CommandBuilder.other_command(Command.PAUSE_BUILD))
+        simulator.submit(CommandBuilder.place_cubes(1, 0, 0), at=1.0)
+        self.assertEqual(['Build paused but never resumed'], simulator.run().errors)
+
+    def test_errors(self):
+        simulator = BuildSimulator()
+        simulator.submit_all([CommandBuilder.place_cubes(2, 0, 0), CommandBuilder.place_cubes(1, 0, 0),
+                              CommandBuilder.rotate_grid(45), CommandBuilder.place_cubes(0, 1, 0)])
+        result = simulator.run()
+        self.assertEqual(2, len(result.errors))
+        self.assertEqual([CubeColor.RED, CubeColor.RED], result.stacks[1])
+
+    def test_builder_commands(self):
+        for config in itertools.islice(all_configurations(), 11, None, 97):
+            results = []
+            for planned in (False, True):
+                uart_write = queue.Queue()
+                builder = Builder(uart_write, PlanOptimizer())
+                builder.set_config(config.copy())
+                if planned:
+                    builder.build_planned()
+                else:
+                    builder.build(build_doubles_first=True)
+                builder.finish_build()
+
+                simulator = BuildSimulator()
+                simulator.submit_queue(uart_write)
+                result = simulator.run()
+                self.assertEqual([], result.errors)
+                self.assertEqual(config, result.config)
+                self.assertEqual(0, result.rotation)
+                results.append(result)
+            self.assertLessEqual(results[1].duration, results[0].duration + 1e-9)
@@ -0,0 +1,192 @@
+"""Unit tests for the web server and the shared status it serves."""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from dataclasses import FrozenInstanceError, replace
+
+from rebuilder.history import RunHistory
+from shared.actionqueue import ActionQueue
+from shared.configstore import ConfigStore
+from shared.data import AppConfiguration, SharedStatus
+from shared.enumerations import Action, CubeColor, Status
+from video.debug import DebugView
+from web.server import WebServer
+from .fixtures import cube_frame, history_run
+
+
+class TestSharedStatus(unittest.TestCase):
+    """Test class for the snapshots of the shared status."""
+
+    def test_update(self):
+        status = SharedStatus()
+        snapshot = status.snapshot
+        self.assertEqual(0, status.version)
+        self.assertEqual(Status.RUNNING, status.update(energy=1.5, status=Status.RUNNING).status)
+        self.assertEqual(1, status.version)
+        self.assertEqual(Status.IDLE, snapshot.status)
+        self.assertEqual(1.5, status.snapshot.energy)
+        with self.assertRaises(FrozenInstanceError):
+            status.snapshot.energy = 2.0  # type: ignore[misc]
+
+        status.modify(lambda snapshot: replace(snapshot, steps_finished=snapshot.steps_total))
+        self.assertEqual(10, status.snapshot.steps_finished)
+        self.assertEqual(Status.INIT, status.reset(status=Status.INIT).status)
+        self.assertEqual((0, 3), (status.snapshot.steps_finished, status.version))
+
+    def test_consistent_snapshots(self):
+        status = SharedStatus()
+        halt = threading.Event()
+
+        def _write():
+            for total in range(1, 5000):
+                status.update(steps_total=total, steps_finished=total)
+            halt.set()
+
+        thread = threading.Thread(target=_write)
+        thread.start()
+        while not halt.is_set():
+            snapshot = status.snapshot
+            self.assertEqual(snapshot.steps_total, snapshot.steps_finished)
+            data = json.loads(status.to_json()[0])
+            self.assertEqual(data['steps_total'], data['steps_finished'])
+        thread.join()
+
+    def test_to_json(self):
+        status = SharedStatus()
+        data, version = status.to_json()
+        self.assertEqual(0, version)
+        self.assertEqual('unknown', json.loads(data)['config'][0])
+        self.assertIs(data, status.to_json()[0])
+
+        status.update(config=(CubeColor.RED,) * 8)
+        data, version = status.to_json()
+        self.assertEqual(1, version)
+        self.assertEqual(['red'] * 8, json.loads(data)['config'])
+
+    def test_wait_for_change(self):
+        status = SharedStatus()
+        self.assertEqual(0, status.wait_for_change(0, timeout=0.01))
+
+        def _change():
+            time.sleep(0.05)
+            status.update(steps_finished=3)
+
+        thread = threading.Thread(target=_change)
+        thread.start()
+        self.assertEqual(1, status.wait_for_change(0, timeout=2.0))
+        thread.join()
+        self.assertEqual(1, status.wait_for_change(0, timeout=0.01))
+
+
+class TestWebServer(unittest.TestCase):
+    """Test class for the web server routes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.config_store = ConfigStore(os.path.join(self.temp_dir.name, 'config.json'))
+        self.config_store.update('app', AppConfiguration().to_dict()['app'])
+        self.status = SharedStatus()
+        self.debug_view = DebugView(interval=0.01)
+        self.run_history = RunHistory(os.path.join(self.temp_dir.name, 'history.db'))
+        self.run_history.open()
+        self.web_queue = ActionQueue(self.status)
+        self.server = WebServer(AppConfiguration(), self.config_store, self.web_queue, self.status, self.debug_view,
+                                self.run_history)
+        self.server._add_routes()  # pylint: disable=protected-access
+        self.client = self.server._app.test_client()  # pylint: disable=protected-access
+
+    def tearDown(self):
+        self.config_store.close()
+        self.run_history.close()
+        self.temp_dir.cleanup()
+
+    def test_action(self):
+        response = self.client.post('/action', json={'action': 'init'})
+        self.assertEqual(202, response.status_code)
+        self.assertEqual({'id': 1, 'action': 'init', 'state': 'pending'},
+                         {key: response.get_json()[key] for key in ('id', 'action', 'state')})
+        self.assertEqual(Action.INIT, self.web_queue.get(timeout=1.0).action)
+        self.assertEqual('pending', self.client.get('/status').get_json()['actions'][0]['state'])
+        self.assertEqual(400, self.client.post('/action', json={'action': 'jump'}).status_code)
+
+    def test_index(self):
+        response = self.client.get('/')
+        self.assertEqual(200, response.status_code)
+        self.assertRegex(response.get_data(as_text=True), r'<script src="script\.[0-9a-f]{16}\.js" defer>')
+        self.assertEqual(response.get_data(), self.client.get('/index.html').get_data())
+
+    def test_settings(self):
+        response = self.client.get('/settings')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(25, response.get_json()['confidence'])
+        etag, _ = response.get_etag()
+        self.assertEqual(304, self.client.get('/settings', headers={'If-None-Match': f'"{etag}"'}).status_code)
+
+        settings = response.get_json() | {'confidence': 40}
+        response = self.client.post('/settings', json=settings, headers={'If-Match': f'"{etag}"'})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.get_etag()[0])
+        self.assertEqual(40, self.config_store.get('app')[0]['confidence'])
+
+        response = self.client.post('/settings', json=settings, headers={'If-Match': f'"{etag}"'})
+        self.assertEqual(412, response.status_code)
+        self.assertEqual(400, self.client.post('/settings', json={'confidence': 40}).status_code)
+
+    def test_status(self):
+        self.status.update(status=Status.READY)
+        response = self.client.get('/status')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('ready', response.get_json()['status'])
+
+    def test_runs(self):
+        self.run_history.save(history_run('fast', 0.0, 30.0, 90.0))
+        self.run_history.save(history_run('default', 0.0, 40.0, 100.0))
+        data = self.client.get('/runs?limit=1').get_json()
+        self.assertEqual(1, data['count'])
+        self.assertEqual({'p50': 60.0, 'p95': 60.0, 'mean': 60.0, 'min': 60.0, 'max': 60.0}, data['duration_build'])
+        self.assertEqual('fast', self.client.get('/runs?mode=fast').get_json()['runs'][0]['mode'])
+        self.assertEqual(400, self.client.get('/runs?limit=0').status_code)
+
+    def test_events(self):
+        response = self.client.get('/events', buffered=False)
+        self.assertEqual('text/event-stream', response.mimetype)
+        events = iter(response.response)
+        self.assertEqual('id: 0', next(events).decode().splitlines()[0])
+
+        self.status.update(status=Status.RUNNING)
+        event = next(events).decode().splitlines()
+        self.assertEqual('id: 1', event[0])
+        self.assertEqual('running', json.loads(event[1].removeprefix('data: '))['status'])
+        response.close()
+
+    def test_halt_ends_events(self):
+        response = self.client.get('/events', buffered=False)
+        events = iter(response.response)
+        next(events)
+        self.server.halt()
+        self.assertEqual([], list(events))
+        response.close()
+
+    def test_debug(self):
+        response = self.client.get('/debug', buffered=False)
+        self.assertEqual('multipart/x-mixed-replace', response.mimetype)
+        parts = iter(response.response)
+        self.assertEqual(self.debug_view.placeholder, next(parts).split(b'\r\n\r\n', 1)[1].removesuffix(b'\r\n'))
+
+        self.debug_view.put_frame(cube_frame(), {'1': {CubeColor.BLUE: 3}})
+        part = next(parts)
+        self.assertTrue(part.startswith(b'--frame\r\nContent-Type: image/jpeg\r\n'))
+        self.assertIn(b'\r\n\r\n\xff\xd8', part)
+        self.assertNotIn(self.debug_view.placeholder, part)
+        response.close()
+        self.assertFalse(self.debug_view.active)
+
+    def test_debug_without_frames(self):
+        response = self.client.get('/debug', buffered=False)
+        self.assertIn(self.debug_view.placeholder, next(iter(response.response)))
+        self.assertTrue(self.debug_view.active)
+        response.close()
+        self.assertFalse(self.debug_view.active)
@@ -0,0 +1,43 @@
+"""Helper classes to provide virtual serial ports for development and testing."""
+import os
+import select
+import tty
+
+
+class VirtualSerialPort:
+    """Provides a pseudo-terminal pair that behaves like a serial connection.
+
+    The application opens the port by its name, the test side uses the read and write
+    functions of this class on the other end of the pseudo-terminal pair.
+    """
+
+    def __init__(self, timeout: float = 1.0) -> None:
+        self.timeout = timeout
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self._name = os.ttyname(self._slave)
+
+    @property
+    def name(self) -> str:
+        """Returns the device name used to open the serial port."""
+        return self._name
+
+    def write(self, data: bytes) -> None:
+        """Writes the data to the serial port."""
+        os.write(self._master, data)
+
+    def read(self, size: int = 1) -> bytes:
+        """Reads up to the specified number of bytes, returns an empty result on timeout."""
+        readable, _, _ = select.select([self._master], [], [], self.timeout)
+        if not readable:
+            return b''
+        return os.read(self._master, size)
+
+    def close(self) -> None:
+        """Closes both ends of the pseudo-terminal pair."""
+        for descriptor in (self._master, self._slave):
+            try:
+                os.close(descriptor)
+            except OSError:
+                pass
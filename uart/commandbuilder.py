@@ -14,8 +14,8 @@ class CommandBuilder:
 
     @classmethod
     def rotate_grid(cls, degrees: int) -> Message:
-        """Builds the command to rotate the grid by the specified degrees."""
-        deg = degrees % 360
+        """Builds the command to rotate the grid by the specified degrees in the shorter direction (-179° to 180°)."""
+        deg = (degrees + 179) % 360 - 179
 
         rotate = RotateGrid()
         rotate.degrees = deg
@@ -0,0 +1,93 @@
+"""Implements the prioritized queue for the commands sent to the electronics controller."""
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from enum import IntEnum
+from typing import Any
+
+from .command import Command, Message
+
+
+class Lane(IntEnum):
+    """The lanes of the command queue, lower values are sent first."""
+    CONTROL = 0
+    TELEMETRY = 1
+    BUILD = 2
+
+
+LANE_COMMANDS = {
+    Command.PAUSE_BUILD: Lane.CONTROL,
+    Command.RESUME_BUILD: Lane.CONTROL,
+    Command.RESET_WERNI: Lane.CONTROL,
+    Command.GET_STATE: Lane.TELEMETRY,
+    Command.RESET_ENERGY_MEASUREMENT: Lane.TELEMETRY,
+    Command.ENABLE_BUZZER: Lane.TELEMETRY,
+}
+
+
+@dataclass
+class LaneMetrics:
+    """The queueing delay metrics of a lane in seconds."""
+    count: int = 0
+    total_delay: float = 0.0
+    max_delay: float = 0.0
+    last_delay: float = 0.0
+
+    @property
+    def mean_delay(self) -> float:
+        """Returns the mean queueing delay."""
+        return self.total_delay / self.count if self.count > 0 else 0.0
+
+    def record(self, delay: float) -> None:
+        """Records the queueing delay of a command."""
+        self.count += 1
+        self.total_delay += delay
+        self.max_delay = max(self.max_delay, delay)
+        self.last_delay = delay
+
+
+class CommandQueue(queue.Queue):
+    """Queue with separate lanes for control, telemetry and build commands.
+
+    Commands are returned in FIFO order within a lane, but a command of a lane with
+    a higher priority is always returned before the commands of the lower lanes.
+    """
+
+    def _init(self, maxsize: int) -> None:
+        self._lanes: dict[Lane, deque[tuple[float, Any]]] = {lane: deque() for lane in Lane}
+        self._metrics: dict[Lane, LaneMetrics] = {lane: LaneMetrics() for lane in Lane}
+
+    def _qsize(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def _put(self, item: Any) -> None:
+        self._lanes[self.lane(item)].append((time.perf_counter(), item))
+
+    def _get(self) -> Any:
+        for lane, items in self._lanes.items():
+            if items:
+                queued, item = items.popleft()
+                self._metrics[lane].record(time.perf_counter() - queued)
+                return item
+        raise queue.Empty
+
+    @staticmethod
+    def lane(item: Any) -> Lane:
+        """Returns the lane the item is queued in."""
+        if isinstance(item, Message):
+            try:
+                return LANE_COMMANDS.get(Command(item.cmd), Lane.BUILD)
+            except ValueError:
+                pass
+        return Lane.BUILD
+
+    def metrics(self) -> dict[Lane, LaneMetrics]:
+        """Returns a copy of the queueing delay metrics of each lane."""
+        with self.mutex:
+            return {lane: replace(metrics) for lane, metrics in self._metrics.items()}
+
+    def reset_metrics(self) -> None:
+        """Resets the queueing delay metrics of all lanes."""
+        with self.mutex:
+            self._metrics = {lane: LaneMetrics() for lane in Lane}
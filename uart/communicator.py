@@ -2,13 +2,18 @@
 import logging
 import queue
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
+from ctypes import sizeof
 from threading import Event
 
-from serial import Serial, SerialException, SerialTimeoutException
-
 from shared.data import AppConfiguration
 from .command import Command, Message
+from .connection import ConnectionHealth, SerialConnection
+
+PREAMBLE = b'AAAB'
+FRAME_SIZE = len(PREAMBLE) + sizeof(Message)
+POLL_INTERVAL = 0.1
 
 
 class UartCommunicator:
@@ -24,8 +29,32 @@ class UartCommunicator:
         self._halt_event = Event()
 
         self._ack = Event()
-        self._ser_read: Serial | None = None
-        self._ser_write: Serial | None = None
+        self._crc_error = False
+        self._retransmits = 0
+        self._ack_latencies: deque[float] = deque(maxlen=1000)
+        self._conn_read = SerialConnection(app_config.serial_read, app_config.serial_baud_rate,
+                                           POLL_INTERVAL, self._halt_event)
+        self._conn_write = self._conn_read
+        if app_config.serial_write != app_config.serial_read:
+            self._conn_write = SerialConnection(app_config.serial_write, app_config.serial_baud_rate,
+                                                POLL_INTERVAL, self._halt_event)
+
+    @property
+    def ack_latencies(self) -> list[float]:
+        """Returns the latest latencies in seconds between writing a command and receiving its acknowledge."""
+        return list(self._ack_latencies)
+
+    @property
+    def retransmits(self) -> int:
+        """Returns the number of commands sent again because the electronics controller reported a CRC error."""
+        return self._retransmits
+
+    @property
+    def health(self) -> list[ConnectionHealth]:
+        """Returns the health of the serial connections."""
+        if self._conn_write is self._conn_read:
+            return [self._conn_read.health]
+        return [self._conn_read.health, self._conn_write.health]
 
     def start(self) -> None:
         """Starts the UART reader and writer tasks."""
@@ -48,21 +77,9 @@ class UartCommunicator:
         self._logger.info('UART reader task started')
         data = b''
         while not self._halt_event.is_set():
-            data += self._read()
-            preamble_pos = data.find(b'AAAB')
-            if preamble_pos < 0:
-                data = b''
-                continue
+            data = self._extract_frames(data + self._conn_read.read())
 
-            data = data[preamble_pos:]
-            if len(data) >= 23:
-                if self._decode(data[:23]):
-                    data = data[23:]
-                else:
-                    data = data[4:]
-
-        if self._ser_read is not None and self._ser_read.is_open:
-            self._ser_read.close()
+        self._conn_read.close()
         self._logger.info('UART reader task stopped')
 
     def _writer_task(self) -> None:
@@ -70,7 +87,7 @@ class UartCommunicator:
         self._logger.info('UART writer task started')
         while not self._halt_event.is_set():
             try:
-                message = self._write_queue.get(timeout=2.0)
+                message = self._write_queue.get(timeout=POLL_INTERVAL)
                 if not isinstance(message, Message):
                     self._logger.warning('Invalid message type: %s', type(message))
                     continue
@@ -78,56 +95,64 @@ class UartCommunicator:
             except queue.Empty:
                 continue
 
-        if self._ser_write is not None and self._ser_write.is_open:
-            self._ser_write.close()
+        self._conn_write.close()
         self._logger.info('UART writer task stopped')
 
-    def _read(self) -> bytes:
-        """Reads data received from the UART connection."""
-        try:
-            if self._ser_read is None or not self._ser_read.is_open:
-                self._logger.info('Opening UART read connection')
-                self._ser_read = Serial(self._app_config.serial_read, self._app_config.serial_baud_rate, timeout=2.0)
-            return self._ser_read.read(23)
-        except (SerialException, SerialTimeoutException, ValueError) as error:
-            self._logger.error('Failed to read message: %s', error)
-            self._ser_read = None
-            time.sleep(1)
-        return bytes()
-
     def _write(self, command) -> None:
         """Writes the command to the UART connection."""
         message = self._encode(command)
         self._ack.clear()
         while not self._ack.is_set() and not self._halt_event.is_set():
-            try:
-                if self._ser_write is None or not self._ser_write.is_open:
-                    self._logger.info('Opening UART write connection')
-                    self._ser_write = Serial(self._app_config.serial_write, self._app_config.serial_baud_rate)
-
-                self._logger.debug('Writing message: %s', message.hex(' '))
-                self._ack.clear()
-                self._ser_write.write(message)
-
-                if self._ack.wait(timeout=2.0):
-                    self._logger.debug('Received acknowledge')
-                else:
-                    self._logger.warning('No acknowledge received, retrying')
-            except (SerialException, SerialTimeoutException, ValueError) as error:
-                self._logger.error('Failed to write message: %s', error)
-                self._ser_write = None
-                time.sleep(1)
+            self._logger.debug('Writing message: %s', message.hex(' '))
+            self._ack.clear()
+            self._crc_error = False
+            if not self._conn_write.write(message):
+                # The message is kept and retried once the connection is reestablished
+                continue
+            sent = time.perf_counter()
+
+            if self._ack.wait(timeout=2.0):
+                if self._crc_error:
+                    self._ack.clear()
+                    self._retransmits += 1
+                    self._logger.warning('CRC error received, retrying')
+                    continue
+                self._ack_latencies.append(time.perf_counter() - sent)
+                self._logger.debug('Received acknowledge')
+            else:
+                self._logger.warning('No acknowledge received, retrying')
+
+    def _extract_frames(self, data: bytes) -> bytes:
+        """Decodes all complete frames contained in the data and returns the remaining bytes."""
+        while True:
+            preamble_pos = data.find(PREAMBLE)
+            if preamble_pos < 0:
+                # Keep the tail in case it contains the beginning of the next preamble
+                return data[-(len(PREAMBLE) - 1):]
+
+            data = data[preamble_pos:]
+            if len(data) < FRAME_SIZE:
+                return data
+
+            if self._decode(data[:FRAME_SIZE]):
+                data = data[FRAME_SIZE:]
+            else:
+                data = data[len(PREAMBLE):]
 
     def _decode(self, data: bytes) -> bool:
         """Decodes the message from the received data."""
         try:
-            message_data = data[4:]
+            message_data = data[len(PREAMBLE):]
             message = Message.from_buffer_copy(message_data)
             command_type = Command(message.cmd)
 
             self._logger.debug('Received command: %s', command_type)
             if command_type in (Command.ACKNOWLEDGE, Command.NOT_ACKNOWLEDGE):
                 self._ack.set()
+            elif command_type == Command.CRC_ERROR:
+                # The command is sent again right away instead of waiting for the acknowledge timeout
+                self._crc_error = True
+                self._ack.set()
             elif command_type in (Command.SEND_STATE, Command.SEND_IO_STATE, Command.EXECUTION_FINISHED):
                 self._read_queue.put(message)
             else:
@@ -140,4 +165,4 @@ class UartCommunicator:
     @staticmethod
     def _encode(command: Message) -> bytes:
         """Encodes the command with the preamble."""
-        return b'AAAB' + command
+        return PREAMBLE + command
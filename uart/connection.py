@@ -0,0 +1,146 @@
+"""Implements the persistent serial connection used by the UART communication protocol."""
+import logging
+import random
+import time
+from dataclasses import dataclass, replace
+from threading import Event, Lock
+
+from serial import Serial, SerialException, SerialTimeoutException
+
+BACKOFF_INITIAL = 0.01
+BACKOFF_MAX = 1.0
+BACKOFF_FACTOR = 2.0
+
+
+@dataclass
+class ConnectionHealth:
+    """The health of a serial connection."""
+    port: str
+    connected: bool = False
+    connected_since: float = 0.0
+    reconnects: int = 0
+    errors: int = 0
+    last_error: str = ''
+    last_error_time: float = 0.0
+
+    @property
+    def uptime(self) -> float:
+        """Returns the seconds since the connection was (re-)established."""
+        return time.monotonic() - self.connected_since if self.connected else 0.0
+
+
+class SerialConnection:
+    """Manages a persistent serial connection that can be shared by the reader and the writer.
+
+    The connection is opened on first use. After an error it is closed and reopened with an
+    exponential backoff with jitter, waiting only a few milliseconds for transient faults.
+    """
+
+    def __init__(self, port: str, baud_rate: int, timeout: float, halt_event: Event | None = None) -> None:
+        self._logger = logging.getLogger('uart.connection')
+        self._port = port
+        self._baud_rate = baud_rate
+        self._timeout = timeout
+        self._halt_event = halt_event if halt_event is not None else Event()
+        self._random = random.Random()
+        self._lock = Lock()
+        self._serial: Serial | None = None
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._health = ConnectionHealth(port)
+
+    @property
+    def health(self) -> ConnectionHealth:
+        """Returns a copy of the connection health."""
+        with self._lock:
+            return replace(self._health)
+
+    @property
+    def backoff(self) -> float:
+        """Returns the current backoff delay in seconds."""
+        return self._backoff
+
+    def read(self) -> bytes:
+        """Reads the data as soon as it is available, returns an empty result on timeout or error."""
+        ser = self._connect()
+        if ser is None:
+            return b''
+        try:
+            # Blocks until the first byte arrives, then drains everything already buffered
+            return ser.read(ser.in_waiting or 1)
+        except (SerialException, SerialTimeoutException, ValueError, OSError) as error:
+            self._logger.error('Failed to read from %s: %s', self._port, error)
+            self._fail(ser, error)
+        return b''
+
+    def write(self, data: bytes) -> bool:
+        """Writes the data, returns false if the data could not be written."""
+        ser = self._connect()
+        if ser is None:
+            return False
+        try:
+            ser.write(data)
+            return True
+        except (SerialException, SerialTimeoutException, ValueError, OSError) as error:
+            self._logger.error('Failed to write to %s: %s', self._port, error)
+            self._fail(ser, error)
+        return False
+
+    def close(self) -> None:
+        """Closes the connection."""
+        with self._lock:
+            if self._serial is not None and self._serial.is_open:
+                self._logger.info('Closing UART connection: %s', self._port)
+                self._serial.close()
+            self._serial = None
+            self._health.connected = False
+
+    def _connect(self) -> Serial | None:
+        """Returns the open connection, opens it if necessary and the backoff delay has passed."""
+        with self._lock:
+            if self._serial is not None and self._serial.is_open:
+                return self._serial
+
+            delay = self._retry_at - time.monotonic()
+        if delay > 0:
+            self._halt_event.wait(min(delay, self._timeout))
+            return None
+
+        with self._lock:
+            if self._serial is not None and self._serial.is_open:
+                return self._serial
+            try:
+                self._logger.info('Opening UART connection: %s', self._port)
+                self._serial = Serial(self._port, self._baud_rate, timeout=self._timeout)
+            except (SerialException, ValueError, OSError) as error:
+                self._logger.error('Failed to open %s: %s', self._port, error)
+                self._record_error(error)
+                return None
+
+            if self._health.errors > 0:
+                self._health.reconnects += 1
+            self._health.connected = True
+            self._health.connected_since = time.monotonic()
+            self._backoff = 0.0
+            return self._serial
+
+    def _fail(self, ser: Serial, error: Exception) -> None:
+        """Closes the failed connection, unless another thread already replaced it."""
+        with self._lock:
+            if ser is not self._serial:
+                return
+            try:
+                ser.close()
+            except (SerialException, OSError):
+                pass
+            self._serial = None
+            self._health.connected = False
+            self._record_error(error)
+
+    def _record_error(self, error: Exception) -> None:
+        """Records the error and schedules the next connection attempt."""
+        self._health.errors += 1
+        self._health.last_error = str(error)
+        self._health.last_error_time = time.time()
+        self._backoff = min(BACKOFF_MAX, max(BACKOFF_INITIAL, self._backoff * BACKOFF_FACTOR))
+        self._retry_at = time.monotonic() + self._random.uniform(self._backoff / 2, self._backoff)
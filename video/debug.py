@@ -0,0 +1,167 @@
+"""Implements the live debug view of the cube image recognition."""
+import logging
+import threading
+from typing import Any
+
+import cv2
+import numpy as np
+
+from shared.enumerations import CubeColor
+from .recognition import FRAME_CROP_H, FRAME_CROP_W, PROBE_POINTS, CubeRecognition
+
+DEBUG_INTERVAL = 0.2
+DEBUG_SCALE = 0.5
+DEBUG_QUALITY = 70
+
+COLORS = {
+    CubeColor.UNKNOWN: (128, 128, 128),
+    CubeColor.NONE: (128, 128, 128),
+    CubeColor.BLUE: (255, 0, 0),
+    CubeColor.RED: (0, 0, 255),
+    CubeColor.YELLOW: (0, 255, 255),
+}
+
+
+class DebugView:
+    """Publishes annotated frames of the video stream to show what the cube image recognition sees.
+
+    The video stream processing only hands over the latest frame and the vote counts while a client
+    is subscribed. A separate thread annotates the frame with the contours, the reference offset
+    and the probe points, downscales it and encodes it as JPEG at a throttled rate. The thread is
+    started with the first subscriber and stops after the last one left, so the debug view costs
+    nothing while it is not watched.
+    """
+
+    def __init__(self, interval: float = DEBUG_INTERVAL, scale: float = DEBUG_SCALE, quality: int = DEBUG_QUALITY):
+        self._logger = logging.getLogger('video.debug_view')
+        self._interval = interval
+        self._scale = scale
+        self._quality = quality
+        self._condition = threading.Condition()
+        self._halt_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._subscribers = 0
+        self._frame: Any = None
+        self._votes: dict[str, dict[str, int]] = {}
+        self._published: tuple[bytes, int] = (b'', 0)
+        self._placeholder = b''
+
+    @property
+    def active(self) -> bool:
+        """Returns true if a client is subscribed to the debug view."""
+        return self._subscribers > 0
+
+    @property
+    def version(self) -> int:
+        """Returns the version of the latest encoded frame, incremented on every frame."""
+        return self._published[1]
+
+    @property
+    def placeholder(self) -> bytes:
+        """Returns the JPEG shown while no frame was encoded yet, encoded on first use."""
+        if not self._placeholder:
+            image = np.full((FRAME_CROP_H, FRAME_CROP_W, 3), 64, dtype=np.uint8)
+            cv2.putText(image, 'Waiting for video stream', (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+            self._placeholder = self.encode(image, self._scale, self._quality)
+        return self._placeholder
+
+    def put_frame(self, frame: Any, votes: dict[str, dict[str, int]]) -> None:
+        """Hands over the latest frame and the vote counts per position, ignored without subscribers."""
+        if not self.active or frame is None:
+            return
+        with self._condition:
+            self._frame = frame
+            self._votes = {pos: counts.copy() for pos, counts in votes.items()}
+            self._condition.notify_all()
+
+    def subscribe(self) -> None:
+        """Subscribes a client and starts the encoder thread for the first one."""
+        with self._condition:
+            self._subscribers += 1
+            if self._thread is None:
+                self._logger.info('Starting debug view encoder')
+                self._halt_event.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self) -> None:
+        """Unsubscribes a client, the encoder thread stops after the last one."""
+        with self._condition:
+            self._subscribers = max(0, self._subscribers - 1)
+            self._condition.notify_all()
+
+    def halt(self) -> None:
+        """Halts the encoder thread and wakes up the waiting clients."""
+        self._halt_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait_for_frame(self, version: int, timeout: float | None = None) -> tuple[bytes, int]:
+        """Waits until a frame newer than the version is encoded, returns the latest frame and its version."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._published[1] != version or self._halt_event.is_set(), timeout)
+            return self._published
+
+    def _run(self) -> None:
+        """Encodes the latest frame at the throttled rate while clients are subscribed."""
+        while not self._halt_event.is_set():
+            with self._condition:
+                self._condition.wait_for(lambda: self._frame is not None or self._subscribers == 0 or
+                                         self._halt_event.is_set())
+                if self._subscribers == 0 or self._halt_event.is_set():
+                    self._frame = None
+                    self._thread = None
+                    self._logger.info('Debug view encoder stopped')
+                    return
+                frame, votes, self._frame = self._frame, self._votes, None
+
+            jpeg = self.encode(self.annotate(frame, votes), self._scale, self._quality)
+            with self._condition:
+                self._published = (jpeg, self._published[1] + 1)
+                self._condition.notify_all()
+            self._halt_event.wait(self._interval)
+
+        with self._condition:
+            self._thread = None
+
+    @staticmethod
+    def annotate(frame: Any, votes: dict[str, dict[str, int]]) -> Any:
+        """Returns a copy of the frame with the intermediate results of the cube image recognition drawn on it."""
+        details = CubeRecognition.analyze_frame(frame)
+        image = frame.copy()
+        cv2.drawContours(image, details.contours_ref, -1, (255, 255, 255), 1)
+        if details.contour_cube is not None:
+            cv2.drawContours(image, [details.contour_cube], -1, (255, 255, 255), 2)
+        for color, contour, _ in details.contour_map:
+            cv2.drawContours(image, [contour], -1, COLORS[color], 2)
+
+        for offset, points in enumerate(CubeRecognition.reference_points(FRAME_CROP_W, FRAME_CROP_H)):
+            for point in points:
+                cv2.circle(image, point, 6, (0, 255, 0) if offset == details.offset else (128, 128, 128), -1)
+        for pos, point in PROBE_POINTS.items():
+            cv2.drawMarker(image, point, (255, 0, 255), cv2.MARKER_CROSS, 20, 2)
+            label = str(DebugView._rotated_position(pos, details.offset)) if details.offset >= 0 else '?'
+            cv2.putText(image, label, (point[0] + 8, point[1] - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+
+        lines = [f'offset: {details.offset}'] + [
+            f'{pos}: ' + ' '.join(f'{color or "none"} {count}' for color, count in sorted(votes[pos].items()))
+            for pos in sorted(votes, key=int)
+        ]
+        for i, line in enumerate(lines):
+            cv2.putText(image, line, (10, 25 + i * 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 3)
+            cv2.putText(image, line, (10, 25 + i * 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        return image
+
+    @staticmethod
+    def encode(image: Any, scale: float, quality: int) -> bytes:
+        """Downscales the image and encodes it as JPEG."""
+        if scale != 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        success, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return data.tobytes() if success else b''
+
+    @staticmethod
+    def _rotated_position(pos: int, offset: int) -> int:
+        """Returns the position in the configuration the probe point refers to with the reference offset."""
+        start_index = 4 if pos > 4 else 0
+        return (pos - 1 - start_index + offset) % 4 + start_index + 1
@@ -10,16 +10,18 @@ import cv2
 
 from shared.data import AppConfiguration, CubeConfiguration
 from shared.enumerations import CubeColor
+from .debug import DebugView
 from .recognition import CubeRecognition
 
 
 class StreamProcessing:
     """Processes the incoming video stream."""
 
-    def __init__(self, app_config: AppConfiguration, builder_queue: queue.Queue):
+    def __init__(self, app_config: AppConfiguration, builder_queue: queue.Queue, debug_view: DebugView | None = None):
         self._logger = logging.getLogger('video.stream_processing')
         self._app_config = app_config
         self._builder_queue = builder_queue
+        self._debug_view = debug_view
         self._halt_event = Event()
         self._recognition = Event()
         self._thread: Thread | None = None
@@ -71,6 +73,8 @@ class StreamProcessing:
                         if frame_queue.full():
                             frame_queue.get_nowait()
                         frame_queue.put(frame)
+                        if self._debug_view is not None:
+                            self._debug_view.put_frame(frame, self._recognition_result)
 
                         if not self._recognition.is_set():
                             self._cube_config.reset()
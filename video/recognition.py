@@ -1,4 +1,5 @@
 """Implements the cube image recognition module."""
+from dataclasses import dataclass, field
 from typing import Any
 
 import cv2
@@ -26,6 +27,19 @@ UPPER_RED_HIGH = np.array([180, 255, 255])
 LOWER_YELLOW = np.array([20, 75, 50])
 UPPER_YELLOW = np.array([40, 255, 255])
 
+# Points of the cube positions in the frame, before applying the reference offset
+PROBE_POINTS = {1: (200, 300), 2: (300, 300), 7: (300, 80), 8: (200, 80)}
+
+
+@dataclass
+class RecognitionDetails:
+    """The intermediate results of the cube image recognition of a frame."""
+    config: list[CubeColor]
+    contour_cube: Any = None
+    contours_ref: list[Any] = field(default_factory=list)
+    contour_map: list[tuple[CubeColor, Any, tuple[int, int]]] = field(default_factory=list)
+    offset: int = -1
+
 
 class CubeRecognition:
     """Provides functions to run the cube image recognition."""
@@ -43,9 +57,14 @@ class CubeRecognition:
     @staticmethod
     def process_frame(frame: Any) -> list[CubeColor]:
         """Performs the cube image recognition on a single frame."""
+        return CubeRecognition.analyze_frame(frame).config
+
+    @staticmethod
+    def analyze_frame(frame: Any) -> RecognitionDetails:
+        """Performs the cube image recognition on a single frame and returns the intermediate results."""
         config = CubeConfiguration()
         if frame is None:
-            return config.config
+            return RecognitionDetails(config.config)
 
         # Color Segmentation
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
@@ -66,7 +85,7 @@ class CubeRecognition:
         contours_red = CubeRecognition._contour_with_min_size(mask_red)
         contours_yellow = CubeRecognition._contour_with_min_size(mask_yellow)
         if not contours_cube or not contours_ref:
-            return config.config
+            return RecognitionDetails(config.config, contours_ref=contours_ref)
 
         # Filter contours that are not near the detected cube
         contour_cube = max(contours_cube, key=lambda c: cv2.contourArea(c))  # pylint: disable=unnecessary-lambda
@@ -78,11 +97,19 @@ class CubeRecognition:
 
         offset = CubeRecognition._reference_offset(contours_ref, FRAME_CROP_W, FRAME_CROP_H)
         if offset >= 0 and len(contour_map) > 0:
-            config.set_color(CubeRecognition._find_color_for_point(contour_map, None, (200, 300)), 1, offset)
-            config.set_color(CubeRecognition._find_color_for_point(contour_map, None, (300, 300)), 2, offset)
-            config.set_color(CubeRecognition._find_color_for_point(contour_map, None, (300, 80)), 7, offset)
-            config.set_color(CubeRecognition._find_color_for_point(contour_map, None, (200, 80)), 8, offset)
-        return config.config
+            for pos, point in PROBE_POINTS.items():
+                config.set_color(CubeRecognition._find_color_for_point(contour_map, None, point), pos, offset)
+        return RecognitionDetails(config.config, contour_cube, contours_ref, contour_map, offset)
+
+    @staticmethod
+    def reference_points(width: int, height: int) -> list[list[tuple[int, int]]]:
+        """Returns the points that must be within the reference for each reference offset."""
+        return [
+            [(25, height - 25), (25, height - 100), (200, height - 25)],
+            [(25, height - 175), (75, 150), (125, 125)],
+            [(width - 25, height - 175), (width - 75, 150), (width - 125, 125)],
+            [(width - 25, height - 25), (width - 25, height - 100), (width - 200, height - 25)],
+        ]
 
     @staticmethod
     def _contour_center(contour: Any) -> tuple[int, int]:
@@ -120,26 +147,10 @@ class CubeRecognition:
         """Returns the reference offset, negative if not entirely clear."""
         count = 0
         offset = -1
-        if (CubeRecognition._point_in_any_contour(refs, (25, height - 25)) and
-                CubeRecognition._point_in_any_contour(refs, (25, height - 100)) and
-                CubeRecognition._point_in_any_contour(refs, (200, height - 25))):
-            count += 1
-            offset = 0
-        if (CubeRecognition._point_in_any_contour(refs, (25, height - 175)) and
-                CubeRecognition._point_in_any_contour(refs, (75, 150)) and
-                CubeRecognition._point_in_any_contour(refs, (125, 125))):
-            count += 1
-            offset = 1
-        if (CubeRecognition._point_in_any_contour(refs, (width - 25, height - 175)) and
-                CubeRecognition._point_in_any_contour(refs, (width - 75, 150)) and
-                CubeRecognition._point_in_any_contour(refs, (width - 125, 125))):
-            count += 1
-            offset = 2
-        if (CubeRecognition._point_in_any_contour(refs, (width - 25, height - 25)) and
-                CubeRecognition._point_in_any_contour(refs, (width - 25, height - 100)) and
-                CubeRecognition._point_in_any_contour(refs, (width - 200, height - 25))):
-            count += 1
-            offset = 3
+        for ref_offset, points in enumerate(CubeRecognition.reference_points(width, height)):
+            if all(CubeRecognition._point_in_any_contour(refs, point) for point in points):
+                count += 1
+                offset = ref_offset
         return offset if count == 1 else -1
 
     @staticmethod
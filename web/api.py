@@ -1,52 +1,156 @@
 """Implements the Cube API."""
+import json
 import logging
+import os
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from threading import Event, Lock
 from typing import Any, Callable
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from shared.config import OUTBOX_FILE
 from shared.data import AppConfiguration
 
+RETRIES = 5
+RETRY_INTERVAL = 0.2
+RETRY_INTERVAL_MAX = 5.0
+TIMEOUT = 10.0
+
+
+@dataclass
+class OutboxEntry:
+    """A request of a run that is kept on disk until the Cube API received it."""
+    path: str
+    data: dict[str, Any] | None
+    created: float
+    run: float = 0.0
+
 
 class CubeApi:
-    """Provides functions to interact with the Cube API."""
+    """Provides functions to interact with the Cube API.
+
+    The requests share a session that keeps the connection to the Cube API alive, so only the
+    first request pays for the TLS handshake. The configuration and the end of the run are put
+    into an outbox on disk and are sent in order by their own worker until the Cube API received
+    them, also after a restart of the application. The requests belong to the run they were put
+    into the outbox in and are dropped when the next run starts, so they can not reach the Cube API
+    after the start request of the next run.
+    """
 
-    def __init__(self, app_config: AppConfiguration):
+    def __init__(self, app_config: AppConfiguration, outbox_path: str = OUTBOX_FILE):
         self._logger = logging.getLogger('web.cube_api')
         self._address = app_config.api_address
         self._team_nr = app_config.api_team_nr
-        self._auth_token = app_config.api_token
         self._executor = ThreadPoolExecutor(max_workers=1)
+        self._outbox_executor = ThreadPoolExecutor(max_workers=1)
+        self._halt_event = Event()
+        self._session = requests.Session()
+        self._session.headers.update({'Auth': f'{app_config.api_token}'})
+        for scheme in ('https://', 'http://'):
+            self._session.mount(scheme, HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._outbox_path = outbox_path
+        self._outbox: list[OutboxEntry] = []
+        self._outbox_lock = Lock()
+        self._delivery_lock = Lock()
+        self._started = Event()
+        self._started.set()
+        self._run = 0.0
+        self._start_latency: float | None = None
+        self._delivery_latencies: deque[float] = deque(maxlen=1000)
+
+    @property
+    def outbox(self) -> list[OutboxEntry]:
+        """Returns the requests waiting to be received by the Cube API."""
+        with self._outbox_lock:
+            return self._outbox.copy()
+
+    @property
+    def start_latency(self) -> float | None:
+        """Returns the seconds from sending the start request until the Cube API answered it."""
+        return self._start_latency
+
+    @property
+    def delivery_latencies(self) -> list[float]:
+        """Returns the latest latencies in seconds between putting a request into the outbox and its delivery."""
+        return list(self._delivery_latencies)
+
+    def start(self) -> None:
+        """Loads the outbox and sends the requests left over from the previous run of the application."""
+        self._halt_event.clear()
+        self._load_outbox()
+        if self._outbox:
+            self._logger.info('Sending %s requests left in the outbox', len(self._outbox))
+            self._outbox_executor.submit(self._deliver)
+
+    def start_run(self) -> None:
+        """Drops the requests of the earlier runs from the outbox and submits the start request of a new run.
+
+        A request of an earlier run that is being sent is answered before the start request is sent, the
+        requests of the new run are only sent after it.
+        """
+        with self._outbox_lock:
+            self._run = time.time()
+            self._started.clear()
+            if self._outbox:
+                self._logger.warning('Dropped %s requests of the previous run from the outbox', len(self._outbox))
+                self._outbox = []
+                self._save_outbox()
+        self._executor.submit(self._start)
 
     def submit(self, request: Callable, *args: Any) -> None:
         """Submits a new request to execute."""
         self._logger.info('Submitting new request to execute')
         self._executor.submit(self._send_with_retry, request, *args)
 
+    def submit_config(self, cube_config: dict[str, str], timestamp: datetime) -> None:
+        """Puts the recognized cube configuration into the outbox."""
+        self._enqueue(f'/cubes/team{self._team_nr}/config', {'time': timestamp.isoformat(), 'config': cube_config})
+
+    def submit_end(self) -> None:
+        """Puts the end of the current run into the outbox."""
+        self._enqueue(f'/cubes/team{self._team_nr}/end')
+
+    def warm_up(self) -> None:
+        """Opens the connection to the Cube API in the background to send the start request without delay."""
+        self._logger.info('Opening connection to the Cube API')
+        self._executor.submit(self.get_availability)
+
     def shutdown(self) -> None:
-        """Shuts the executor down."""
-        self._logger.info('Shutting down executor')
+        """Shuts the executors down, the requests in the outbox are sent after the next start."""
+        self._logger.info('Shutting down executors')
+        self._halt_event.set()
         self._executor.shutdown()
+        self._outbox_executor.shutdown()
+        self._session.close()
 
     def get_availability(self) -> bool:
         """Sends a GET request to the availability endpoint."""
         self._logger.info('Sending availability request')
-        response = self._get_request(f'https://{self._address}/cubes')
+        response = self._get_request(self._url('/cubes'))
         return 200 <= response.status_code <= 299 if response else False
 
     def get_config(self) -> bool:
         """Sends a GET request to receive the recognized cube configuration."""
         self._logger.info('Sending cube config request')
-        response = self._get_request(f'https://{self._address}/cubes/team{self._team_nr}')
+        response = self._get_request(self._url(f'/cubes/team{self._team_nr}'))
         return 200 <= response.status_code <= 299 if response else False
 
     def post_start(self) -> bool:
         """Sends a POST request to start a new run."""
         self._logger.info('Sending start request')
-        response = self._post_request(f'https://{self._address}/cubes/team{self._team_nr}/start')
-        return 200 <= response.status_code <= 299 if response else False
+        self._start_latency = None
+        start = time.perf_counter()
+        response = self._post_request(self._url(f'/cubes/team{self._team_nr}/start'))
+        success = 200 <= response.status_code <= 299 if response else False
+        if success:
+            self._start_latency = time.perf_counter() - start
+            self._logger.info('Start request answered in %.3fs', self._start_latency)
+        return success
 
     def post_config(self, cube_config: dict[str, str], timestamp: datetime) -> bool:
         """Sends a POST request with the recognized cube configuration."""
@@ -55,21 +159,26 @@ class CubeApi:
             'time': timestamp.isoformat(),
             'config': cube_config
         }
-        response = self._post_request(f'https://{self._address}/cubes/team{self._team_nr}/config', data=data)
+        response = self._post_request(self._url(f'/cubes/team{self._team_nr}/config'), data=data)
         return 200 <= response.status_code <= 299 if response else False
 
     def post_end(self) -> bool:
         """Sends a POST request to end the current run."""
         self._logger.info('Sending end request')
-        response = self._post_request(f'https://{self._address}/cubes/team{self._team_nr}/end')
+        response = self._post_request(self._url(f'/cubes/team{self._team_nr}/end'))
         return 200 <= response.status_code <= 299 if response else False
 
+    def _url(self, path: str) -> str:
+        """Returns the URL of the path on the Cube API, the address defaults to HTTPS without a scheme."""
+        if self._address.startswith(('http://', 'https://')):
+            return f'{self._address.rstrip("/")}{path}'
+        return f'https://{self._address}{path}'
+
     def _get_request(self, url: str) -> requests.Response | None:
         """Sends a GET request to the specified URL."""
-        headers = {'Auth': f'{self._auth_token}'}
         self._logger.info('GET request: %s', url)
         try:
-            response = requests.get(url=url, headers=headers, timeout=10.0)
+            response = self._session.get(url=url, timeout=TIMEOUT)
             self._logger.info('GET response: status=%s, data=%s', response.status_code, self._parse_data(response))
             return response
         except requests.exceptions.RequestException as error:
@@ -78,16 +187,92 @@ class CubeApi:
 
     def _post_request(self, url: str, data: dict[str, Any] | None = None) -> requests.Response | None:
         """Sends a POST request to the specified URL."""
-        headers = {'Auth': f'{self._auth_token}'}
         self._logger.info('POST request: %s data=%s', url, data)
         try:
-            response = requests.post(url=url, headers=headers, json=data, timeout=10.0)
+            response = self._session.post(url=url, json=data, timeout=TIMEOUT)
             self._logger.info('POST response: status=%s, data=%s', response.status_code, self._parse_data(response))
             return response
         except requests.exceptions.RequestException as error:
             self._logger.error('Request failed: url=%s, error=%s', url, error)
             return None
 
+    def _enqueue(self, path: str, data: dict[str, Any] | None = None) -> None:
+        """Puts the request into the outbox and submits its delivery."""
+        with self._outbox_lock:
+            self._outbox.append(OutboxEntry(path, data, time.time(), self._run))
+            self._save_outbox()
+        self._outbox_executor.submit(self._deliver)
+
+    def _deliver(self) -> None:
+        """Sends the requests of the outbox in order until they were received or the executor is shut down.
+
+        The requests of the current run wait until its start request was sent.
+        """
+        attempt = 0
+        while not self._halt_event.is_set():
+            if not self._started.wait(RETRY_INTERVAL_MAX):
+                continue
+            with self._delivery_lock:
+                with self._outbox_lock:
+                    if not self._outbox:
+                        return
+                    if not self._started.is_set():
+                        # The next run started after the wait
+                        continue
+                    entry = self._outbox[0]
+                response = self._post_request(self._url(entry.path), data=entry.data)
+            if response is None or response.status_code >= 500 or response.status_code in (408, 429):
+                interval = min(RETRY_INTERVAL * 2 ** attempt, RETRY_INTERVAL_MAX)
+                attempt += 1
+                self._halt_event.wait(interval)
+                continue
+
+            if response.ok:
+                self._delivery_latencies.append(time.time() - entry.created)
+            else:
+                self._logger.error('Request rejected, removing it from the outbox: %s', entry.path)
+            attempt = 0
+            with self._outbox_lock:
+                # The request was dropped if the next run started while it was sent
+                if any(outbox_entry is entry for outbox_entry in self._outbox):
+                    self._outbox = [outbox_entry for outbox_entry in self._outbox if outbox_entry is not entry]
+                    self._save_outbox()
+
+    def _start(self) -> None:
+        """Sends the start request after the request of the previous run that is being sent was answered."""
+        with self._delivery_lock:
+            self._send_with_retry(self.post_start)
+        self._started.set()
+
+    def _load_outbox(self) -> None:
+        """Loads the outbox file, only the requests of the latest run are kept."""
+        try:
+            with open(self._outbox_path, 'r', encoding='utf-8') as outbox_file:
+                entries = [OutboxEntry(**entry) for entry in json.load(outbox_file)]
+        except FileNotFoundError:
+            return
+        except (PermissionError, json.JSONDecodeError, TypeError) as error:
+            self._logger.error('Failed to read %s file: %s', self._outbox_path, error)
+            return
+
+        latest_run = max((entry.run for entry in entries), default=0.0)
+        with self._outbox_lock:
+            self._outbox = [entry for entry in entries if entry.run == latest_run]
+            if len(self._outbox) < len(entries):
+                self._logger.warning('Dropped %s requests of earlier runs from the outbox',
+                                     len(entries) - len(self._outbox))
+                self._save_outbox()
+
+    def _save_outbox(self) -> None:
+        """Writes the outbox file, must be called with the outbox lock held."""
+        temp_path = f'{self._outbox_path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as outbox_file:
+                json.dump([asdict(entry) for entry in self._outbox], outbox_file, indent=2)
+            os.replace(temp_path, self._outbox_path)
+        except (FileNotFoundError, PermissionError) as error:
+            self._logger.error('Failed to write %s file: %s', self._outbox_path, error)
+
     @staticmethod
     def _parse_data(response: requests.Response) -> str | dict[str, Any]:
         """Parses the data of the response."""
@@ -99,9 +284,9 @@ class CubeApi:
     @staticmethod
     def _send_with_retry(request: Callable, *args: Any) -> None:
         """Retries sending the request if it failed."""
-        for i in range(5):
+        for i in range(RETRIES):
             if not request(*args):
-                interval = 0.2 * (i + 1)
+                interval = RETRY_INTERVAL * (i + 1)
                 time.sleep(interval)
             else:
                 break
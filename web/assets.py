@@ -0,0 +1,108 @@
+"""Implements the static assets of the user interface."""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+
+from flask import Request, Response
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:
+    brotli = None
+
+STATIC_FOLDER = 'static'
+INDEX_FILE = 'index.html'
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+MIN_COMPRESS_SIZE = 256
+
+
+@dataclass
+class Asset:
+    """A static asset with its precompressed variants."""
+    name: str
+    mimetype: str
+    digest: str
+    hashed: bool
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+
+class StaticAssets:
+    """Serves the static assets of the user interface from memory.
+
+    The assets are read and compressed with gzip and, if available, brotli once at startup. The
+    stylesheets and scripts are also served under a name containing the hash of their content,
+    which is referenced by the index page and cached by the browser without revalidation. The
+    index page and the assets under their plain name are revalidated with their entity tag.
+    """
+
+    def __init__(self, folder: str = STATIC_FOLDER) -> None:
+        self._logger = logging.getLogger('web.assets')
+        self._folder = folder
+        self._assets: dict[str, Asset] = {}
+
+    def load(self) -> None:
+        """Reads and compresses the assets of the static folder."""
+        contents: dict[str, bytes] = {}
+        try:
+            for name in sorted(os.listdir(self._folder)):
+                path = os.path.join(self._folder, name)
+                if os.path.isfile(path):
+                    with open(path, 'rb') as asset_file:
+                        contents[name] = asset_file.read()
+        except (FileNotFoundError, PermissionError) as error:
+            self._logger.error('Failed to read static assets %s: %s', self._folder, error)
+            return
+
+        assets: dict[str, Asset] = {}
+        hashed_names: dict[str, str] = {}
+        for name, data in contents.items():
+            if name == INDEX_FILE:
+                continue
+            asset = self._asset(name, data)
+            stem, extension = os.path.splitext(name)
+            hashed_names[name] = f'{stem}.{asset.digest}{extension}'
+            assets[name] = asset
+            assets[hashed_names[name]] = Asset(name, asset.mimetype, asset.digest, True, asset.variants)
+
+        if INDEX_FILE in contents:
+            index = contents[INDEX_FILE].decode('utf-8')
+            for name, hashed_name in hashed_names.items():
+                index = re.sub(rf'((?:href|src)="){re.escape(name)}"', rf'\g<1>{hashed_name}"', index)
+            assets[INDEX_FILE] = self._asset(INDEX_FILE, index.encode('utf-8'))
+
+        self._assets = assets
+        self._logger.info('Loaded %s static assets, brotli %savailable', len(contents),
+                          '' if brotli is not None else 'not ')
+
+    def response(self, name: str, request: Request) -> Response | None:
+        """Returns the response with the asset in the best encoding the client accepts, none if not found."""
+        asset = self._assets.get(name)
+        if asset is None:
+            return None
+        encoding = next((encoding for encoding in ('br', 'gzip') if encoding in asset.variants and
+                         request.accept_encodings[encoding] > 0), 'identity')
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        response.set_etag(f'{asset.digest}-{encoding}')
+        response.headers['Cache-Control'] = CACHE_IMMUTABLE if asset.hashed else CACHE_REVALIDATE
+        response.vary.add('Accept-Encoding')
+        if encoding != 'identity':
+            response.content_encoding = encoding
+        response.make_conditional(request)
+        return response
+
+    @staticmethod
+    def _asset(name: str, data: bytes) -> Asset:
+        """Returns the asset with its hash and its compressed variants, if they are smaller."""
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        asset = Asset(name, mimetype, hashlib.blake2b(data, digest_size=8).hexdigest(), False, {'identity': data})
+        if len(data) >= MIN_COMPRESS_SIZE:
+            compressed = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(data, quality=11)
+            asset.variants.update({encoding: value for encoding, value in compressed.items() if len(value) < len(data)})
+        return asset
@@ -1,41 +1,114 @@
 """Implements the web server."""
 import logging
-import queue
 import threading
+import time
 from dataclasses import asdict
-from typing import Any
+from typing import Any, Callable, Iterator
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
+from waitress import wasyncore  # type: ignore[import-untyped]
+from waitress.server import create_server  # type: ignore[import-untyped]
+from werkzeug.serving import make_server
 
-from shared.config import read_config_file, write_config_file
-from shared.data import StatusData
+from rebuilder.history import RunHistory
+from shared.actionqueue import ActionQueue
+from shared.configstore import ConfigStore
+from shared.data import AppConfiguration, SharedStatus
 from shared.enumerations import Action
+from video.debug import DebugView
+from .assets import INDEX_FILE, StaticAssets
+
+WEB_HOST = '127.0.0.1'
+WEB_PORT = 5000
+HALT_POLL_INTERVAL = 1.0
+KEEP_ALIVE_INTERVAL = 15.0
+SHUTDOWN_TIMEOUT = 5.0
+DEBUG_BOUNDARY = 'frame'
 
 
 class WebServer:
-    """Implements the web server used to serve the user interface."""
+    """Implements the web server used to serve the user interface.
+
+    The user interface is served by waitress with a pool of worker threads or, if configured,
+    by the development server of flask with a thread per request. Halting the web server stops
+    the event streams and waits for the running requests before the server is closed.
+    """
 
-    def __init__(self, web_queue: queue.Queue, status_data: StatusData):
+    def __init__(self, app_config: AppConfiguration, config_store: ConfigStore, web_queue: ActionQueue,
+                 status_data: SharedStatus, debug_view: DebugView | None = None,
+                 run_history: RunHistory | None = None):
         self._logger = logging.getLogger('web.server')
+        self._app_config = app_config
+        self._config_store = config_store
         self._web_queue = web_queue
         self._status_data = status_data
-        self._app = Flask('PREN 3D Re-Builder', static_url_path='')
+        self._debug_view = debug_view
+        self._run_history = run_history
+        self._app = Flask('PREN 3D Re-Builder', static_folder=None)
+        self._assets = StaticAssets()
+        self._halt_event = threading.Event()
+        self._shutdown: Callable[[], None] | None = None
         self._thread: threading.Thread | None = None
 
     def start(self) -> None:
-        """Starts the flask webserver in a thread."""
+        """Starts the web server in a thread."""
+        self._halt_event.clear()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
+    def halt(self) -> None:
+        """Halts the web server, the running requests are completed first."""
+        self._logger.info('Halting web server')
+        self._halt_event.set()
+        if self._shutdown is not None:
+            self._shutdown()
+            self._shutdown = None
+
+    def stop(self) -> None:
+        """Waits for the web server thread to stop."""
+        if self._thread is not None:
+            self._thread.join(timeout=SHUTDOWN_TIMEOUT)
+            if self._thread.is_alive():
+                self._logger.warning('Web server did not stop within %ss', SHUTDOWN_TIMEOUT)
+            self._thread = None
+
     def _run(self) -> None:
-        """Runs the flask web server."""
-        self._logger.info('Starting flask web server')
+        """Runs the web server until it is halted."""
         self._add_routes()
-        self._app.run(use_reloader=False)
+        serve: Callable[[], None]
+        if self._app_config.web_server == 'waitress':
+            self._logger.info('Starting waitress web server with %s threads', self._app_config.web_threads)
+            socket_map: dict = {}
+            server = create_server(self._app, map=socket_map, host=WEB_HOST, port=WEB_PORT,
+                                   threads=self._app_config.web_threads)
+
+            def _shutdown() -> None:
+                server.accepting = False
+                server.task_dispatcher.shutdown(timeout=SHUTDOWN_TIMEOUT)
+                server.trigger.pull_trigger(lambda: wasyncore.close_all(socket_map))
+
+            self._shutdown = _shutdown
+            serve = server.run
+        else:
+            self._logger.info('Starting flask web server')
+            dev_server = make_server(WEB_HOST, WEB_PORT, self._app, threaded=True)
+            self._shutdown = dev_server.shutdown
+            serve = dev_server.serve_forever
+
+        if not self._halt_event.is_set():
+            serve()
+        self._logger.info('Web server stopped')
 
     def _add_routes(self) -> None:
         """Add the routes that should be handled."""
         self._logger.info('Registering routes')
+        self._assets.load()
+
+        @self._app.route('/', methods=['GET'])
+        @self._app.route('/<path:name>', methods=['GET'])
+        def _asset(name: str = INDEX_FILE):
+            response = self._assets.response(name, request)
+            return response if response is not None else ('Not found', 404)
 
         @self._app.route('/action', methods=['POST'])
         def _action():
@@ -43,18 +116,19 @@ class WebServer:
             self._logger.info('Received action request: %s', data)
             try:
                 action = Action(data.get('action', ''))
-                self._web_queue.put(action)
             except (KeyError, ValueError) as error:
                 self._logger.warning('Invalid action data: %s', error)
                 return 'Invalid action', 400
-            return 'OK', 200
+            return jsonify(asdict(self._web_queue.submit(action))), 202
 
         @self._app.route('/settings', methods=['GET', 'POST'])
         def _settings():
             if request.method == 'GET':
-                settings = read_config_file().get('app', {})
+                settings, etag = self._config_store.get('app')
                 self._logger.info('Current settings: %s', settings)
-                return jsonify(settings), 200
+                response = jsonify(settings)
+                response.set_etag(etag)
+                return response.make_conditional(request)
 
             if request.method == 'POST':
                 data = request.get_json()
@@ -63,25 +137,91 @@ class WebServer:
                     self._logger.warning('Invalid settings data')
                     return 'Invalid data', 400
 
-                config = read_config_file()
-                config['app'] = data
-                write_config_file(config)
-                return 'OK', 200
+                if_match = request.if_match.as_set()
+                etag = self._config_store.update('app', data, next(iter(if_match)) if if_match else None)
+                if etag is None:
+                    return 'Settings changed', 412
+                response = Response('OK')
+                response.set_etag(etag)
+                return response, 200
 
         @self._app.route('/status', methods=['GET'])
         def _status():
-            return jsonify(asdict(self._status_data)), 200
+            data, _ = self._status_data.to_json()
+            return Response(data, mimetype='application/json'), 200
+
+        @self._app.route('/events', methods=['GET'])
+        def _events():
+            self._logger.info('Client subscribed to status events: %s', request.remote_addr)
+            headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            return Response(stream_with_context(self._status_events()), mimetype='text/event-stream',
+                            headers=headers), 200
+
+        @self._app.route('/runs', methods=['GET'])
+        def _runs():
+            if self._run_history is None:
+                return 'Run history not available', 404
+            limit = request.args.get('limit', type=int)
+            if limit is not None and limit <= 0:
+                return 'Invalid limit', 400
+            return jsonify(self._run_history.summary(limit, request.args.get('mode'))), 200
+
+        @self._app.route('/debug', methods=['GET'])
+        def _debug():
+            if self._debug_view is None:
+                return 'Debug view not available', 404
+            self._logger.info('Client subscribed to debug view: %s', request.remote_addr)
+            headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            return Response(self._debug_frames(self._debug_view),
+                            mimetype=f'multipart/x-mixed-replace; boundary={DEBUG_BOUNDARY}', headers=headers), 200
+
+    def _status_events(self) -> Iterator[str]:
+        """Yields the status as server-sent event on every change, starting with the current status."""
+        version = -1
+        last_event = time.monotonic()
+        while not self._halt_event.is_set():
+            if self._status_data.wait_for_change(version, HALT_POLL_INTERVAL) == version:
+                if time.monotonic() - last_event >= KEEP_ALIVE_INTERVAL:
+                    last_event = time.monotonic()
+                    yield ': keep-alive\n\n'
+                continue
+            data, version = self._status_data.to_json()
+            last_event = time.monotonic()
+            yield f'id: {version}\ndata: {data}\n\n'
+
+    def _debug_frames(self, debug_view: DebugView) -> Iterator[bytes]:
+        """Yields the annotated frames of the debug view as parts of an MJPEG stream while the client is connected.
+
+        The stream starts with the latest frame, or a placeholder if none was encoded yet, which is repeated after
+        the keep-alive interval without new frames, so a closed connection is noticed on the next write.
+        """
+        debug_view.subscribe()
+        try:
+            version = -1
+            last_frame = 0.0
+            while not self._halt_event.is_set():
+                jpeg, new_version = debug_view.wait_for_frame(version, HALT_POLL_INTERVAL)
+                if new_version == version and time.monotonic() - last_frame < KEEP_ALIVE_INTERVAL:
+                    continue
+                jpeg = jpeg or debug_view.placeholder
+                version = new_version
+                last_frame = time.monotonic()
+                yield (f'--{DEBUG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                       f'Content-Length: {len(jpeg)}\r\n\r\n').encode() + jpeg + b'\r\n'
+        finally:
+            debug_view.unsubscribe()
+            self._logger.info('Client unsubscribed from debug view')
 
     @staticmethod
     def _validate_settings(data: dict[str, Any]) -> bool:
         """Validates the settings data."""
-        if len(data.keys()) != 5:
+        if len(data.keys()) != 6:
             return False
         for key, value in data.items():
             if key in ('confidence', 'recognition_timeout'):
                 if not isinstance(value, int) or value <= 0:
                     return False
-            elif key in ('efficiency_mode', 'fast_mode', 'incremental_build'):
+            elif key in ('efficiency_mode', 'fast_mode', 'incremental_build', 'speculative_build'):
                 if not isinstance(value, bool):
                     return False
             else: